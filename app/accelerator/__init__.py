@@ -1,4 +1,30 @@
-from app.accelerator.gpu_manager import GPUManager
-from app.accelerator.concurrent_manager import ConcurrentManager
+import importlib
+from typing import Any, Dict
 
-__all__ = ["GPUManager", "ConcurrentManager"]
+# Backends are imported on first use so that importing the crawler (and the
+# API process) doesn't pay for numerical libraries it may never touch
+_BACKENDS: Dict[str, str] = {
+    "URLScorer": "app.accelerator.url_scorer",
+    "ConcurrentManager": "app.accelerator.concurrent_manager",
+}
+
+
+def register_backend(name: str, module_path: str) -> None:
+    """Register a backend class `name` defined in `module_path`"""
+    _BACKENDS[name] = module_path
+
+
+def get_backend(name: str) -> Any:
+    """Import and return a registered backend class"""
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    backend = getattr(importlib.import_module(_BACKENDS[name]), name)
+    globals()[name] = backend  # Later lookups skip __getattr__
+    return backend
+
+
+def __getattr__(name: str) -> Any:
+    return get_backend(name)
+
+
+__all__ = ["URLScorer", "ConcurrentManager", "get_backend", "register_backend"]
@@ -1,14 +1,186 @@
 import asyncio
+import atexit
 import logging
 import multiprocessing
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-from typing import List, Dict, Any, Optional, Callable
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from functools import partial
+from app.metrics import (
+    CONCURRENT_TASKS_ACTIVE,
+    CONCURRENT_TASKS_LIMIT,
+    CONCURRENT_WAIT_SECONDS,
+    PENDING_PROCESS,
+    PENDING_THREAD,
+)
 
 logger = logging.getLogger(__name__)
 
+THREAD = "thread"
+PROCESS = "process"
+
+# Strings at least this large cross to worker processes through shared memory
+SHARED_MEMORY_THRESHOLD = 64 * 1024
+
+
+@dataclass(frozen=True)
+class SharedPayload:
+    """Handle to a string parked in a shared memory block; pickles as a
+    name and a size instead of the string itself"""
+
+    name: str
+    size: int
+
+    def load(self) -> str:
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(block.buf[: self.size]).decode("utf-8")
+        finally:
+            # Spawned workers share the parent's resource tracker, so the
+            # parent's unlink also clears the registration attaching made
+            block.close()
+
+
+@dataclass
+class MapResult:
+    """Outcome of one item in ConcurrentManager.stream_map"""
+
+    item: Any
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+async def _aiter(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _batched(items: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _share(value: Any, blocks: List[shared_memory.SharedMemory]) -> Any:
+    if type(value) in (list, tuple):
+        # Batches, such as lists of (html, url) pages, share their strings too
+        return type(value)(_share(item, blocks) for item in value)
+    if not isinstance(value, str) or len(value) < SHARED_MEMORY_THRESHOLD:
+        return value
+    data = value.encode("utf-8")
+    block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    block.buf[: len(data)] = data
+    blocks.append(block)
+    return SharedPayload(block.name, len(data))
+
+
+def _resolve(value: Any) -> Any:
+    if isinstance(value, SharedPayload):
+        return value.load()
+    if type(value) in (list, tuple):
+        return type(value)(_resolve(item) for item in value)
+    return value
+
+
+def _call(func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+    """Worker-side entry point for one call"""
+    return func(
+        *(_resolve(arg) for arg in args),
+        **{key: _resolve(value) for key, value in kwargs.items()},
+    )
+
+
+def _call_chunk(func: Callable, chunk: List[Any]) -> List[Any]:
+    """Worker-side entry point for a chunk of map() items"""
+    return [func(_resolve(item)) for item in chunk]
+
+
+# One process pool per process, shared by every ConcurrentManager so worker
+# startup (a fresh interpreter importing the crawler) is paid once rather
+# than per crawl
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """The shared process pool, started on first use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            workers = max_workers or multiprocessing.cpu_count()
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started shared process pool with {workers} workers")
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared process pool; called on application shutdown"""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+        logger.info("Shut down shared process pool")
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died so the next call starts a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_process_pool)
+
 
 class ConcurrentManager:
+    """Runs blocking work off the event loop in a thread pool or the shared
+    process pool.
+
+    Process mode is for picklable, CPU-bound, module-level functions: it
+    sidesteps the GIL at the cost of pickling arguments and results, so
+    map() sends items in chunks and large strings such as HTML bodies go
+    through shared memory. Each call may pick its mode; the default is
+    process when use_multiprocessing is set. Coroutine functions always
+    run on the event loop.
+
+    In every mode at most max_tasks calls (or map() chunks) run at once;
+    the rest wait for a slot.
+    """
+
     def __init__(
         self,
         max_workers: Optional[int] = None,
@@ -22,9 +194,11 @@ class ConcurrentManager:
         self.max_tasks = max_tasks or (cpu_count * 2)
         self.batch_size = batch_size
         self.use_multiprocessing = use_multiprocessing
+        self.default_mode = PROCESS if use_multiprocessing else THREAD
 
         # Initialize semaphore for concurrent tasks
         self.semaphore = asyncio.Semaphore(self.max_tasks)
+        CONCURRENT_TASKS_LIMIT.inc(self.max_tasks)
 
         # Initialize thread pool
         self.thread_pool = ThreadPoolExecutor(
@@ -33,63 +207,227 @@ class ConcurrentManager:
 
         logger.info(
             f"Initialized ConcurrentManager with {self.max_workers} workers "
-            f"({cpu_count} CPUs) and {self.max_tasks} max tasks"
+            f"({cpu_count} CPUs), {self.max_tasks} max tasks and "
+            f"{self.default_mode} mode by default"
         )
 
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the max_tasks slots, recording the wait for it"""
+        started = time.perf_counter()
+        async with self.semaphore:
+            CONCURRENT_WAIT_SECONDS.observe(time.perf_counter() - started)
+            CONCURRENT_TASKS_ACTIVE.inc()
+            try:
+                yield
+            finally:
+                CONCURRENT_TASKS_ACTIVE.dec()
+
     async def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
         """Run a function in thread pool"""
         loop = asyncio.get_running_loop()
-        if asyncio.iscoroutinefunction(func):
-            # If the function is async, we need to run it in the event loop
-            return await func(*args, **kwargs)
-        else:
+        async with self._slot():
+            if asyncio.iscoroutinefunction(func):
+                # If the function is async, we need to run it in the event loop
+                return await func(*args, **kwargs)
             # If it's a regular function, run it in the thread pool
-            return await loop.run_in_executor(
-                self.thread_pool, partial(func, *args, **kwargs)
-            )
+            PENDING_THREAD.inc()
+            try:
+                return await loop.run_in_executor(
+                    self.thread_pool, partial(func, *args, **kwargs)
+                )
+            finally:
+                PENDING_THREAD.dec()
 
-    async def process_batch_concurrent(
+    async def run_in_process(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a picklable function in the shared process pool"""
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            shared_args = tuple(_share(arg, blocks) for arg in args)
+            shared_kwargs = {key: _share(value, blocks) for key, value in kwargs.items()}
+            async with self._slot():
+                return await self._submit(_call, func, shared_args, shared_kwargs)
+        finally:
+            _release(blocks)
+
+    async def run(self, func: Callable, *args, mode: Optional[str] = None, **kwargs) -> Any:
+        """Run a function in the given mode ("thread" or "process")"""
+        if self._resolve_mode(func, mode) == PROCESS:
+            return await self.run_in_process(func, *args, **kwargs)
+        return await self.run_in_thread(func, *args, **kwargs)
+
+    async def map(
         self,
-        items: List[Any],
-        process_func: Callable,
-        use_gpu: bool = True,
+        func: Callable,
+        items: Sequence[Any],
+        mode: Optional[str] = None,
         chunk_size: Optional[int] = None,
     ) -> List[Any]:
-        """Process items in batches with concurrency"""
+        """Apply func to every item, returning results in order.
+
+        Items are sent in chunks, one executor task per chunk, so IPC and
+        scheduling costs are paid per chunk rather than per item.
+        """
         if not items:
             return []
-
-        # Calculate optimal chunk size based on CPU cores
         if chunk_size is None:
-            chunk_size = max(len(items) // (self.max_workers * 2), 1)
+            # A few chunks per worker keeps every core busy without tiny tasks
+            chunk_size = max(len(items) // (self.max_workers * 4), 1)
+        chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
 
-        results = []
-        batches = [
-            items[i : i + self.batch_size]
-            for i in range(0, len(items), self.batch_size)
-        ]
+        if self._resolve_mode(func, mode) == PROCESS:
 
-        async def process_batch(batch: List[Any]) -> Any:
-            async with self.semaphore:
-                return await self.run_in_thread(process_func, batch)
+            async def submit_chunk(chunk: List[Any]) -> List[Any]:
+                async with self._slot():
+                    return await self._submit(_call_chunk, func, chunk)
 
-        # Process batches concurrently
-        async with asyncio.TaskGroup() as tg:
-            tasks = [tg.create_task(process_batch(batch)) for batch in batches]
+            blocks: List[shared_memory.SharedMemory] = []
+            try:
+                shared_chunks = [[_share(item, blocks) for item in chunk] for chunk in chunks]
+                results = await asyncio.gather(*(submit_chunk(chunk) for chunk in shared_chunks))
+            finally:
+                _release(blocks)
+        elif asyncio.iscoroutinefunction(func):
+            results = [await asyncio.gather(*(self.run_in_thread(func, item) for item in items))]
+        else:
+            results = await asyncio.gather(
+                *(self.run_in_thread(_call_chunk, func, chunk) for chunk in chunks)
+            )
+        return [result for chunk in results for result in chunk]
 
-        for task in tasks:
+    async def _submit(self, func: Callable, *args) -> Any:
+        pool = get_process_pool(self.max_workers)
+        loop = asyncio.get_running_loop()
+        PENDING_PROCESS.inc()
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            logger.error("A process pool worker died, restarting the pool")
+            _discard_broken_pool(pool)
+            raise
+        finally:
+            PENDING_PROCESS.dec()
+
+    def _resolve_mode(self, func: Callable, mode: Optional[str]) -> str:
+        mode = mode or self.default_mode
+        if mode not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown execution mode: {mode}")
+        if mode == PROCESS and asyncio.iscoroutinefunction(func):
+            # Coroutines can't cross to another process; run them on the loop
+            return THREAD
+        return mode
+
+    async def stream_map(
+        self,
+        func: Callable,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        ordered: bool = True,
+        max_in_flight: Optional[int] = None,
+        per_batch: bool = False,
+        batch_size: Optional[int] = None,
+        mode: Optional[str] = None,
+    ) -> AsyncIterator[MapResult]:
+        """Apply func to a stream of items, yielding a MapResult per item.
+
+        Items are pulled from `items` (sync or async) only while fewer than
+        max_in_flight calls are running, so a slow consumer or slow func
+        holds back the source and memory stays bounded however long the
+        stream is. In ordered mode results come out in input order; in
+        unordered mode as soon as they finish. With per_batch, func takes a
+        list of up to batch_size items and returns one result per item.
+        A failing call records its error on its items instead of stopping
+        the stream.
+        """
+        window = max_in_flight or self.max_tasks
+        units = _batched(_aiter(items), (batch_size or self.batch_size) if per_batch else 1)
+
+        async def run_unit(unit: List[Any]) -> List[MapResult]:
             try:
-                result = task.result()
-                if result:
-                    if isinstance(result, list):
-                        results.extend(result)
-                    else:
-                        results.append(result)
+                if per_batch:
+                    values = await self.run(func, unit, mode=mode)
+                    if len(values) != len(unit):
+                        raise ValueError(
+                            f"Batch function returned {len(values)} results for {len(unit)} items"
+                        )
+                else:
+                    values = [await self.run(func, unit[0], mode=mode)]
             except Exception as e:
-                logger.error(f"Error processing batch: {str(e)}")
+                return [MapResult(item, error=e) for item in unit]
+            return [MapResult(item, value) for item, value in zip(unit, values)]
+
+        in_flight: Deque[asyncio.Task] = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < window:
+                    try:
+                        unit = await anext(units)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    in_flight.append(asyncio.create_task(run_unit(unit)))
+                if not in_flight:
+                    return
+
+                if ordered:
+                    done = [in_flight.popleft()]
+                    await done[0]
+                else:
+                    finished, _ = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    done = [task for task in in_flight if task in finished]
+                    for task in done:
+                        in_flight.remove(task)
+                for task in done:
+                    for result in task.result():
+                        yield result
+        finally:
+            # The consumer stopped early or failed: drop what is still running
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            await units.aclose()
+
+    async def process_batch_concurrent(
+        self,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        process_func: Callable,
+        chunk_size: Optional[int] = None,
+        mode: Optional[str] = None,
+        per_batch: bool = False,
+    ) -> List[Any]:
+        """Apply process_func to each item (or, with per_batch, to batches of
+        chunk_size items) with bounded concurrency, returning the results
+        that aren't None; failed items are logged and left out"""
+        results = []
+        errors = 0
+        async for result in self.stream_map(
+            process_func,
+            items,
+            per_batch=per_batch,
+            batch_size=chunk_size,
+            mode=mode,
+        ):
+            if result.error is not None:
+                errors += 1
+                logger.error(f"Error processing {result.item!r}: {str(result.error)}")
+            elif result.value is not None:
+                results.append(result.value)
 
+        if errors:
+            logger.warning(f"{errors} items failed in process_batch_concurrent")
         return results
 
     async def cleanup(self):
-        """Cleanup resources"""
+        """Cleanup resources; the shared process pool outlives this manager,
+        see shutdown_process_pool"""
         self.thread_pool.shutdown(wait=True)
+        CONCURRENT_TASKS_LIMIT.dec(self.max_tasks)
+
+
+def _release(blocks: List[shared_memory.SharedMemory]) -> None:
+    for block in blocks:
+        block.close()
+        block.unlink()
@@ -0,0 +1,164 @@
+import logging
+import os
+import re
+import numpy as np
+import xxhash
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SPLIT = re.compile(r"[/\-_.?=&+,;:]+")
+DIGITS = re.compile(r"\d+")
+
+
+class URLScorer:
+    """Product-likelihood model over hashed URL path tokens.
+
+    URLs are turned into a fixed-width feature space with the hashing
+    trick (signed xxhash buckets) and scored by a logistic-regression
+    weight vector, so a batch of thousands of URLs is a handful of
+    NumPy gathers and reductions.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 1 << 18,
+        weights: Optional[np.ndarray] = None,
+        bias: float = 0.0,
+        threshold: float = 0.5,
+    ):
+        self.n_features = n_features
+        self.weights = (
+            weights.astype(np.float32)
+            if weights is not None
+            else np.zeros(n_features, dtype=np.float32)
+        )
+        self.bias = float(bias)
+        self.threshold = threshold
+
+    @staticmethod
+    def tokenize(url: str) -> List[str]:
+        """Path/query tokens, digit-normalized tokens, segment bigrams and shape"""
+        parts = urlsplit(url.lower())
+        segments = [segment for segment in parts.path.split("/") if segment]
+        tokens = []
+        for position, segment in enumerate(segments):
+            shape = DIGITS.sub("0", segment)
+            tokens.append(f"seg:{shape}")
+            tokens.extend(f"tok:{token}" for token in TOKEN_SPLIT.split(shape) if token)
+            if position == len(segments) - 1:
+                tokens.append(f"last:{shape}")
+                tokens.append(f"lastlen:{min(len(segment) // 8, 8)}")
+            if position:
+                tokens.append(f"bi:{DIGITS.sub('0', segments[position - 1])}/{shape}")
+        if parts.query:
+            tokens.extend(
+                f"q:{DIGITS.sub('0', token)}"
+                for token in TOKEN_SPLIT.split(parts.query)
+                if token
+            )
+        tokens.append(f"depth:{min(len(segments), 8)}")
+        return tokens
+
+    def featurize(self, urls: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse (row, column, value) triplets of the hashed feature matrix"""
+        rows: List[int] = []
+        columns: List[int] = []
+        values: List[float] = []
+        mask = self.n_features - 1 if self.n_features & (self.n_features - 1) == 0 else None
+        for row, url in enumerate(urls):
+            for token in self.tokenize(url):
+                digest = xxhash.xxh64_intdigest(token)
+                column = digest & mask if mask is not None else digest % self.n_features
+                rows.append(row)
+                columns.append(column)
+                # The top hash bit signs the feature so collisions cancel out
+                values.append(1.0 if digest >> 63 else -1.0)
+        return (
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(columns, dtype=np.int64),
+            np.asarray(values, dtype=np.float32),
+        )
+
+    def _logits(self, features: Tuple[np.ndarray, np.ndarray, np.ndarray], n_rows: int) -> np.ndarray:
+        rows, columns, values = features
+        contributions = self.weights[columns] * values
+        return np.bincount(rows, weights=contributions, minlength=n_rows) + self.bias
+
+    def score_many(self, urls: Sequence[str]) -> np.ndarray:
+        """Product probability for each URL"""
+        if not len(urls):
+            return np.zeros(0, dtype=np.float32)
+        logits = self._logits(self.featurize(urls), len(urls))
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def filter_products(self, urls: Sequence[str]) -> List[str]:
+        scores = self.score_many(urls)
+        return [url for url, score in zip(urls, scores) if score >= self.threshold]
+
+    def fit(
+        self,
+        urls: Sequence[str],
+        labels: Sequence[int],
+        epochs: int = 50,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+    ) -> "URLScorer":
+        """Train with full-batch gradient descent on the logistic loss"""
+        y = np.asarray(labels, dtype=np.float32)
+        features = self.featurize(urls)
+        rows, columns, values = features
+        n_rows = len(urls)
+
+        # Balance classes so a skewed training set doesn't just learn the prior
+        positives = max(float(y.sum()), 1.0)
+        negatives = max(float(n_rows - y.sum()), 1.0)
+        sample_weight = np.where(y > 0, n_rows / (2 * positives), n_rows / (2 * negatives))
+
+        for _ in range(epochs):
+            probabilities = 1.0 / (1.0 + np.exp(-self._logits(features, n_rows)))
+            error = (probabilities - y) * sample_weight / n_rows
+            gradient = np.bincount(
+                columns, weights=error[rows] * values, minlength=self.n_features
+            )
+            gradient += l2 * self.weights
+            self.weights -= (learning_rate * gradient).astype(np.float32)
+            self.bias -= learning_rate * float(error.sum())
+
+        probabilities = 1.0 / (1.0 + np.exp(-self._logits(features, n_rows)))
+        accuracy = float(((probabilities >= self.threshold) == (y > 0)).mean())
+        logger.info(f"Trained URL scorer on {n_rows} URLs, train accuracy {accuracy:.3f}")
+        return self
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Open the file ourselves so np.savez doesn't append ".npz" to the path
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights,
+                bias=np.float32(self.bias),
+                threshold=np.float32(self.threshold),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "URLScorer":
+        with np.load(path) as data:
+            weights = data["weights"]
+            return cls(
+                n_features=len(weights),
+                weights=weights,
+                bias=float(data["bias"]),
+                threshold=float(data["threshold"]),
+            )
+
+    @classmethod
+    def load_if_exists(cls, path: Optional[str]) -> Optional["URLScorer"]:
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except Exception as e:
+            logger.error(f"Error loading URL scorer from {path}: {str(e)}")
+            return None
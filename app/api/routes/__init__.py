@@ -1,3 +1,3 @@
-from app.api.routes import crawler, product, proxy, health, admin
+from app.api.routes import crawler, product, proxy, health, admin, metrics
 
-__all__ = ["crawler", "product", "proxy", "health", "admin"]
+__all__ = ["crawler", "product", "proxy", "health", "admin", "metrics"]
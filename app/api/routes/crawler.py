@@ -1,19 +1,32 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
-from app.db.session import get_main_db, get_cache_db
-from app.db.repositories.product import ProductRepository
-from app.crawler.base import EcommerceCrawler
-from app.crawler.url_processor import URLProcessor
-from app.crawler.browser_manager import PlaywrightManager
-from app.cache.url_cache import URLCache
+from fastapi.responses import StreamingResponse
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import Any, AsyncIterator, List, Dict, Optional
+from app.db.session import get_main_session_factory, get_cache_session_factory
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.factory import (
+    build_checkpoint,
+    build_crawler,
+    build_frontier,
+    build_profiler,
+    build_seen_store,
+    checkpoint_path,
+)
+from app.crawler.interfaces import IFrontier
+from app.crawler.jobs import CrawlJob, crawl_jobs, new_job_id
+from app.config import settings
 
 router = APIRouter(prefix="/api/v1/crawler", tags=["crawler"])
 
 
-@router.post("/crawl")
-async def crawl_domains(
-    domains: List[str],
+@lru_cache(maxsize=1)
+def get_frontier() -> IFrontier:
+    return build_frontier()
+
+
+def crawl_options(
     max_workers: Optional[int] = Query(
         None, description="Number of worker processes (default: CPU count)"
     ),
@@ -22,18 +35,228 @@ async def crawl_domains(
     ),
     batch_size: int = Query(32, description="Batch size for processing"),
     use_multiprocessing: bool = Query(True, description="Enable multiprocessing"),
-    main_db: Session = Depends(get_main_db),
-    cache_db: Session = Depends(get_cache_db),
-):
-    crawler = EcommerceCrawler(
-        url_processor=URLProcessor(),
-        browser_manager=PlaywrightManager(),
-        product_repo=ProductRepository(main_db),
-        url_cache=URLCache(cache_db),
+    use_static_fetch: bool = Query(
+        True, description="Try plain HTTP before rendering pages in the browser"
+    ),
+    use_sitemaps: bool = Query(
+        settings.CRAWL_USE_SITEMAPS,
+        description="Seed product URLs from robots.txt sitemaps before crawling",
+    ),
+    max_concurrency: int = Query(
+        settings.CRAWL_MAX_CONCURRENCY, description="Pages in flight across all domains"
+    ),
+    per_domain_concurrency: int = Query(
+        settings.CRAWL_PER_DOMAIN_CONCURRENCY, description="Pages in flight per domain"
+    ),
+    requests_per_second: float = Query(
+        settings.CRAWL_REQUESTS_PER_SECOND, description="Request rate per domain"
+    ),
+    incremental: Optional[str] = Query(
+        None,
+        pattern="^(skip|defer)$",
+        description="Skip or de-prioritize URLs still fresh in the URL cache",
+    ),
+    extract_products: bool = Query(
+        False, description="Extract product details from pages once the crawl finishes"
+    ),
+    store_pages: bool = Query(
+        False, description="Keep fetched pages in the page store for replaying later"
+    ),
+    profile: bool = Query(
+        False,
+        description="Record stage timings, a sampled profile and top allocations for the job",
+    ),
+) -> Dict[str, Any]:
+    """Crawler options shared by the crawl endpoints"""
+    return dict(
         max_workers=max_workers,
         max_tasks=max_tasks,
         batch_size=batch_size,
         use_multiprocessing=use_multiprocessing,
+        use_static_fetch=use_static_fetch,
+        use_sitemaps=use_sitemaps,
+        extract_products=extract_products,
+        store_pages=store_pages,
+        max_concurrency=max_concurrency,
+        per_domain_concurrency=per_domain_concurrency,
+        requests_per_second=requests_per_second,
+        incremental=incremental,
+        profile=profile,
     )
 
-    return await crawler.crawl_domains(domains)
+
+def _stream_response(
+    frames: AsyncIterator[Dict[str, Any]], format: str
+) -> StreamingResponse:
+    """Encode job frames as NDJSON lines or Server-Sent Events"""
+
+    async def encode() -> AsyncIterator[str]:
+        async for frame in frames:
+            data = json.dumps(frame, default=str)
+            if format == "sse":
+                yield f"event: {frame['event']}\ndata: {data}\n\n"
+            else:
+                yield f"{data}\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        encode(), media_type=media_type, headers={"Cache-Control": "no-cache"}
+    )
+
+
+def _submit_job(
+    domains: List[str],
+    options: Dict[str, Any],
+    main_db: async_sessionmaker[AsyncSession],
+    cache_db: async_sessionmaker[AsyncSession],
+    job_id: Optional[str] = None,
+) -> CrawlJob:
+    """Start a crawl job journaled to its checkpoint; pass job_id to resume"""
+    resuming = job_id is not None
+    job_id = job_id or new_job_id()
+    # Profiling is per run, not part of what a resumed job inherits
+    options = dict(options)
+    profile = options.pop("profile", False)
+    checkpoint = build_checkpoint(job_id)
+    if checkpoint is not None and not resuming:
+        checkpoint.start(domains, options)
+
+    crawler = build_crawler(
+        main_db,
+        cache_db,
+        checkpoint=checkpoint,
+        seen_store=build_seen_store(job_id, resuming),
+        profiler=build_profiler(job_id) if profile else None,
+        **options,
+    )
+    return crawl_jobs.submit(domains, crawler, job_id=job_id)
+
+
+@router.post("/crawl", status_code=202)
+async def crawl_domains(
+    domains: List[str],
+    options: Dict[str, Any] = Depends(crawl_options),
+    main_db: async_sessionmaker[AsyncSession] = Depends(get_main_session_factory),
+    cache_db: async_sessionmaker[AsyncSession] = Depends(get_cache_session_factory),
+):
+    # Runs in the background; poll /jobs/{job_id} for progress and results
+    job = _submit_job(domains, options, main_db, cache_db)
+    return job.summary()
+
+
+@router.post("/crawl/stream")
+async def crawl_domains_stream(
+    domains: List[str],
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    stream_batch_size: int = Query(100, ge=1, description="Max URLs per frame"),
+    stats_interval: float = Query(5.0, gt=0, description="Seconds between stats"),
+    options: Dict[str, Any] = Depends(crawl_options),
+    main_db: async_sessionmaker[AsyncSession] = Depends(get_main_session_factory),
+    cache_db: async_sessionmaker[AsyncSession] = Depends(get_cache_session_factory),
+):
+    """Submit a crawl job and stream its product URLs as they are found.
+
+    The job keeps running if the client disconnects; reattach with
+    /jobs/{job_id}/stream or poll /jobs/{job_id} for progress. Its product
+    URLs are streamed and written to the database rather than kept as
+    results.
+    """
+    job = _submit_job(domains, {**options, "keep_results": False}, main_db, cache_db)
+    return _stream_response(
+        job.stream(stream_batch_size, stats_interval, settings.CRAWL_STREAM_MAX_PENDING),
+        format,
+    )
+
+
+@router.get("/jobs")
+async def list_jobs():
+    return [job.summary() for job in crawl_jobs.list()]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = crawl_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    return job.summary(include_results=True)
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    stream_batch_size: int = Query(100, ge=1, description="Max URLs per frame"),
+    stats_interval: float = Query(5.0, gt=0, description="Seconds between stats"),
+):
+    """Stream product URLs found from now on by a running job"""
+    job = crawl_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    return _stream_response(
+        job.stream(stream_batch_size, stats_interval, settings.CRAWL_STREAM_MAX_PENDING),
+        format,
+    )
+
+
+@router.get("/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str):
+    """Full profile report of a job submitted with profile=true"""
+    job = crawl_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    if not job.profiled:
+        raise HTTPException(status_code=404, detail="Crawl job was not profiled")
+    if not job.finished:
+        raise HTTPException(status_code=409, detail="Crawl job is still running")
+    report = job.profile_report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Crawl job profile was not written")
+    return report
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await crawl_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Crawl job not found")
+    return job.summary()
+
+
+@router.post("/jobs/{job_id}/resume", status_code=202)
+async def resume_job(
+    job_id: str,
+    profile: bool = Query(False, description="Profile the resumed run"),
+    main_db: async_sessionmaker[AsyncSession] = Depends(get_main_session_factory),
+    cache_db: async_sessionmaker[AsyncSession] = Depends(get_cache_session_factory),
+):
+    """Continue an interrupted or cancelled crawl from its last checkpoint"""
+    job = crawl_jobs.get(job_id)
+    if job and not job.finished:
+        raise HTTPException(status_code=409, detail="Crawl job is still running")
+
+    path = checkpoint_path(job_id)
+    header = CrawlCheckpoint.read_header(path) if path else None
+    if not header:
+        raise HTTPException(status_code=404, detail="No checkpoint for crawl job")
+    if header["completed"]:
+        raise HTTPException(status_code=409, detail="Crawl job already completed")
+
+    options = {**header["options"], "profile": profile}
+    job = _submit_job(header["domains"], options, main_db, cache_db, job_id)
+    return job.summary()
+
+
+@router.post("/frontier/seed")
+async def seed_frontier(domains: List[str]):
+    """Queue domains on the shared frontier for scripts/crawl_worker.py workers"""
+    frontier = get_frontier()
+    queued = 0
+    for domain in domains:
+        queued += await frontier.push(domain, [(f"https://{domain}", 0)])
+    return {"queued": queued}
+
+
+@router.get("/frontier/stats")
+async def frontier_stats():
+    frontier = get_frontier()
+    return {"drained": await frontier.is_drained(), "domains": await frontier.stats()}
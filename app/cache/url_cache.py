@@ -1,62 +1,480 @@
+import asyncio
+import json
 import logging
-from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
 from app.db.models.product import URLCache as URLCacheModel
-from sqlalchemy import select, update
+from app.db.upsert import chunk_rows, upsert_insert
+from app.metrics import URL_CACHE_WRITES
+from app import profiling
+from sqlalchemy import delete, func, select
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_TTL = 86400  # Matches the url_cache.ttl column default
+VALIDATOR_COLUMNS = ("etag", "last_modified", "content_hash")
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class PageValidators:
+    """What the last fetch of a URL returned, for conditional revisits"""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @classmethod
+    def from_row(
+        cls, etag: Optional[str], last_modified: Optional[str], content_hash: Optional[str]
+    ) -> Optional["PageValidators"]:
+        if etag is None and last_modified is None and content_hash is None:
+            return None
+        return cls(etag, last_modified, content_hash)
+
+    def refreshed(self, fetched: "PageValidators") -> "PageValidators":
+        """Validators from a revisit, keeping what it didn't send (a 304 has no body to hash)"""
+        return PageValidators(
+            fetched.etag or self.etag,
+            fetched.last_modified or self.last_modified,
+            fetched.content_hash or self.content_hash,
+        )
+
+    def unchanged(self, status: int, content_hash: Optional[str]) -> bool:
+        """Whether a revisit answering with status and content_hash found
+        the page as it was: a 304, or the same body"""
+        return status == 304 or (
+            self.content_hash is not None and content_hash == self.content_hash
+        )
+
+
+class _PendingHit:
+    """Accesses to one URL that have not been written to the database yet"""
+
+    __slots__ = (
+        "domain",
+        "count",
+        "first_seen",
+        "last_accessed",
+        "ttl",
+        "validators",
+        "outlinks",
+    )
+
+    def __init__(self, domain: str, now: datetime, ttl: int):
+        self.domain = domain
+        self.count = 0
+        self.first_seen = now
+        self.last_accessed = now
+        self.ttl = ttl
+        self.validators: Optional[PageValidators] = None
+        self.outlinks: Optional[List[str]] = None
+
+
 class URLCache:
-    def __init__(self, db: Session):
-        self.db = db
+    """url_cache table fronted by an in-process LRU of known URLs.
+
+    cache_url() only touches memory: hits are coalesced per URL in a dirty
+    set and written every flush_interval seconds (or once flush_batch_size
+    URLs are dirty) as one multi-row upsert that adds up access counts.
+    HTTP validators passed to cache_url() are written the same way and kept
+    in a second LRU, which also remembers URLs known to have none. A
+    crawled page's outlinks are written alongside but only read back, by
+    outlinks(), when a revisit finds the page unchanged.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_entries: int = 100_000,
+        flush_interval: float = 2.0,
+        flush_batch_size: int = 1000,
+        default_ttl: int = DEFAULT_TTL,
+        domain_ttls: Optional[Dict[str, int]] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+
+        # LRU of cached URLs -> expiry as a UTC timestamp
+        self._known: "OrderedDict[str, float]" = OrderedDict()
+        # LRU of URLs -> validators, None once a lookup found none
+        self._validators: "OrderedDict[str, Optional[PageValidators]]" = OrderedDict()
+        self._dirty: Dict[str, _PendingHit] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self.hits_absorbed = 0
         logger.info("URLCache initialized")
 
+    def ttl_for(self, domain: str) -> int:
+        return self.domain_ttls.get(domain, self.default_ttl)
+
+    def _remember(self, url: str, expires_at: float) -> None:
+        self._known[url] = expires_at
+        self._known.move_to_end(url)
+        if len(self._known) > self.max_entries:
+            self._known.popitem(last=False)
+
+    def _remember_validators(self, url: str, validators: Optional[PageValidators]) -> None:
+        self._validators[url] = validators
+        self._validators.move_to_end(url)
+        if len(self._validators) > self.max_entries:
+            self._validators.popitem(last=False)
+
     async def is_url_cached(self, url: str) -> bool:
+        return url in await self.are_urls_cached([url])
+
+    async def are_urls_cached(self, urls: Iterable[str]) -> Set[str]:
+        """Return the subset of urls present in the cache, using one query
+        for everything the LRU doesn't already know about"""
+        return set(await self._expiries(urls))
+
+    async def fresh_urls(self, urls: Iterable[str]) -> Set[str]:
+        """Return the subset of urls whose last_accessed + ttl is still ahead"""
+        now = datetime.now(timezone.utc).timestamp()
+        return {
+            url for url, expires_at in (await self._expiries(urls)).items()
+            if expires_at > now
+        }
+
+    async def last_accessed(self, urls: Iterable[str]) -> Dict[str, datetime]:
+        """When each cached URL was last crawled, for lastmod comparisons"""
+        accessed = {}
+        unknown = []
+        for url in set(urls):
+            if url in self._dirty:
+                accessed[url] = self._dirty[url].last_accessed
+            else:
+                unknown.append(url)
+
+        if not unknown:
+            return accessed
+
+        try:
+            async with self.session_factory() as db:
+                for chunk in chunk_rows(unknown, 1):
+                    stmt = select(URLCacheModel.url, URLCacheModel.last_accessed).where(
+                        URLCacheModel.url.in_(chunk)
+                    )
+                    for url, last_accessed in await db.execute(stmt):
+                        accessed[url] = _as_utc(last_accessed)
+        except Exception as e:
+            logger.error(f"Error checking cache for {len(unknown)} URLs: {str(e)}")
+
+        return accessed
+
+    async def validators(self, urls: Iterable[str]) -> Dict[str, PageValidators]:
+        """Stored validators of those urls that have any"""
+        found = {}
+        unknown = []
+        for url in set(urls):
+            pending = self._dirty.get(url)
+            if pending is not None and pending.validators is not None:
+                found[url] = pending.validators
+            elif url in self._validators:
+                if self._validators[url] is not None:
+                    found[url] = self._validators[url]
+            else:
+                unknown.append(url)
+
+        if not unknown:
+            return found
+
+        try:
+            async with self.session_factory() as db:
+                for chunk in chunk_rows(unknown, 1):
+                    stmt = select(
+                        URLCacheModel.url,
+                        URLCacheModel.etag,
+                        URLCacheModel.last_modified,
+                        URLCacheModel.content_hash,
+                    ).where(URLCacheModel.url.in_(chunk))
+                    for url, etag, last_modified, content_hash in await db.execute(stmt):
+                        validators = PageValidators.from_row(etag, last_modified, content_hash)
+                        if validators is not None:
+                            found[url] = validators
+            for url in unknown:
+                self._remember_validators(url, found.get(url))
+        except Exception as e:
+            logger.error(f"Error loading validators for {len(unknown)} URLs: {str(e)}")
+
+        return found
+
+    async def outlinks(self, url: str) -> Optional[List[str]]:
+        """Links stored from the last crawl of url, or None if it has none"""
+        pending = self._dirty.get(url)
+        if pending is not None and pending.outlinks is not None:
+            return pending.outlinks
+
         try:
-            stmt = select(URLCacheModel).where(URLCacheModel.url == url)
-            result = self.db.execute(stmt).scalar_one_or_none()
-            return result is not None
+            async with self.session_factory() as db:
+                stored = (
+                    await db.execute(
+                        select(URLCacheModel.outlinks).where(URLCacheModel.url == url)
+                    )
+                ).scalar()
         except Exception as e:
-            logger.error(f"Error checking cache for URL {url}: {str(e)}")
-            self.db.rollback()  # Explicitly rollback on error
-            return False
+            logger.error(f"Error loading outlinks of {url}: {str(e)}")
+            return None
+        return json.loads(stored) if stored is not None else None
+
+    async def _expiries(self, urls: Iterable[str]) -> Dict[str, float]:
+        expiries = {}
+        unknown = []
+        for url in set(urls):
+            if url in self._known:
+                expiries[url] = self._known[url]
+            elif url in self._dirty:
+                pending = self._dirty[url]
+                expiries[url] = pending.last_accessed.timestamp() + pending.ttl
+            else:
+                unknown.append(url)
+
+        if not unknown:
+            return expiries
 
-    async def cache_url(self, url: str, domain: str) -> None:
         try:
-            # Check if URL exists
-            stmt = select(URLCacheModel).where(URLCacheModel.url == url)
-            existing = self.db.execute(stmt).scalar_one_or_none()
+            async with self.session_factory() as db:
+                for chunk in chunk_rows(unknown, 1):
+                    # Validators come along so revisiting a stale URL needs no
+                    # second lookup
+                    stmt = select(
+                        URLCacheModel.url,
+                        URLCacheModel.last_accessed,
+                        URLCacheModel.ttl,
+                        URLCacheModel.etag,
+                        URLCacheModel.last_modified,
+                        URLCacheModel.content_hash,
+                    ).where(URLCacheModel.url.in_(chunk))
+                    for url, last_accessed, ttl, *validators in await db.execute(stmt):
+                        expires_at = _as_utc(last_accessed).timestamp() + (
+                            ttl if ttl is not None else self.default_ttl
+                        )
+                        expiries[url] = expires_at
+                        self._remember(url, expires_at)
+                        if url not in self._dirty:
+                            self._remember_validators(url, PageValidators.from_row(*validators))
+        except Exception as e:
+            logger.error(f"Error checking cache for {len(unknown)} URLs: {str(e)}")
+
+        return expiries
+
+    async def cache_url(
+        self,
+        url: str,
+        domain: str,
+        validators: Optional[PageValidators] = None,
+        outlinks: Optional[List[str]] = None,
+    ) -> None:
+        """Record an access to url, and the validators and outlinks of a
+        fetch of it; written to the database on the next flush"""
+        now = datetime.now(timezone.utc)
+        ttl = self.ttl_for(domain)
+        pending = self._dirty.get(url)
+        if pending is None:
+            pending = self._dirty[url] = _PendingHit(domain, now, ttl)
+        else:
+            self.hits_absorbed += 1
+        pending.domain = domain
+        pending.count += 1
+        pending.last_accessed = now
+        pending.ttl = ttl
+        self._remember(url, now.timestamp() + ttl)
+        if validators is not None:
+            pending.validators = validators
+            self._remember_validators(url, validators)
+        if outlinks is not None:
+            pending.outlinks = outlinks
+
+        if len(self._dirty) >= self.flush_batch_size:
+            await self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
 
-            now = datetime.now(timezone.utc)
+    async def _flush_periodically(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
 
-            if existing:
-                # Update existing entry
+    async def flush(self) -> None:
+        """Write all pending accesses as batched upserts"""
+        if not self._dirty:
+            return
+
+        batch, self._dirty = self._dirty, {}
+        rows = [
+            {
+                "url": url,
+                "domain": pending.domain,
+                "first_seen": pending.first_seen,
+                "last_accessed": pending.last_accessed,
+                "access_count": pending.count,
+                "ttl": pending.ttl,
+                "etag": pending.validators and pending.validators.etag,
+                "last_modified": pending.validators and pending.validators.last_modified,
+                "content_hash": pending.validators and pending.validators.content_hash,
+                "outlinks": json.dumps(pending.outlinks) if pending.outlinks is not None else None,
+            }
+            for url, pending in batch.items()
+        ]
+
+        async with self._flush_lock:
+            started = time.perf_counter()
+            try:
+                async with self.session_factory() as db:
+                    for chunk in chunk_rows(rows, len(rows[0])):
+                        stmt = upsert_insert(db, URLCacheModel).values(chunk)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[URLCacheModel.url],
+                            set_={
+                                "domain": stmt.excluded.domain,
+                                "last_accessed": stmt.excluded.last_accessed,
+                                "ttl": stmt.excluded.ttl,
+                                "access_count": URLCacheModel.access_count
+                                + stmt.excluded.access_count,
+                                # Accesses without a fetch keep the stored validators
+                                # and outlinks
+                                **{
+                                    column: func.coalesce(
+                                        stmt.excluded[column], URLCacheModel.__table__.c[column]
+                                    )
+                                    for column in VALIDATOR_COLUMNS + ("outlinks",)
+                                },
+                            },
+                        )
+                        await db.execute(stmt)
+                    await db.commit()
+                URL_CACHE_WRITES.observe(started, len(rows))
+                profiling.record(profiling.URL_CACHE_WRITES, time.perf_counter() - started)
+                logger.info(f"Flushed {len(rows)} cached URLs")
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} cached URLs: {str(e)}")
+                self._requeue(batch)
+
+    def _requeue(self, batch: Dict[str, _PendingHit]) -> None:
+        """Merge a failed batch back so its hits are retried on the next flush"""
+        for url, pending in batch.items():
+            newer = self._dirty.get(url)
+            if newer is None:
+                self._dirty[url] = pending
+            else:
+                newer.count += pending.count
+                newer.first_seen = min(newer.first_seen, pending.first_seen)
+                newer.validators = newer.validators or pending.validators
+                if newer.outlinks is None:
+                    newer.outlinks = pending.outlinks
+
+    async def close(self) -> None:
+        """Stop the background flusher and write anything still pending"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def sweep_expired(self, chunk_size: int = 1000) -> int:
+        """Delete expired rows in id-ordered chunks, returning how many went"""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            min_ttl = (await db.execute(select(func.min(URLCacheModel.ttl)))).scalar()
+        if min_ttl is None:
+            return 0
+
+        # Nothing accessed after this can have expired, whatever its ttl
+        cutoff = now - timedelta(seconds=min_ttl)
+        deleted = 0
+        last_id = 0
+        while True:
+            async with self.session_factory() as db:
                 stmt = (
-                    update(URLCacheModel)
-                    .where(URLCacheModel.url == url)
-                    .values(
-                        domain=domain,
-                        last_accessed=now,
-                        access_count=URLCacheModel.access_count + 1,
+                    select(
+                        URLCacheModel.id,
+                        URLCacheModel.url,
+                        URLCacheModel.last_accessed,
+                        URLCacheModel.ttl,
                     )
+                    .where(URLCacheModel.id > last_id)
+                    .where(URLCacheModel.last_accessed < cutoff)
+                    .order_by(URLCacheModel.id)
+                    .limit(chunk_size)
                 )
-                self.db.execute(stmt)
-            else:
-                # Create new entry
-                cache_entry = URLCacheModel(
-                    url=url, domain=domain, first_seen=now, last_accessed=now
-                )
-                self.db.add(cache_entry)
+                rows = (await db.execute(stmt)).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                expired = [
+                    row
+                    for row in rows
+                    if _as_utc(row.last_accessed)
+                    + timedelta(seconds=row.ttl if row.ttl is not None else self.default_ttl)
+                    <= now
+                ]
+                if expired:
+                    await db.execute(
+                        delete(URLCacheModel).where(
+                            URLCacheModel.id.in_([row.id for row in expired])
+                        )
+                    )
+                    await db.commit()
+                    deleted += len(expired)
+                    for row in expired:
+                        if row.url not in self._dirty:
+                            self._known.pop(row.url, None)
+                            self._validators.pop(row.url, None)
 
-            self.db.commit()
-            logger.info(f"Successfully cached URL: {url}")
+            # Let crawl tasks run between chunks
+            await asyncio.sleep(0)
 
-        except Exception as e:
-            logger.error(f"Error caching URL {url}: {str(e)}")
-            self.db.rollback()  # Explicitly rollback on error
-            raise
+        if deleted:
+            logger.info(f"Swept {deleted} expired cached URLs")
+        return deleted
+
+    def start_sweeper(self, interval: float, chunk_size: int = 1000) -> None:
+        """Sweep expired rows in the background every interval seconds"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_periodically(interval, chunk_size))
+
+    async def _sweep_periodically(self, interval: float, chunk_size: int) -> None:
+        while True:
+            try:
+                await self.sweep_expired(chunk_size)
+            except Exception as e:
+                logger.error(f"Error sweeping expired cached URLs: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
 
     async def clear_cache(self) -> None:
-        self.db.query(URLCacheModel).delete()
-        self.db.commit()
+        self._known.clear()
+        self._validators.clear()
+        self._dirty.clear()
+        async with self.session_factory() as db:
+            await db.execute(delete(URLCacheModel))
+            await db.commit()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -14,10 +14,104 @@ class Settings(BaseSettings):
     ADMIN_PASSWORD: str
     ADMIN_SECRET_KEY: str
 
+    # Create missing tables on startup instead of failing the schema check
+    AUTO_CREATE_SCHEMA: bool = False
+
+    # Connection pools (sync and async engines)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    CACHE_DB_POOL_SIZE: int = 3
+    CACHE_DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30.0
+
+    # Write-behind product batching
+    PRODUCT_WRITE_BATCH_SIZE: int = 500
+    PRODUCT_WRITE_MAX_AGE: float = 1.0
+
+    # In-memory URL cache tier
+    URL_CACHE_MAX_ENTRIES: int = 100_000
+    URL_CACHE_FLUSH_INTERVAL: float = 2.0
+    URL_CACHE_FLUSH_BATCH_SIZE: int = 1000
+
+    # URL freshness for incremental crawls; overrides as JSON, e.g. {"shop.com": 3600}
+    URL_CACHE_DEFAULT_TTL: int = 86400
+    URL_CACHE_DOMAIN_TTLS: Dict[str, int] = {}
+    URL_CACHE_SWEEP_INTERVAL: float = 3600.0  # 0 disables the expiry sweeper
+    URL_CACHE_SWEEP_CHUNK_SIZE: int = 1000
+
     # Optional settings with defaults
     ADMIN_TOKEN_EXPIRE_MINUTES: int = 30
     ADMIN_ALGORITHM: str = "HS256"
 
+    # Browser page pool
+    BROWSER_POOL_SIZE: int = 4
+    BROWSER_MAX_NAVIGATIONS_PER_PAGE: int = 50
+    BROWSER_MAX_RSS_MB: int = 2048
+    BROWSER_WAIT_UNTIL: str = "domcontentloaded"
+    BROWSER_BLOCK_RESOURCES: bool = True
+    # Per-domain navigation overrides as JSON: domain -> wait_until,
+    # ready_selector, blocked_resource_types, blocked_hosts and timeout_ms
+    BROWSER_DOMAIN_PROFILES: Dict[str, Dict[str, Any]] = {}
+
+    # Crawl frontier scheduling
+    CRAWL_MAX_CONCURRENCY: int = 16
+    CRAWL_PER_DOMAIN_CONCURRENCY: int = 4
+    CRAWL_REQUESTS_PER_SECOND: float = 2.0
+    CRAWL_BURST: float = 4.0
+
+    # robots.txt/sitemap seeding; domains whose sitemaps list enough products skip BFS
+    CRAWL_USE_SITEMAPS: bool = True
+    SITEMAP_MIN_PRODUCTS: int = 50
+    SITEMAP_MAX_FILES: int = 200
+
+    # Append-only crawl journals for resuming interrupted jobs; empty disables.
+    # A journal is compacted into a snapshot every COMPACT_RECORDS records
+    CRAWL_CHECKPOINT_DIR: str = "checkpoints"
+    CRAWL_CHECKPOINT_INTERVAL: float = 5.0
+    CRAWL_CHECKPOINT_COMPACT_RECORDS: int = 200_000
+
+    # Artifacts of crawls submitted with profile=true, one directory per job
+    CRAWL_PROFILE_DIR: str = "profiles"
+    CRAWL_PROFILE_SAMPLE_INTERVAL: float = 0.005
+    CRAWL_PROFILE_TOP: int = 25
+
+    # Product URLs a slow stream consumer may fall behind before they are dropped
+    CRAWL_STREAM_MAX_PENDING: int = 10_000
+
+    # Track seen URLs as 64-bit fingerprints in a memory-mapped table
+    CRAWL_FINGERPRINT_STORE: bool = True
+    CRAWL_FINGERPRINT_CAPACITY: int = 1 << 16  # initial slots, doubles as needed
+    # File backing the table; {job_id} gives each job its own, reopened when
+    # it resumes. Without it every job and process shares one store, and later
+    # crawls skip URLs any earlier one queued. Empty keeps tables in memory
+    CRAWL_FINGERPRINT_PATH: str = "fingerprints/{job_id}.fp"
+
+    # Shared frontier for multi-worker crawls: memory://, sqlite:///path or redis://host
+    FRONTIER_URL: str = "sqlite:///frontier.db"
+    FRONTIER_LEASE_TTL: float = 60.0
+    FRONTIER_BATCH_SIZE: int = 50
+    FRONTIER_KEY_PREFIX: str = "frontier"
+
+    # Product detail extraction; selectors map domain -> field -> CSS or XPath
+    EXTRACTOR_MAX_WORKERS: Optional[int] = None  # default: CPU count
+    EXTRACTOR_PARSE_BATCH_SIZE: int = 16
+    EXTRACTOR_WRITE_BATCH_SIZE: int = 100
+    EXTRACTOR_MAX_CONCURRENT_FETCHES: int = 16
+    EXTRACTOR_DOMAIN_SELECTORS: Dict[str, Dict[str, str]] = {}
+
+    # Per-domain URL classification as JSON: domain -> product_patterns,
+    # category_patterns, excluded_patterns or listing_patterns, each a list
+    # of regexes replacing that list of the default rules
+    URL_DOMAIN_RULES: Dict[str, Dict[str, List[str]]] = {}
+
+    # Content-addressed store of fetched pages, for crawls run with store_pages=true
+    PAGE_STORE_DIR: str = "pages"
+    PAGE_STORE_SEGMENT_MB: int = 256
+    PAGE_STORE_COMPRESSION_LEVEL: int = 6
+
+    # Product-likelihood URL scorer (see scripts/train_url_scorer.py)
+    URL_SCORER_MODEL_PATH: Optional[str] = "models/url_scorer.npz"
+
     # Optional settings
     PROXY_ENDPOINT_URL: Optional[str] = None
     DEEPSEEK_API_KEY: Optional[str] = None
@@ -1,18 +1,46 @@
 import asyncio
 import logging
 import time
-from typing import List, Dict, Optional
-from app.crawler.interfaces import ICrawlerStrategy, IURLProcessor, IBrowserManager
+from functools import partial
+from typing import TYPE_CHECKING, Callable, List, Dict, NamedTuple, Optional, Set
+from app.crawler.interfaces import (
+    ICrawlerStrategy,
+    IFrontier,
+    IURLProcessor,
+    IBrowserManager,
+)
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.fingerprints import FingerprintSet
+from app.crawler.frontier import LeaseScheduler
+from app.crawler.http_fetcher import StaticFetcher, StaticPage
+from app.crawler.scheduler import CrawlScheduler, DomainState, TokenBucket
+from app.crawler.sitemaps import SitemapEntry, SitemapReader
+from app.crawler.url_classifier import EXCLUDED, PRODUCT, classify_urls
+from app.crawler.url_processor import extract_urls_from_html
 from app.db.repositories.product import ProductRepository
 from app.db.schemas.product import ProductCreate
-from app.cache.url_cache import URLCache
-from app.accelerator import GPUManager, ConcurrentManager
-from collections import deque
+from app.cache.url_cache import PageValidators, URLCache
+from app.accelerator import get_backend
+from app.metrics import domain_metrics
+from app import profiling
 from datetime import datetime, timezone
 
+if TYPE_CHECKING:
+    from app.accelerator import URLScorer
+    from app.crawler.extractor import ProductExtractor
+    from app.crawler.page_store import PageStore
+
 logger = logging.getLogger(__name__)
 
 
+class PageLinks(NamedTuple):
+    """A crawled page's links, with the validators of its static fetch"""
+
+    links: Set[str]
+    validators: Optional[PageValidators] = None
+    unchanged: bool = False  # links are the ones stored by the last crawl
+
+
 class EcommerceCrawler(ICrawlerStrategy):
     def __init__(
         self,
@@ -24,15 +52,41 @@ class EcommerceCrawler(ICrawlerStrategy):
         max_tasks: Optional[int] = None,
         batch_size: int = 32,
         use_multiprocessing: bool = True,
+        use_static_fetch: bool = True,
+        min_static_links: int = 5,
+        use_sitemaps: bool = True,
+        sitemap_min_products: int = 50,
+        sitemap_max_files: int = 200,
+        max_concurrency: int = 16,
+        per_domain_concurrency: int = 4,
+        requests_per_second: float = 2.0,
+        burst: float = 4.0,
+        max_depth: int = 2,
+        write_batch_size: int = 500,
+        write_max_age: float = 1.0,
+        incremental: Optional[str] = None,
+        url_scorer: Optional["URLScorer"] = None,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        seen_store: Optional[FingerprintSet] = None,
+        extractor: Optional["ProductExtractor"] = None,
+        scheme: str = "https",
+        profiler: Optional[profiling.CrawlProfiler] = None,
+        page_store: Optional["PageStore"] = None,
+        keep_results: bool = True,
     ):
         self.url_processor = url_processor
         self.browser_manager = browser_manager
         self.product_repo = product_repo
         self.url_cache = url_cache
+        self.product_writer = product_repo.bulk_writer(
+            max_batch_size=write_batch_size, max_age=write_max_age
+        )
+
+        # Optional learned filter applied to discovered product URLs
+        self.url_scorer = url_scorer
 
         # Initialize managers with configurable parameters
-        self.gpu_manager = GPUManager(batch_size=batch_size)
-        self.concurrent_manager = ConcurrentManager(
+        self.concurrent_manager = get_backend("ConcurrentManager")(
             max_workers=max_workers,
             max_tasks=max_tasks,
             batch_size=batch_size,
@@ -47,53 +101,225 @@ class EcommerceCrawler(ICrawlerStrategy):
             "Connection": "keep-alive",
         }
 
+        # Plain HTTP tier tried before the browser, see _fetch_links
+        self.use_static_fetch = use_static_fetch
+        self.min_static_links = min_static_links
+        self.static_fetcher = StaticFetcher(headers=self.headers)
+        self.domain_fetch_mode: Dict[str, str] = {}  # "static" or "browser"
+
+        # robots.txt/sitemap seeding, see _seed_domain
+        self.use_sitemaps = use_sitemaps
+        self.sitemap_min_products = sitemap_min_products
+        self.sitemap_max_files = sitemap_max_files
+        self.scheme = scheme  # of start URLs; "http" for local test sites
+        self._browser_ready = False
+        self._browser_lock = asyncio.Lock()
+
         logger.info(
             f"EcommerceCrawler initialized with "
             f"workers={max_workers or 'auto'}, "
             f"tasks={max_tasks or 'auto'}, "
             f"batch_size={batch_size}, "
-            f"multiprocessing={'enabled' if use_multiprocessing else 'disabled'}"
+            f"multiprocessing={'enabled' if use_multiprocessing else 'disabled'}, "
+            f"static_fetch={'enabled' if use_static_fetch else 'disabled'}, "
+            f"concurrency={max_concurrency} ({per_domain_concurrency}/domain @ "
+            f"{requests_per_second} req/s)"
         )
 
-        self.domain_queues = {}  # Track queues per domain
-        self.domain_last_request = {}  # Track last request time per domain
-        self.politeness_delay = 1.0  # Delay between requests to same domain
+        # Frontier scheduling, see CrawlScheduler
+        self.max_concurrency = max_concurrency
+        self.per_domain_concurrency = per_domain_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_depth = max_depth
+
+        # Incremental mode: "skip" or "defer" URLs still fresh in url_cache
+        if incremental not in (None, "skip", "defer"):
+            raise ValueError(f"Unknown incremental mode: {incremental}")
+        self.incremental = incremental
+
+        # Frontier of the crawl in progress, for progress reporting
+        self.scheduler: Optional[CrawlScheduler] = None
+
+        # Journal for resuming an interrupted crawl_domains() call
+        self.checkpoint = checkpoint
+
+        # Memory-mapped seen-set used instead of per-domain sets of URLs;
+        # always used with a checkpoint, which restores visited fingerprints
+        if seen_store is None and checkpoint is not None:
+            seen_store = FingerprintSet()
+        self.seen_store = seen_store
+
+        # Without results (as for streamed jobs, whose products go to
+        # on_products) found product URLs are kept only as fingerprints
+        self.keep_results = keep_results
+        self.product_store = None if keep_results else FingerprintSet()
+
+        # Fills in details of the products found once the crawl finishes
+        self.extractor = extractor
+
+        # Called with (domain, urls) as product URLs are discovered
+        self.on_products: Optional[Callable[[str, List[str]], None]] = None
+
+        # Stage timings and sampled profile of crawl_domains(), if profiling
+        self.profiler = profiler
+
+        # Keeps every fetched page for replaying, see app/crawler/replay.py
+        self.page_store = page_store
 
     async def crawl_domains(self, domains: List[str]) -> List[Dict[str, List[str]]]:
         logger.info(f"Starting concurrent crawl for domains: {domains}")
-        await self.browser_manager.setup()
 
+        completed = False
+        if self.profiler is not None:
+            self.profiler.start()
         try:
-            # Create tasks for all domains concurrently
-            async with asyncio.TaskGroup() as tg:
-                tasks = [
-                    tg.create_task(self.crawl_domain(domain)) for domain in domains
-                ]
-
-            results = [t.result() for t in tasks]
+            # All domains share one frontier so slow hosts don't hold up fast ones
+            results = await self._crawl(domains)
+            completed = True
             processed_results = await self._process_results(results)
+
+            if self.extractor is not None:
+                # Product rows must be written before they can be extracted
+                await self.product_writer.flush()
+                await self.extractor.extract_pending(domains)
             return processed_results
 
         finally:
+            await self.close(completed)
+            if self.profiler is not None:
+                try:
+                    await self.profiler.stop()
+                except Exception as e:
+                    # A profile is diagnostic; losing it must not fail the crawl
+                    logger.error(f"Error writing crawl profile: {str(e)}")
+
+    async def close(self, completed: bool = False) -> None:
+        """Close the checkpoint and release writers, caches, pools and the
+        browser; crawl_domains() does this itself, so call it only for a
+        crawler that never ran"""
+        if self.checkpoint is not None:
+            await self.checkpoint.close(completed=completed)
+        await self._close()
+
+    async def _close(self) -> None:
+        await self.product_writer.close()
+        await self.url_cache.close()
+        await self.static_fetcher.cleanup()
+        if self._browser_ready:
             await self.browser_manager.cleanup()
-            await self.concurrent_manager.cleanup()
+            self._browser_ready = False
+        await self.concurrent_manager.cleanup()
+        if self.seen_store is not None:
+            self.seen_store.close()
+        if self.product_store is not None:
+            self.product_store.close()
+        if self.extractor is not None:
+            await self.extractor.close()
+
+    async def crawl_frontier(
+        self,
+        frontier: IFrontier,
+        worker_id: str,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+    ) -> Dict[str, int]:
+        """Work as one of many crawler workers sharing a frontier.
+
+        Leases URL batches (one domain per lease) until the frontier is
+        drained, pushing links found back so any worker can pick them up.
+        Leases are kept alive by a heartbeat; if this worker dies they
+        expire and are requeued for the others.
+        """
+        logger.info(f"Worker {worker_id} starting on shared frontier")
+        totals = {"leases": 0, "pages_fetched": 0, "products_found": 0, "expired": 0}
+        buckets: Dict[str, TokenBucket] = {}  # rate limits carry across leases
+        heartbeat = asyncio.create_task(self._heartbeat(frontier, worker_id))
+
+        try:
+            # Each slot crawls one lease (hence one domain) at a time
+            slots = max(1, self.max_concurrency // self.per_domain_concurrency)
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(slots):
+                    tg.create_task(
+                        self._lease_loop(
+                            frontier, worker_id, batch_size, poll_interval, buckets, totals
+                        )
+                    )
+            return totals
+
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await self._close()
+            logger.info(f"Worker {worker_id} finished: {totals}")
+
+    async def _lease_loop(
+        self,
+        frontier: IFrontier,
+        worker_id: str,
+        batch_size: int,
+        poll_interval: float,
+        buckets: Dict[str, TokenBucket],
+        totals: Dict[str, int],
+    ) -> None:
+        while True:
+            lease = await frontier.lease(worker_id, batch_size)
+            if lease is None:
+                if await frontier.is_drained():
+                    return
+                # Other workers hold the remaining domains; they may push more
+                await asyncio.sleep(poll_interval)
+                continue
+
+            scheduler = LeaseScheduler(
+                lease,
+                max_concurrency=self.per_domain_concurrency,
+                per_domain_concurrency=self.per_domain_concurrency,
+                requests_per_second=self.requests_per_second,
+                burst=self.burst,
+                max_depth=self.max_depth,
+            )
+            state = scheduler.domains[lease.domain]
+            state.bucket = buckets.setdefault(lease.domain, state.bucket)
+
+            await scheduler.run(partial(self._crawl_page, scheduler))
+            for domain, items in scheduler.outbox.items():
+                await frontier.push(domain, items)
+            if not await frontier.complete(lease):
+                logger.warning(
+                    f"Lease {lease.lease_id} for {lease.domain} expired before it "
+                    f"completed; its URLs were requeued"
+                )
+                totals["expired"] += 1
+
+            totals["leases"] += 1
+            totals["pages_fetched"] += state.pages_fetched
+            totals["products_found"] += state.products_found
+
+    async def _heartbeat(self, frontier: IFrontier, worker_id: str) -> None:
+        interval = max(getattr(frontier, "lease_ttl", 60.0) / 3, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await frontier.heartbeat(worker_id)
+            except Exception as e:
+                logger.error(f"Error sending heartbeat for {worker_id}: {str(e)}")
 
     async def _process_results(
         self, results: List[Dict[str, List[str]]]
     ) -> List[Dict[str, List[str]]]:
-        """Process and save results using both GPU and CPU cores"""
+        """Process results using the CPU worker pool; product URLs were
+        already scored as they were found, see _handle_products"""
         processed_results = []
 
         for result in results:
             domain = result["domain"]
             urls = result["product_urls"]
 
-            # Process URLs in parallel using both GPU and CPU
+            # Process URLs in parallel
             processed_urls = await self.concurrent_manager.process_batch_concurrent(
-                items=urls,
-                process_func=self._process_url,
-                use_gpu=True,
-                chunk_size=self.concurrent_manager.batch_size,
+                items=urls, process_func=self._process_url
             )
 
             processed_results.append({"domain": domain, "product_urls": processed_urls})
@@ -110,106 +336,357 @@ class EcommerceCrawler(ICrawlerStrategy):
             return None
 
     async def crawl_domain(self, domain: str) -> Dict[str, List[str]]:
-        logger.info(f"Starting BFS crawl for domain: {domain}")
-        product_urls = set()
-        visited_urls = set()
-        queue = deque([(f"https://{domain}", 0)])
-        max_depth = 2
+        """Crawl a single domain; crawl_domains shares one frontier across domains"""
+        results = await self._crawl([domain])
+        return results[0]
+
+    async def _crawl(self, domains: List[str]) -> List[Dict[str, List[str]]]:
+        scheduler = self.scheduler = CrawlScheduler(
+            max_concurrency=self.max_concurrency,
+            per_domain_concurrency=self.per_domain_concurrency,
+            requests_per_second=self.requests_per_second,
+            burst=self.burst,
+            max_depth=self.max_depth,
+            seen=self.seen_store,
+            products=self.product_store,
+        )
+        resumed = False
+        if self.checkpoint is not None:
+            resumed = self.checkpoint.restore(scheduler)
+            self.checkpoint.attach(scheduler)
+
+        # A resumed crawl only re-seeds domains whose seeding was cut short;
+        # pushes already journaled are dropped by the seen-set
+        seeders = []
+        for domain in domains:
+            if resumed and domain in self.checkpoint.seeded:
+                continue
+            scheduler.add_domain(domain)
+            scheduler.open_producer()
+            seeders.append(self._seed_domain(scheduler, domain))
 
-        while queue:
-            await self._respect_rate_limit(domain)
+        await asyncio.gather(scheduler.run(partial(self._crawl_page, scheduler)), *seeders)
 
-            current_url, depth = queue.popleft()
-            if depth > max_depth or current_url in visited_urls:
-                continue
+        for state in scheduler.domains.values():
+            logger.info(
+                f"Found {state.products_found} product URLs for {state.domain} "
+                f"in {state.pages_fetched} pages"
+            )
+        return scheduler.results()
 
-            visited_urls.add(current_url)
-            logger.info(f"Processing {current_url} at depth {depth}")
+    async def _seed_domain(self, scheduler: CrawlScheduler, domain: str) -> None:
+        """Ingest the domain's sitemaps, then start the BFS crawl unless they
+        already listed enough products to make rendering categories pointless"""
+        try:
+            found = 0
+            if self.use_sitemaps:
+                try:
+                    found = await self._ingest_sitemaps(scheduler, domain)
+                except Exception as e:
+                    logger.error(f"Error reading sitemaps for {domain}: {str(e)}")
+
+            if found >= self.sitemap_min_products:
+                logger.info(
+                    f"Sitemaps listed {found} product URLs for {domain}, "
+                    f"skipping BFS crawl"
+                )
+            else:
+                logger.info(f"Starting BFS crawl for domain: {domain}")
+                scheduler.push(domain, f"{self.scheme}://{domain}", 0)
+            if scheduler.checkpoint is not None:
+                scheduler.checkpoint.record_seeded(domain)
+        finally:
+            scheduler.close_producer()
+
+    async def _ingest_sitemaps(
+        self, scheduler: CrawlScheduler, domain: str, batch_size: int = 500
+    ) -> int:
+        """Stream product URLs from the domain's sitemaps into the pipeline,
+        returning how many were found"""
+        state = scheduler.add_domain(domain)
+        reader = SitemapReader(
+            self.static_fetcher, max_sitemaps=self.sitemap_max_files, scheme=self.scheme
+        )
+        found = 0
+        batch: List[SitemapEntry] = []
+        async for entry in reader.entries(domain):
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                found += await self._ingest_sitemap_batch(scheduler, state, batch)
+                batch = []
+        if batch:
+            found += await self._ingest_sitemap_batch(scheduler, state, batch)
+        return found
+
+    async def _ingest_sitemap_batch(
+        self, scheduler: CrawlScheduler, state: DomainState, batch: List[SitemapEntry]
+    ) -> int:
+        domain = state.domain
+        # Sitemap batches are large enough to be worth classifying off the
+        # loop; workers get the domain's rules, not the whole processor
+        with profiling.stage(profiling.CLASSIFICATION):
+            labels = await self.concurrent_manager.run(
+                classify_urls,
+                [entry.url for entry in batch],
+                domain,
+                self.url_processor.url_rules(domain),
+            )
 
-            try:
-                page = await self.browser_manager.create_page()
-                await page.set_extra_http_headers(self.headers)
-                await page.goto(current_url, timeout=45000)
-
-                urls = await self.url_processor.extract_urls_from_page(page)
-                filtered_urls = await self.url_processor.filter_urls(urls, domain)
-
-                # Process product URLs - add additional checks
-                for url in filtered_urls["products"]:
-                    normalized_url = await self.url_processor.normalize_url(url, domain)
-                    # Skip pagination and category-like URLs
-                    if any(
-                        pattern in normalized_url.lower()
-                        for pattern in [
-                            "/shop/",
-                            "/category/",
-                            "/page/",
-                            "?p=",
-                            "page=",
-                            "/products/",  # general products listing
-                            "/collections/",
-                        ]
-                    ):
-                        logger.debug(f"Skipping non-product URL: {normalized_url}")
-                        continue
-
-                    if await self.url_processor.is_product_url(normalized_url):
-                        logger.info(f"Found product URL: {normalized_url}")
-                        product_urls.add(normalized_url)
-                        await self.url_cache.cache_url(normalized_url, domain)
-                        await self._add_product_to_db(normalized_url, domain)
-
-                # Process category URLs
-                for url in filtered_urls["categories"]:
-                    normalized_url = await self.url_processor.normalize_url(url, domain)
-                    if url not in visited_urls:
-                        queue.append((normalized_url, depth + 1))
-                        await self.url_cache.cache_url(normalized_url, domain)
-
-                await page.close()
+        # Everything in a product sitemap counts, even URLs whose shape the
+        # classifier doesn't recognize
+        products = {}
+        for entry, label in zip(batch, labels):
+            if label == PRODUCT or (label != EXCLUDED and "product" in entry.sitemap.lower()):
+                products[entry.url] = entry.lastmod
+        if not products:
+            return 0
+
+        unchanged = set()
+        if self.incremental:
+            # A lastmod no newer than our last visit means the page is unchanged;
+            # without a lastmod fall back to the cache TTL
+            last_accessed = await self.url_cache.last_accessed(products)
+            unchanged = {
+                url
+                for url, lastmod in products.items()
+                if lastmod is not None and url in last_accessed and lastmod <= last_accessed[url]
+            }
+            undated = [url for url, lastmod in products.items() if lastmod is None]
+            if undated:
+                unchanged |= await self.url_cache.fresh_urls(undated)
+
+        await self._handle_products(scheduler, state, set(products), unchanged)
+        return len(products)
+
+    async def _crawl_page(
+        self, scheduler: CrawlScheduler, state: DomainState, current_url: str, depth: int
+    ) -> None:
+        domain = state.domain
+        logger.info(f"Processing {current_url} at depth {depth}")
+
+        page = await self._fetch_links(domain, current_url)
+        if page.unchanged:
+            state.pages_unchanged += 1
+            state.metrics.pages_unchanged.inc()
+        with profiling.stage(profiling.CLASSIFICATION):
+            filtered_urls = await self.url_processor.filter_urls(page.links, domain)
+
+        # filter_urls returns normalized, classified URLs
+        product_urls = filtered_urls["products"]
+        category_urls = filtered_urls["categories"]
+
+        # Must run before cache_url below refreshes last_accessed
+        fresh_urls = set()
+        outlinks = None
+        if self.incremental:
+            fresh_urls = await self.url_cache.fresh_urls(product_urls | category_urls)
+            if not page.unchanged:
+                # Followed again by the next crawl if it finds the page unchanged
+                outlinks = sorted(product_urls | category_urls)
+        if page.validators is not None or outlinks is not None:
+            await self.url_cache.cache_url(current_url, domain, page.validators, outlinks)
+
+        # An unchanged page's products were written when it was last crawled
+        await self._handle_products(
+            scheduler, state, product_urls, product_urls if page.unchanged else fresh_urls
+        )
 
-            except Exception as e:
-                logger.error(f"Error processing {current_url}: {str(e)}")
+        # Process category URLs; those of an unchanged page were queued by the
+        # last crawl, so they wait behind the pages found changed
+        for url in category_urls:
+            if url in fresh_urls:
+                if self.incremental == "skip":
+                    logger.debug(f"Skipping fresh category URL: {url}")
+                    continue
+                scheduler.push(domain, url, depth + 1, deferred=True)
+            else:
+                scheduler.push(domain, url, depth + 1, deferred=page.unchanged)
+            await self.url_cache.cache_url(url, domain)
+
+    async def _handle_products(
+        self,
+        scheduler: CrawlScheduler,
+        state: DomainState,
+        product_urls: Set[str],
+        fresh_urls: Set[str],
+    ) -> None:
+        """Record, publish, cache and queue for the database the product URLs
+        found on a page or in a sitemap, skipping database writes for fresh ones.
+        URLs the product-likelihood model rejects are dropped before any of it."""
+        domain = state.domain
+        new_products = {url for url in product_urls if url not in state.product_urls}
+        if self.url_scorer is not None and new_products:
+            # Known products were scored when first found
+            scored = set(self.url_scorer.filter_products(list(new_products)))
+            if len(scored) < len(new_products):
+                logger.debug(
+                    f"URL scorer rejected {len(new_products) - len(scored)} of "
+                    f"{len(new_products)} new product URLs for {domain}"
+                )
+            product_urls = (product_urls - new_products) | scored
+            new_products = scored
+        if new_products:
+            state.products_found += len(new_products)
+            state.metrics.products.inc(len(new_products))
+            if scheduler.checkpoint is not None:
+                scheduler.checkpoint.record_products(state, list(new_products))
+            if self.on_products is not None:
+                self._publish_products(domain, new_products)
+
+        for url in product_urls:
+            state.product_urls.add(url)
+            if url in fresh_urls:
+                logger.debug(f"Skipping fresh product URL: {url}")
                 continue
+            logger.info(f"Found product URL: {url}")
+            await self.url_cache.cache_url(url, domain)
+            self._add_product_to_db(url, domain)
+
+    def _publish_products(self, domain: str, urls: Set[str]) -> None:
+        """Hand newly discovered, already scored product URLs to on_products"""
+        self.on_products(domain, list(urls))
+
+    async def _fetch_links(self, domain: str, url: str) -> PageLinks:
+        """Fetch a page over HTTP, falling back to the browser for JS-dependent
+        sites. In incremental mode the fetch is conditional on the validators
+        stored last time, and an unchanged page returns its stored links
+        without being parsed."""
+        metrics = domain_metrics(domain)
+        fetched = None
+        if self.use_static_fetch and self.domain_fetch_mode.get(domain) != "browser":
+            validators = None
+            if self.incremental:
+                validators = (await self.url_cache.validators([url])).get(url)
+            static_page = await self._fetch_static(domain, url, validators)
+
+            if (
+                validators is not None
+                and static_page is not None
+                and validators.unchanged(static_page.status, static_page.content_hash)
+            ):
+                outlinks = await self.url_cache.outlinks(url)
+                if outlinks is not None:
+                    logger.debug(f"Unchanged page {url}, following its stored links")
+                    fetched = PageValidators(
+                        static_page.etag, static_page.last_modified, static_page.content_hash
+                    )
+                    return PageLinks(set(outlinks), validators.refreshed(fetched), unchanged=True)
+                if static_page.status == 304:
+                    # Crawled before its links were stored: a 304 has no body to parse
+                    static_page = await self._fetch_static(domain, url)
+
+            if static_page is None or static_page.status >= 400:
+                # A network or HTTP error says nothing about whether the site
+                # needs rendering: fall back for this page without a verdict
+                logger.info(f"Static fetch of {url} failed, rendering it in the browser")
+            else:
+                fetched = PageValidators(
+                    static_page.etag, static_page.last_modified, static_page.content_hash
+                )
+                if validators is not None:
+                    fetched = validators.refreshed(fetched)
+                await self._store_page(url, domain, static_page.html)
+
+                with profiling.stage(profiling.HTML_PARSE):
+                    links = await self._static_links(static_page)
+                if links is not None:
+                    self.domain_fetch_mode.setdefault(domain, "static")
+                    return PageLinks(links, fetched)
+
+                # Only the first verdict for a domain sticks; once a domain is
+                # known to serve static HTML, an odd page just falls back on its own
+                if domain not in self.domain_fetch_mode:
+                    logger.info(
+                        f"Static fetch of {url} looks JS-dependent, "
+                        f"using browser for {domain}"
+                    )
+                    self.domain_fetch_mode[domain] = "browser"
+
+        started = time.perf_counter()
+        try:
+            return PageLinks(await self._fetch_links_with_browser(domain, url), fetched)
+        finally:
+            metrics.fetch_browser.observe(time.perf_counter() - started)
+
+    async def _fetch_static(
+        self, domain: str, url: str, validators: Optional[PageValidators] = None
+    ) -> Optional[StaticPage]:
+        """Fetch a page over HTTP, conditionally when validators are given"""
+        started = time.perf_counter()
+        with profiling.stage(profiling.STATIC_FETCH):
+            static_page = await self.static_fetcher.fetch(
+                url,
+                etag=validators and validators.etag,
+                last_modified=validators and validators.last_modified,
+            )
+        domain_metrics(domain).fetch_static.observe(time.perf_counter() - started)
+        return static_page
 
-            self.domain_last_request[domain] = time.time()
-
-        logger.info(f"Found {len(product_urls)} product URLs for {domain}")
-        return {"domain": domain, "product_urls": list(product_urls)}
+    async def _static_links(self, static_page: StaticPage) -> Optional[Set[str]]:
+        """Return links from a successfully fetched page, or None if it
+        looks like it needs rendering"""
+        if not static_page.html.strip():
+            return None
 
-    async def _add_product_to_db(self, url: str, domain: str):
-        """Add product URL to products table"""
-        try:
-            # Check if product already exists
-            existing_product = await self.product_repo.get_product_by_url(url)
-            if existing_product:
-                logger.info(f"Product already exists in database: {url}")
-                return existing_product
-
-            # Create product entry using the ProductCreate schema
-            product_data = ProductCreate(
-                url=url,
-                domain=domain,
-                status="pending",
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc),
+        # Parsed in the shared process pool (HTML passed through shared
+        # memory) unless multiprocessing is disabled
+        links = await self.concurrent_manager.run(
+            extract_urls_from_html, static_page.html, static_page.url
+        )
+        if len(links) < self.min_static_links:
+            return None
+        return links
+
+    async def _fetch_links_with_browser(self, domain: str, url: str) -> Set[str]:
+        """Render a page in the browser and return its links"""
+        await self._ensure_browser()
+        async with self.browser_manager.page() as page:
+            await page.set_extra_http_headers(self.headers)
+            with profiling.stage(profiling.NAVIGATION):
+                await self.browser_manager.navigate(page, url, domain)
+            if self.page_store is not None:
+                await self._store_page(url, domain, await page.content())
+            with profiling.stage(profiling.LINK_EXTRACTION_JS):
+                return await self.url_processor.extract_urls_from_page(page)
+
+    async def _store_page(self, url: str, domain: str, html: str) -> None:
+        """Keep a fetched page in the page store; compression runs in a thread"""
+        if self.page_store is None or not html:
+            return
+        with profiling.stage(profiling.PAGE_STORE_WRITES):
+            try:
+                await asyncio.to_thread(self.page_store.put_page, url, domain, html)
+            except OSError as e:
+                logger.error(f"Error storing page {url}: {str(e)}")
+
+    async def _ensure_browser(self) -> None:
+        """Launch the browser on first use so static-only crawls never start it"""
+        async with self._browser_lock:
+            if not self._browser_ready:
+                await self.browser_manager.setup()
+                self._browser_ready = True
+
+    def _add_product_to_db(self, url: str, domain: str) -> asyncio.Future:
+        """Queue product URL for the products table, returning its flush future"""
+        product_data = ProductCreate(
+            url=url,
+            domain=domain,
+            status="pending",
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+        future = self.product_writer.add(product_data)
+        future.add_done_callback(partial(self._on_product_written, url))
+        return future
+
+    def _on_product_written(self, url: str, future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(
+                f"Error adding product to database {url}: {str(future.exception())}"
             )
-            # Add to database
-            new_product = await self.product_repo.create_product(product_data)
+        elif future.result():
             logger.info(f"Added product to database: {url}")
-            return new_product
-
-        except Exception as e:
-            logger.error(f"Error adding product to database {url}: {str(e)}")
-            # Ensure session is rolled back on error
-            await self.product_repo.rollback()
-
-    async def _respect_rate_limit(self, domain: str) -> None:
-        """Ensure politeness delay between requests to same domain"""
-        last_request = self.domain_last_request.get(domain, 0)
-        now = time.time()
-        delay = max(
-            last_request + self.politeness_delay - now, 2.0
-        )  # Minimum 2 second delay
-        if delay > 0:
-            await asyncio.sleep(delay)
+        else:
+            logger.info(f"Product already exists in database: {url}")
@@ -1,22 +1,326 @@
-from playwright.async_api import async_playwright
+import asyncio
+import logging
+import psutil
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlparse
 from app.crawler.interfaces import IBrowserManager
+from app.metrics import BROWSER_PAGES_OPEN, BROWSER_PAGES_RECYCLED
+
+logger = logging.getLogger(__name__)
+
+# Resource types that never matter for link discovery
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Ad, analytics and tag-manager hosts (subdomains are matched too)
+DEFAULT_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "segment.io",
+    "cdn.segment.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "amazon-adsystem.com",
+    "nr-data.net",
+    "scorecardresearch.com",
+)
+
+# Rough transfer sizes used to estimate what a blocked request would have cost
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 30_000,
+    "stylesheet": 20_000,
+    "script": 25_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+# Run before a pooled page leaves a site; opaque origins throw on access
+CLEAR_STORAGE_JS = """() => {
+    try { localStorage.clear(); } catch (e) {}
+    try { sessionStorage.clear(); } catch (e) {}
+}"""
+
+
+@dataclass(frozen=True)
+class NavigationProfile:
+    """Request blocking and wait strategy applied to a browser navigation"""
+
+    blocked_resource_types: FrozenSet[str] = DEFAULT_BLOCKED_RESOURCE_TYPES
+    blocked_hosts: Tuple[str, ...] = DEFAULT_BLOCKED_HOSTS
+    wait_until: str = "domcontentloaded"  # or "load", "networkidle", "commit"
+    ready_selector: Optional[str] = None
+    timeout_ms: int = 45000
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.blocked_resource_types:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(
+            host == blocked or host.endswith("." + blocked)
+            for blocked in self.blocked_hosts
+        )
+
+
+@dataclass
+class NavigationStats:
+    requests_allowed: int = 0
+    requests_blocked: int = 0
+    bytes_saved_estimate: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, other: "NavigationStats") -> None:
+        self.requests_allowed += other.requests_allowed
+        self.requests_blocked += other.requests_blocked
+        self.bytes_saved_estimate += other.bytes_saved_estimate
+        for resource_type, count in other.blocked_by_type.items():
+            self.blocked_by_type[resource_type] = (
+                self.blocked_by_type.get(resource_type, 0) + count
+            )
+
+
+class PooledPage:
+    """A warm page with its own isolated browser context"""
+
+    def __init__(self, context, page, profile: NavigationProfile):
+        self.context = context
+        self.page = page
+        self.navigations = 0
+        self.profile = profile
+        self.stats = NavigationStats()
+
+    async def handle_route(self, route) -> None:
+        """Abort requests the current profile blocks, let everything else through"""
+        request = route.request
+        if self.profile.blocks(request.resource_type, request.url):
+            self.stats.requests_blocked += 1
+            self.stats.bytes_saved_estimate += ESTIMATED_RESOURCE_BYTES.get(
+                request.resource_type, DEFAULT_ESTIMATED_BYTES
+            )
+            self.stats.blocked_by_type[request.resource_type] = (
+                self.stats.blocked_by_type.get(request.resource_type, 0) + 1
+            )
+            await route.abort()
+        else:
+            self.stats.requests_allowed += 1
+            await route.continue_()
 
 
 class PlaywrightManager(IBrowserManager):
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size: int = 4,
+        max_navigations_per_page: int = 50,
+        max_rss_mb: Optional[int] = 2048,
+        rss_check_interval: int = 10,
+        profile: Optional[NavigationProfile] = None,
+        domain_profiles: Optional[Dict[str, NavigationProfile]] = None,
+    ):
+        self.playwright = None
         self.browser = None
         self.context = None
 
+        # Page pool settings
+        self.pool_size = pool_size
+        self.max_navigations_per_page = max_navigations_per_page
+        self.max_rss_mb = max_rss_mb
+        self.rss_check_interval = rss_check_interval
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._in_use = {}  # page -> PooledPage
+        self._created = 0
+        self._releases = 0
+        self.pages_recycled = 0
+
+        # Request interception and wait strategy
+        self.profile = profile or NavigationProfile()
+        self.domain_profiles = domain_profiles or {}
+        self.navigation_stats = NavigationStats()
+
     async def setup(self):
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=True)
+        # Imported here so static-only crawls never load Playwright
+        from playwright.async_api import async_playwright
+
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
         self.context = await self.browser.new_context()
 
+        # Warm a single page so the first checkout doesn't pay for it
+        await self._idle.put(await self._new_pooled_page())
+        self._created = 1
+
     async def cleanup(self):
+        if self.navigation_stats.requests_blocked:
+            logger.info(
+                f"Blocked {self.navigation_stats.requests_blocked} browser requests "
+                f"(~{self.navigation_stats.bytes_saved_estimate / 1e6:.1f} MB saved): "
+                f"{self.navigation_stats.blocked_by_type}"
+            )
+
+        pooled_pages: List[PooledPage] = list(self._in_use.values())
+        while not self._idle.empty():
+            pooled_pages.append(self._idle.get_nowait())
+        for pooled in filter(None, pooled_pages):
+            await self._close_pooled_page(pooled)
+        self._in_use.clear()
+        self._created = 0
+
         if self.context:
             await self.context.close()
         if self.browser:
             await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.playwright = self.browser = self.context = None
 
     async def create_page(self):
         return await self.context.new_page()
+
+    async def acquire_page(self):
+        """Check a page out of the pool, waiting if all pages are in use"""
+        create = self._idle.empty() and self._created < self.pool_size
+        if create:
+            self._created += 1
+            try:
+                pooled = await self._new_pooled_page()
+            except Exception:
+                self._created -= 1
+                raise
+        else:
+            pooled = await self._idle.get()
+            if pooled is None:
+                # The slot of a page that could not be recycled; fill it
+                try:
+                    pooled = await self._new_pooled_page()
+                except Exception:
+                    self._idle.put_nowait(None)
+                    raise
+
+        self._in_use[pooled.page] = pooled
+        return pooled.page
+
+    def profile_for(self, domain: Optional[str]) -> NavigationProfile:
+        return self.domain_profiles.get(domain, self.profile)
+
+    async def navigate(self, page, url: str, domain: Optional[str] = None) -> NavigationStats:
+        """Load a URL with the domain's profile and report what was blocked"""
+        profile = self.profile_for(domain)
+        pooled = self._in_use.get(page)
+        if pooled is not None:
+            pooled.profile = profile
+            pooled.stats = NavigationStats()
+
+        await page.goto(url, wait_until=profile.wait_until, timeout=profile.timeout_ms)
+        if profile.ready_selector:
+            await page.wait_for_selector(
+                profile.ready_selector, state="attached", timeout=profile.timeout_ms
+            )
+
+        if pooled is None:
+            return NavigationStats()
+
+        self.navigation_stats.add(pooled.stats)
+        logger.debug(
+            f"Loaded {url}: {pooled.stats.requests_allowed} requests, "
+            f"{pooled.stats.requests_blocked} blocked "
+            f"(~{pooled.stats.bytes_saved_estimate / 1024:.0f} KB saved)"
+        )
+        return pooled.stats
+
+    async def release_page(self, page, failed: bool = False):
+        """Return a page to the pool, recycling it if it is worn out or broken"""
+        pooled = self._in_use.pop(page, None)
+        if pooled is None:
+            return
+
+        pooled.navigations += 1
+        self._releases += 1
+        recycle = failed or self._should_recycle(pooled)
+        if not recycle:
+            try:
+                await self._reset(pooled)
+            except Exception as e:
+                # Never let a broken page leak out of the pool
+                logger.warning(f"Error resetting pooled page, recycling: {str(e)}")
+                recycle = True
+        if recycle:
+            pooled = await self._recycle(pooled)
+            if pooled is None:
+                # Hand the empty slot to the next waiter, which creates a page
+                self._idle.put_nowait(None)
+                return
+
+        await self._idle.put(pooled)
+
+    def _should_recycle(self, pooled: PooledPage) -> bool:
+        if pooled.navigations >= self.max_navigations_per_page:
+            return True
+        if (
+            self.max_rss_mb is not None
+            and self._releases % self.rss_check_interval == 0
+            and self.browser_rss_mb() > self.max_rss_mb
+        ):
+            logger.info(f"Browser RSS above {self.max_rss_mb} MB, recycling page")
+            return True
+        return False
+
+    def browser_rss_mb(self) -> float:
+        """Resident memory of the browser processes spawned by this process"""
+        rss = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return rss / (1024 * 1024)
+
+    async def _reset(self, pooled: PooledPage) -> None:
+        """Drop per-site state so the next checkout starts clean"""
+        # Web storage is per origin, so clear it before leaving the page
+        await pooled.page.evaluate(CLEAR_STORAGE_JS)
+        await pooled.page.goto("about:blank")
+        await pooled.context.clear_cookies()
+
+    async def _recycle(self, pooled: PooledPage) -> Optional[PooledPage]:
+        """Close a page and open its replacement, or None if that fails"""
+        await self._close_pooled_page(pooled)
+        self.pages_recycled += 1
+        BROWSER_PAGES_RECYCLED.inc()
+        try:
+            return await self._new_pooled_page()
+        except Exception as e:
+            logger.error(f"Error replacing recycled page: {str(e)}")
+            return None
+
+    async def _new_pooled_page(self) -> PooledPage:
+        context = await self.browser.new_context()
+        try:
+            page = await context.new_page()
+            pooled = PooledPage(context, page, self.profile)
+            await context.route("**/*", pooled.handle_route)
+        except Exception:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Error closing context of a failed page: {str(e)}")
+            raise
+        BROWSER_PAGES_OPEN.inc()
+        return pooled
+
+    async def _close_pooled_page(self, pooled: PooledPage) -> None:
+        BROWSER_PAGES_OPEN.dec()
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled context: {str(e)}")
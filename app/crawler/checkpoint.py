@@ -0,0 +1,345 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.crawler.fingerprints import EMPTY, fingerprint
+from app.crawler.scheduler import CrawlScheduler, DomainState
+
+logger = logging.getLogger(__name__)
+
+# Journal record types, one JSON array per line
+HEADER = "h"  # ["h", {"domains": [...], "options": {...}}]
+SNAPSHOT = "s"  # ["s", domain, pages_fetched, products_found] at the start of a compacted journal
+VISITED = "v"  # ["v", [fingerprint, ...]] in a compacted journal
+PRODUCT_FINGERPRINTS = "f"  # ["f", [fingerprint, ...]] in a compacted journal
+PUSH = "p"  # ["p", domain, url, depth, deferred]
+DONE = "d"  # ["d", domain, fingerprint]
+PRODUCTS = "r"  # ["r", domain, [url, ...]]
+SEEDED = "g"  # ["g", domain] once the domain's seeder queued everything it found
+END = "e"  # ["e"] once the crawl finished normally
+
+# Items per PRODUCTS/VISITED/PRODUCT_FINGERPRINTS record when writing a snapshot
+SNAPSHOT_CHUNK = 10_000
+
+
+class CrawlCheckpoint:
+    """Append-only journal of a crawl's frontier, written in the background.
+
+    The scheduler records every queued URL, the fingerprint of every
+    finished page and every product found into an in-memory buffer; a
+    flusher task appends the buffer to disk every `interval` seconds from a
+    worker thread, so the event loop never waits on file I/O. Replaying the
+    journal gives back visited fingerprints, the pending queue (queued but
+    not finished, including pages that were in flight or failed), products
+    and per-domain page counts.
+
+    Once `compact_records` records have been appended, the journal is
+    rewritten as a snapshot of the attached scheduler (pending URLs,
+    products, page counts and visited fingerprints), so it stays
+    proportional to the frontier rather than to the crawl's history. The
+    journal is deleted when the crawl completes.
+
+    A domain's SEEDED record follows the pushes of its seeder (sitemaps and
+    the root URL); a resumed crawl re-runs the seeders of domains without
+    one, as restore() can't tell how far they got.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval: float = 5.0,
+        fsync: bool = False,
+        compact_records: int = 200_000,
+    ):
+        self.path = path
+        self.interval = interval
+        self.fsync = fsync
+        self.compact_records = compact_records
+        self._buffer: List[str] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._write_lock = threading.Lock()
+        self._header: Optional[Dict[str, Any]] = None
+        self._scheduler: Optional[CrawlScheduler] = None
+        # Pages that failed, which stay pending across a compaction
+        self._failed: Dict[str, List[Tuple[str, int, bool]]] = {}
+        self._since_snapshot = 0
+        self.records_written = 0
+        # Domains whose seeding finished, restored from the journal
+        self.seeded: Set[str] = set()
+
+    @staticmethod
+    def _encode(record: List[Any]) -> str:
+        return json.dumps(record, separators=(",", ":"))
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    @classmethod
+    def read_header(cls, path: str) -> Optional[Dict[str, Any]]:
+        """Domains and options of a checkpointed crawl, with a `completed` flag"""
+        if not os.path.exists(path):
+            return None
+        header = None
+        completed = False
+        for record in cls._records(path):
+            if record[0] == HEADER:
+                header = record[1]
+            elif record[0] == END:
+                completed = True
+        if header is None:
+            return None
+        return {**header, "completed": completed}
+
+    @staticmethod
+    def _records(path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    logger.warning(f"Skipping unreadable checkpoint line in {path}")
+
+    def start(self, domains: List[str], options: Dict[str, Any]) -> None:
+        """Write the header of a new checkpoint"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._header = {"domains": domains, "options": options}
+        self._buffer.append(self._encode([HEADER, self._header]))
+
+    def attach(self, scheduler: CrawlScheduler) -> None:
+        """Journal scheduler's pushes and finished pages, and snapshot it when
+        compacting"""
+        self._scheduler = scheduler
+        scheduler.checkpoint = self
+
+    def restore(self, scheduler: CrawlScheduler) -> bool:
+        """Load a previous run's state into scheduler; False if there was none.
+        Visited URLs come back as fingerprints, so scheduler needs a seen-set."""
+        if not self.exists():
+            return False
+        if scheduler.seen is None:
+            raise ValueError("Restoring a checkpoint needs a scheduler with a FingerprintSet")
+
+        queued: Dict[str, Dict[int, tuple]] = {}
+        for record in self._records(self.path):
+            kind = record[0]
+            if kind == PUSH:
+                _, domain, url, depth, deferred = record
+                scheduler.add_domain(domain)
+                scheduler.seen.add(url)
+                queued.setdefault(domain, {})[fingerprint(url)] = (url, depth, deferred)
+            elif kind == DONE:
+                _, domain, fp = record
+                if isinstance(fp, str):
+                    fp = fingerprint(fp)  # journals written before fingerprints
+                state = scheduler.add_domain(domain)
+                state.pages_fetched += 1
+                queued.get(domain, {}).pop(fp, None)
+            elif kind == PRODUCTS:
+                _, domain, urls = record
+                state = scheduler.add_domain(domain)
+                for url in urls:
+                    if url not in state.product_urls:
+                        state.product_urls.add(url)
+                        state.products_found += 1
+            elif kind == VISITED:
+                scheduler.seen.add_fingerprints(record[1])
+            elif kind == PRODUCT_FINGERPRINTS:
+                # Only written for crawls keeping product fingerprints
+                if scheduler.products is not None:
+                    scheduler.products.add_fingerprints(record[1])
+            elif kind == SNAPSHOT:
+                _, domain, pages_fetched, *products_found = record
+                state = scheduler.add_domain(domain)
+                state.pages_fetched = pages_fetched
+                # Snapshots that list product URLs count them as they load
+                state.products_found = products_found[0] if products_found else 0
+            elif kind == SEEDED:
+                self.seeded.add(record[1])
+            elif kind == HEADER:
+                self._header = record[1]
+
+        for domain, items in queued.items():
+            state = scheduler.domains[domain]
+            for url, depth, deferred in items.values():
+                (state.deferred if deferred else state.queue).append((url, depth))
+            state.metrics.frontier_depth.inc(len(items))
+
+        logger.info(
+            f"Resumed crawl from {self.path}: "
+            + ", ".join(
+                f"{state.domain} ({state.pages_fetched} pages, "
+                f"{len(state.queue) + len(state.deferred)} queued, "
+                f"{state.products_found} products)"
+                for state in scheduler.domains.values()
+            )
+        )
+        return True
+
+    def record_push(self, domain: str, url: str, depth: int, deferred: bool) -> None:
+        self._append([PUSH, domain, url, depth, deferred])
+
+    def record_done(self, state: DomainState, url: str) -> None:
+        self._append([DONE, state.domain, fingerprint(url)])
+
+    def record_failed(self, state: DomainState, url: str, depth: int, deferred: bool) -> None:
+        # No record: without a DONE record the page is pending on replay
+        self._failed.setdefault(state.domain, []).append((url, depth, deferred))
+
+    def record_products(self, state: DomainState, urls: List[str]) -> None:
+        self._append([PRODUCTS, state.domain, urls])
+
+    def record_seeded(self, domain: str) -> None:
+        self.seeded.add(domain)
+        self._append([SEEDED, domain])
+
+    def _append(self, record: List[Any]) -> None:
+        self._buffer.append(self._encode(record))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while self._buffer:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Append buffered records to the journal file, or compact it once
+        enough records have been appended since the last snapshot"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            compact = (
+                self._scheduler is not None
+                and self._header is not None
+                and self._since_snapshot + len(lines) >= self.compact_records
+            )
+            # The snapshot is taken together with draining the buffer, so it
+            # covers exactly the records in `lines`
+            snapshot = self._snapshot() if compact else None
+            try:
+                # Shielded so cancelling the flusher can't requeue lines that
+                # the thread goes on to write anyway
+                await asyncio.shield(asyncio.to_thread(self._write, lines, snapshot))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error writing checkpoint {self.path}: {str(e)}")
+                # Keep the records for the next attempt, in order
+                self._buffer[:0] = lines
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Copy the scheduler state a compacted journal needs; runs on the
+        event loop, so it only copies and leaves encoding to the writer"""
+        scheduler = self._scheduler
+        domains = []
+        for state in scheduler.domains.values():
+            failed = self._failed.get(state.domain, [])
+            pending = [
+                (url, depth, deferred)
+                for url, (depth, deferred) in state.in_flight_urls.items()
+            ]
+            pending += failed
+            pending += [(url, depth, False) for url, depth in state.queue]
+            pending += [(url, depth, True) for url, depth in state.deferred]
+            pages_fetched = state.pages_fetched - len(failed)  # failed pages are retried
+            if scheduler.products is None:
+                domains.append((state.domain, pages_fetched, pending, list(state.product_urls), 0))
+            else:
+                domains.append((state.domain, pages_fetched, pending, [], state.products_found))
+        if scheduler.seen is not None:
+            slots = scheduler.seen.dump()
+        else:
+            slots = array("Q")
+            for state in scheduler.domains.values():
+                slots.extend(fingerprint(url) for url in state.visited)
+        return {
+            "header": self._header,
+            "domains": domains,
+            "seeded": sorted(self.seeded),
+            "visited": slots,
+            "products": scheduler.products.dump() if scheduler.products is not None else array("Q"),
+        }
+
+    def _write(self, lines: List[str], snapshot: Optional[Dict[str, Any]] = None) -> None:
+        if snapshot is not None:
+            try:
+                self._compact(snapshot)
+                return
+            except OSError as e:
+                logger.error(f"Error compacting checkpoint {self.path}: {str(e)}")
+
+        with self._write_lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+            self.records_written += len(lines)
+            self._since_snapshot += len(lines)
+
+    def _compact(self, snapshot: Dict[str, Any]) -> None:
+        """Replace the journal with a snapshot, written to a temporary file
+        first so a crash leaves either the old journal or the new one"""
+        tmp_path = f"{self.path}.tmp"
+        records = 0
+        with self._write_lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+
+                def write(record: List[Any]) -> None:
+                    nonlocal records
+                    f.write(self._encode(record) + "\n")
+                    records += 1
+
+                write([HEADER, snapshot["header"]])
+                for domain, pages_fetched, pending, products, products_found in snapshot[
+                    "domains"
+                ]:
+                    write([SNAPSHOT, domain, pages_fetched, products_found])
+                    for url, depth, deferred in pending:
+                        write([PUSH, domain, url, depth, deferred])
+                    for start in range(0, len(products), SNAPSHOT_CHUNK):
+                        write([PRODUCTS, domain, products[start : start + SNAPSHOT_CHUNK]])
+                for domain in snapshot["seeded"]:
+                    write([SEEDED, domain])
+
+                visited = [fp for fp in snapshot["visited"] if fp != EMPTY]
+                for start in range(0, len(visited), SNAPSHOT_CHUNK):
+                    write([VISITED, visited[start : start + SNAPSHOT_CHUNK]])
+                products = [fp for fp in snapshot["products"] if fp != EMPTY]
+                for start in range(0, len(products), SNAPSHOT_CHUNK):
+                    write([PRODUCT_FINGERPRINTS, products[start : start + SNAPSHOT_CHUNK]])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        logger.info(
+            f"Compacted checkpoint {self.path} after {self._since_snapshot} records "
+            f"to {records} records"
+        )
+        self._since_snapshot = 0
+
+    async def close(self, completed: bool = False) -> None:
+        """Stop the flusher and write everything buffered; a completed crawl
+        has nothing left to resume, so its journal is deleted"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if completed:
+            # Marks the journal finished in case it can't be deleted
+            self._buffer.append(self._encode([END]))
+        await self.flush()
+        if completed:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error deleting checkpoint {self.path}: {str(e)}")
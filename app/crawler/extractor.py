@@ -0,0 +1,444 @@
+import asyncio
+import json
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from lxml import etree, html as lxml_html
+from app.accelerator import get_backend
+from app.crawler.interfaces import IBrowserManager, IDataExtractor
+from app.crawler.http_fetcher import StaticFetcher
+from app.crawler.page_store import PRODUCT_PAGE, PageStore
+from app.cache.url_cache import PageValidators, URLCache
+from app.db.repositories.product import ProductRepository
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_FIELDS = ("external_id", "name", "category", "brand", "price", "image_url")
+
+# Products table statuses
+PENDING = "pending"
+EXTRACTED = "extracted"
+FAILED = "failed"
+UNCHANGED = "unchanged"  # counted only, the row keeps its status
+
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+PRICE_NUMBER = re.compile(r"\d[\d.,\s']*")
+MAX_PRICE = Decimal("99999999.99")  # Numeric(10, 2)
+
+
+# Parsing runs in worker processes, so everything below is plain functions
+# over strings and dicts that pickle cheaply
+
+
+def parse_price(value: Any) -> Optional[Decimal]:
+    """Parse "1,299.00", "12,99 €" or 12.5 into a two-place Decimal"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        text = str(value)
+    else:
+        match = PRICE_NUMBER.search(str(value))
+        if not match:
+            return None
+        text = re.sub(r"[\s']", "", match.group()).rstrip(".,")
+        if "," in text and "." in text:
+            # Whichever separator comes last is the decimal point
+            if text.rfind(",") > text.rfind("."):
+                text = text.replace(".", "").replace(",", ".")
+            else:
+                text = text.replace(",", "")
+        elif "," in text:
+            whole, _, fraction = text.rpartition(",")
+            text = f"{whole.replace(',', '')}.{fraction}" if len(fraction) != 3 else text.replace(",", "")
+        elif text.count(".") > 1:
+            text = text.replace(".", "")
+    try:
+        price = Decimal(text).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+    return price if 0 <= price <= MAX_PRICE else None
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _text(value: Any) -> Optional[str]:
+    """Flatten JSON-LD values like {"@type": "Brand", "name": "X"} to text"""
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("url") or value.get("@id")
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _json_ld_nodes(data: Any) -> Iterable[Dict[str, Any]]:
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _json_ld_nodes(data["@graph"])
+
+
+def _is_product(node: Dict[str, Any]) -> bool:
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(str(t).split("/")[-1] in ("Product", "ProductGroup") for t in types if t)
+
+
+def from_json_ld(tree) -> Dict[str, Any]:
+    for script in tree.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text or "", strict=False)
+        except ValueError:
+            continue
+        for node in _json_ld_nodes(data):
+            if not _is_product(node):
+                continue
+            offers = _first(node.get("offers")) or {}
+            if isinstance(offers, dict) and "price" not in offers:
+                # AggregateOffer
+                offers = {"price": offers.get("lowPrice"), **offers}
+            return {
+                "external_id": _text(node.get("sku") or node.get("productID") or node.get("mpn")),
+                "name": _text(node.get("name")),
+                "category": _text(node.get("category")),
+                "brand": _text(node.get("brand")),
+                "price": parse_price(offers.get("price")) if isinstance(offers, dict) else None,
+                "image_url": _text(node.get("image")),
+            }
+    return {}
+
+
+def from_microdata(tree) -> Dict[str, Any]:
+    scopes = tree.xpath('//*[@itemscope][contains(@itemtype, "schema.org/Product")]')
+    if not scopes:
+        return {}
+    scope = scopes[0]
+
+    def prop(name: str) -> Optional[str]:
+        for element in scope.xpath(f'.//*[@itemprop="{name}"]'):
+            value = (
+                element.get("content")
+                or element.get("src")
+                or element.get("href")
+                or element.text_content()
+            )
+            if value and value.strip():
+                return value.strip()
+        return None
+
+    return {
+        "external_id": prop("sku") or prop("productID") or prop("mpn"),
+        "name": prop("name"),
+        "category": prop("category"),
+        "brand": prop("brand"),
+        "price": parse_price(prop("price") or prop("lowPrice")),
+        "image_url": prop("image"),
+    }
+
+
+def from_open_graph(tree) -> Dict[str, Any]:
+    meta = {}
+    for element in tree.xpath("//meta[@property or @name][@content]"):
+        key = (element.get("property") or element.get("name")).lower()
+        meta.setdefault(key, element.get("content").strip())
+    if not meta:
+        return {}
+    return {
+        "external_id": meta.get("product:retailer_item_id"),
+        "name": meta.get("og:title"),
+        "category": meta.get("product:category"),
+        "brand": meta.get("product:brand") or meta.get("og:brand"),
+        "price": parse_price(meta.get("product:price:amount") or meta.get("og:price:amount")),
+        "image_url": meta.get("og:image"),
+    }
+
+
+def from_selectors(tree, selectors: Dict[str, str]) -> Dict[str, Any]:
+    """Per-domain overrides: field -> CSS selector, or XPath if it starts with / or ("""
+    result = {}
+    for field, selector in selectors.items():
+        if field not in PRODUCT_FIELDS:
+            continue
+        try:
+            if selector.startswith(("/", "(")):
+                matches = tree.xpath(selector)
+            else:
+                matches = tree.cssselect(selector)
+        except Exception as e:
+            logger.warning(f"Bad selector for {field}: {selector}: {str(e)}")
+            continue
+        for match in matches:
+            if isinstance(match, str):
+                value = match
+            else:
+                value = match.get("content") or match.get("src") or match.text_content()
+            if value and value.strip():
+                value = value.strip()
+                result[field] = parse_price(value) if field == "price" else value
+                break
+    return result
+
+
+def extract_product(html: str, url: str, selectors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Product fields from a page; selectors win over JSON-LD, then microdata,
+    then OpenGraph, field by field"""
+    try:
+        tree = lxml_html.fromstring(html.encode("utf-8"), parser=HTML_PARSER, base_url=url)
+    except (etree.ParserError, ValueError):
+        return {}
+    tree.make_links_absolute(url, resolve_base_href=True)
+
+    result: Dict[str, Any] = {}
+    sources = [from_selectors(tree, selectors)] if selectors else []
+    sources += [from_json_ld(tree), from_microdata(tree), from_open_graph(tree)]
+    for source in sources:
+        for field in PRODUCT_FIELDS:
+            if result.get(field) is None and source.get(field) is not None:
+                result[field] = source[field]
+    if result.get("image_url"):
+        # JSON-LD URLs aren't covered by make_links_absolute
+        result["image_url"] = urljoin(url, result["image_url"])
+    return result
+
+
+def extract_batch(
+    pages: List[Tuple[str, str, Optional[Dict[str, str]]]]
+) -> List[Dict[str, Any]]:
+    """Process-pool entry point: one call per batch keeps pickling overhead
+    per page low"""
+    results = []
+    for html, url, selectors in pages:
+        try:
+            results.append(extract_product(html, url, selectors))
+        except Exception as e:
+            logger.error(f"Error extracting {url}: {str(e)}")
+            results.append({})
+    return results
+
+
+def extract_rows(
+    rows: List[Tuple[int, str, str, Optional[Dict[str, str]]]]
+) -> List[Dict[str, Any]]:
+    """extract_batch for (product id, html, url, selectors) rows, so
+    extract_pending gets the row id back with each result"""
+    return extract_batch([(html, url, selectors) for _, html, url, selectors in rows])
+
+
+class ProductExtractor(IDataExtractor):
+    """Fills in product details for pending product rows.
+
+    Pages are fetched concurrently on the event loop (static HTTP, falling
+    back to the browser if one is given), parsed in batches in the shared
+    process pool through ConcurrentManager (HTML passed through shared
+    memory), and written back in batches of updates with a status of
+    "extracted" or "failed". Given a url_cache, each fetch's validators are
+    stored, and re-extracting rows that are no longer pending skips pages
+    a conditional fetch finds unchanged. Given a page_store, fetched pages
+    are kept for replaying.
+    """
+
+    def __init__(
+        self,
+        product_repo: ProductRepository,
+        fetcher: Optional[StaticFetcher] = None,
+        browser_manager: Optional[IBrowserManager] = None,
+        domain_selectors: Optional[Dict[str, Dict[str, str]]] = None,
+        max_workers: Optional[int] = None,
+        parse_batch_size: int = 16,
+        write_batch_size: int = 100,
+        max_concurrent_fetches: int = 16,
+        url_cache: Optional[URLCache] = None,
+        page_store: Optional[PageStore] = None,
+    ):
+        self.product_repo = product_repo
+        self.url_cache = url_cache
+        self.page_store = page_store
+        self.fetcher = fetcher or StaticFetcher()
+        self.browser_manager = browser_manager
+        self.domain_selectors = domain_selectors or {}
+        self.parse_batch_size = parse_batch_size
+        self.concurrent_manager = get_backend("ConcurrentManager")(
+            max_workers=max_workers, batch_size=parse_batch_size
+        )
+        self.write_batch_size = write_batch_size
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self._browser_ready = False
+
+    async def get_selectors(self, domain: str) -> Dict[str, str]:
+        return self.domain_selectors.get(domain, {})
+
+    async def extract_product_data(self, page, url: str) -> Dict[str, Any]:
+        """Extract from a browser page or an HTML string in the process pool"""
+        html = page if isinstance(page, str) else await page.content()
+        selectors = await self.get_selectors(urlsplit(url).netloc)
+        results = await self.concurrent_manager.run(extract_batch, [(html, url, selectors)])
+        return results[0]
+
+    async def _fetch_html(
+        self, url: str, domain: str, revalidate: bool = False
+    ) -> Tuple[Optional[str], bool]:
+        """Page HTML, and whether a conditional fetch found it unchanged
+        (then without HTML)"""
+        validators = None
+        if revalidate and self.url_cache is not None:
+            validators = (await self.url_cache.validators([url])).get(url)
+        page = await self.fetcher.fetch(
+            url,
+            etag=validators and validators.etag,
+            last_modified=validators and validators.last_modified,
+        )
+
+        if page is not None and page.status < 400 and self.url_cache is not None:
+            fetched = PageValidators(page.etag, page.last_modified, page.content_hash)
+            unchanged = False
+            if validators is not None:
+                unchanged = validators.unchanged(page.status, page.content_hash)
+                fetched = validators.refreshed(fetched)
+            await self.url_cache.cache_url(url, domain, fetched)
+            if unchanged:
+                return None, True
+
+        if page is not None and page.status < 400 and page.html.strip():
+            await self._store_page(url, domain, page.html)
+            return page.html, False
+        if self.browser_manager is None:
+            return None, False
+
+        if not self._browser_ready:
+            await self.browser_manager.setup()
+            self._browser_ready = True
+        async with self.browser_manager.page() as browser_page:
+            await self.browser_manager.navigate(browser_page, url, domain)
+            html = await browser_page.content()
+        await self._store_page(url, domain, html)
+        return html, False
+
+    async def _store_page(self, url: str, domain: str, html: str) -> None:
+        if self.page_store is None or not html:
+            return
+        try:
+            await asyncio.to_thread(self.page_store.put_page, url, domain, html, PRODUCT_PAGE)
+        except OSError as e:
+            logger.error(f"Error storing product page {url}: {str(e)}")
+
+    async def extract_pending(
+        self,
+        domains: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        status: str = PENDING,
+    ) -> Dict[str, int]:
+        """Extract details for products with the given status (pending by
+        default; "extracted" refreshes them), returning status counts"""
+        counts = {EXTRACTED: 0, FAILED: 0, UNCHANGED: 0}
+        # Pending rows have never been extracted, whatever their validators say
+        revalidate = status != PENDING
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrent_fetches * 2)
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=self.parse_batch_size * 2)
+        parsed: asyncio.Queue = asyncio.Queue(maxsize=self.write_batch_size * 2)
+
+        async def produce():
+            async for product in self.product_repo.iter_products_by_status(
+                status, domains=domains, limit=limit
+            ):
+                await queue.put(product)
+            for _ in range(self.max_concurrent_fetches):
+                await queue.put(None)
+
+        async def fetch():
+            while True:
+                product = await queue.get()
+                if product is None:
+                    break
+                product_id, url, domain = product
+                try:
+                    html, unchanged = await self._fetch_html(url, domain, revalidate)
+                except Exception as e:
+                    logger.error(f"Error fetching product page {url}: {str(e)}")
+                    html, unchanged = None, False
+                if unchanged:
+                    counts[UNCHANGED] += 1
+                    continue
+                if html is None:
+                    await parsed.put((product_id, {}))
+                    continue
+                await fetched.put((product_id, html, url, await self.get_selectors(domain)))
+
+        async def fetched_rows():
+            while True:
+                row = await fetched.get()
+                if row is None:
+                    return
+                yield row
+
+        async def parse():
+            # Batches are parsed while fetchers keep waiting on the network; a
+            # failed batch (even a broken pool) only fails its own products
+            async for result in self.concurrent_manager.stream_map(
+                extract_rows,
+                fetched_rows(),
+                ordered=False,
+                per_batch=True,
+                batch_size=self.parse_batch_size,
+            ):
+                product_id, _, url, _ = result.item
+                if result.error is not None:
+                    logger.error(f"Error parsing product page {url}: {str(result.error)}")
+                    await parsed.put((product_id, {}))
+                else:
+                    await parsed.put((product_id, result.value))
+            await parsed.put(None)
+
+        async def write():
+            updates: List[Dict[str, Any]] = []
+            while True:
+                item = await parsed.get()
+                if item is not None:
+                    product_id, result = item
+                    fields = {field: value for field, value in result.items() if value is not None}
+                    outcome = EXTRACTED if fields.get("name") or fields.get("price") else FAILED
+                    counts[outcome] += 1
+                    updates.append({"id": product_id, "status": outcome, **fields})
+                if updates and (item is None or len(updates) >= self.write_batch_size):
+                    await self.product_repo.update_products(updates)
+                    updates = []
+                if item is None:
+                    return
+
+        async def fetchers():
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(self.max_concurrent_fetches):
+                    tg.create_task(fetch())
+            await fetched.put(None)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(produce())
+            tg.create_task(fetchers())
+            tg.create_task(parse())
+            tg.create_task(write())
+
+        logger.info(
+            f"Extracted {counts[EXTRACTED]} products, {counts[FAILED]} failed, "
+            f"{counts[UNCHANGED]} unchanged"
+            + (f" for {domains}" if domains else "")
+        )
+        return counts
+
+    async def close(self) -> None:
+        # The process pool is shared and outlives the extractor
+        await self.concurrent_manager.cleanup()
+        await self.fetcher.cleanup()
+        if self.url_cache is not None:
+            await self.url_cache.close()
+        if self._browser_ready:
+            await self.browser_manager.cleanup()
+            self._browser_ready = False
@@ -0,0 +1,252 @@
+import os
+import re
+from dataclasses import replace
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import TYPE_CHECKING, Dict, Optional
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.accelerator import URLScorer
+    from app.cache.url_cache import URLCache
+    from app.crawler.base import EcommerceCrawler
+    from app.crawler.browser_manager import NavigationProfile
+    from app.crawler.checkpoint import CrawlCheckpoint
+    from app.crawler.extractor import ProductExtractor
+    from app.crawler.fingerprints import FingerprintSet
+    from app.crawler.interfaces import IFrontier
+    from app.crawler.page_store import PageStore
+    from app.crawler.url_processor import URLProcessor
+    from app.profiling import CrawlProfiler
+
+
+@lru_cache(maxsize=1)
+def get_url_scorer() -> Optional["URLScorer"]:
+    """Load the URL scorer on first crawl; None until a model has been trained"""
+    if not settings.URL_SCORER_MODEL_PATH or not os.path.exists(
+        settings.URL_SCORER_MODEL_PATH
+    ):
+        return None
+    from app.accelerator import get_backend
+
+    return get_backend("URLScorer").load_if_exists(settings.URL_SCORER_MODEL_PATH)
+
+
+def _navigation_profile() -> "NavigationProfile":
+    from app.crawler.browser_manager import NavigationProfile
+
+    if settings.BROWSER_BLOCK_RESOURCES:
+        return NavigationProfile(wait_until=settings.BROWSER_WAIT_UNTIL)
+    return NavigationProfile(
+        blocked_resource_types=frozenset(),
+        blocked_hosts=(),
+        wait_until=settings.BROWSER_WAIT_UNTIL,
+    )
+
+
+def _domain_navigation_profiles(
+    default: "NavigationProfile",
+) -> Dict[str, "NavigationProfile"]:
+    """BROWSER_DOMAIN_PROFILES as profiles; unset fields keep the default's"""
+    profiles = {}
+    for domain, overrides in settings.BROWSER_DOMAIN_PROFILES.items():
+        overrides = dict(overrides)
+        if "blocked_resource_types" in overrides:
+            overrides["blocked_resource_types"] = frozenset(overrides["blocked_resource_types"])
+        if "blocked_hosts" in overrides:
+            overrides["blocked_hosts"] = tuple(overrides["blocked_hosts"])
+        try:
+            profiles[domain] = replace(default, **overrides)
+        except TypeError as e:
+            raise ValueError(f"Invalid BROWSER_DOMAIN_PROFILES entry for {domain}: {e}")
+    return profiles
+
+
+def build_crawler(
+    main_db: async_sessionmaker[AsyncSession],
+    cache_db: async_sessionmaker[AsyncSession],
+    **options,
+) -> "EcommerceCrawler":
+    """Assemble a crawler from settings plus per-request options.
+
+    The crawler stack (aiohttp, lxml, psutil, Playwright) is imported here
+    rather than at module load so API workers start without paying for it.
+    """
+    from app.crawler.base import EcommerceCrawler
+    from app.crawler.browser_manager import PlaywrightManager
+    from app.db.repositories.product import ProductRepository
+
+    page_store = get_page_store() if options.pop("store_pages", False) else None
+    extractor = None
+    if options.pop("extract_products", False):
+        extractor = build_extractor(main_db, cache_db, page_store)
+
+    profile = _navigation_profile()
+    return EcommerceCrawler(
+        url_processor=build_url_processor(),
+        browser_manager=PlaywrightManager(
+            pool_size=settings.BROWSER_POOL_SIZE,
+            max_navigations_per_page=settings.BROWSER_MAX_NAVIGATIONS_PER_PAGE,
+            max_rss_mb=settings.BROWSER_MAX_RSS_MB,
+            profile=profile,
+            domain_profiles=_domain_navigation_profiles(profile),
+        ),
+        product_repo=ProductRepository(main_db),
+        url_cache=_build_url_cache(cache_db),
+        burst=settings.CRAWL_BURST,
+        sitemap_min_products=settings.SITEMAP_MIN_PRODUCTS,
+        sitemap_max_files=settings.SITEMAP_MAX_FILES,
+        write_batch_size=settings.PRODUCT_WRITE_BATCH_SIZE,
+        write_max_age=settings.PRODUCT_WRITE_MAX_AGE,
+        url_scorer=get_url_scorer(),
+        extractor=extractor,
+        page_store=page_store,
+        **options,
+    )
+
+
+def build_url_processor() -> "URLProcessor":
+    """URL processor classifying with URL_DOMAIN_RULES where a domain has them;
+    pattern lists a domain leaves out keep the default rules"""
+    from app.crawler.url_classifier import DEFAULT_RULES
+    from app.crawler.url_processor import URLProcessor
+
+    domain_rules = {}
+    for domain, overrides in settings.URL_DOMAIN_RULES.items():
+        try:
+            rules = replace(
+                DEFAULT_RULES,
+                **{field: tuple(patterns) for field, patterns in overrides.items()},
+            )
+            for patterns in (
+                rules.product_patterns,
+                rules.category_patterns,
+                rules.excluded_patterns,
+                rules.listing_patterns,
+            ):
+                for pattern in patterns:
+                    re.compile(pattern)
+        except (TypeError, re.error) as e:
+            raise ValueError(f"Invalid URL_DOMAIN_RULES entry for {domain}: {e}")
+        domain_rules[domain] = rules
+    return URLProcessor(domain_rules=domain_rules)
+
+
+def _build_url_cache(cache_db: async_sessionmaker[AsyncSession]) -> "URLCache":
+    from app.cache.url_cache import URLCache
+
+    return URLCache(
+        cache_db,
+        max_entries=settings.URL_CACHE_MAX_ENTRIES,
+        flush_interval=settings.URL_CACHE_FLUSH_INTERVAL,
+        flush_batch_size=settings.URL_CACHE_FLUSH_BATCH_SIZE,
+        default_ttl=settings.URL_CACHE_DEFAULT_TTL,
+        domain_ttls=settings.URL_CACHE_DOMAIN_TTLS,
+    )
+
+
+def build_extractor(
+    main_db: async_sessionmaker[AsyncSession],
+    cache_db: Optional[async_sessionmaker[AsyncSession]] = None,
+    page_store: Optional["PageStore"] = None,
+) -> "ProductExtractor":
+    """Product detail extractor; with cache_db, page validators are kept
+    in the URL cache for conditional refreshes, and with page_store the
+    fetched pages are kept for replaying"""
+    from app.crawler.extractor import ProductExtractor
+    from app.db.repositories.product import ProductRepository
+
+    return ProductExtractor(
+        ProductRepository(main_db),
+        domain_selectors=settings.EXTRACTOR_DOMAIN_SELECTORS,
+        max_workers=settings.EXTRACTOR_MAX_WORKERS,
+        parse_batch_size=settings.EXTRACTOR_PARSE_BATCH_SIZE,
+        write_batch_size=settings.EXTRACTOR_WRITE_BATCH_SIZE,
+        max_concurrent_fetches=settings.EXTRACTOR_MAX_CONCURRENT_FETCHES,
+        url_cache=_build_url_cache(cache_db) if cache_db is not None else None,
+        page_store=page_store,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_page_store() -> "PageStore":
+    """The page store in PAGE_STORE_DIR, opened once and shared by every
+    crawl in the process, as it allows a single writer"""
+    from app.crawler.page_store import PageStore
+
+    return PageStore(
+        settings.PAGE_STORE_DIR,
+        segment_size=settings.PAGE_STORE_SEGMENT_MB * 1024 * 1024,
+        compression_level=settings.PAGE_STORE_COMPRESSION_LEVEL,
+    )
+
+
+def build_frontier() -> "IFrontier":
+    """Shared frontier for coordinator/worker crawls, from FRONTIER_URL"""
+    from app.crawler.frontier import create_frontier
+
+    return create_frontier(
+        settings.FRONTIER_URL,
+        lease_ttl=settings.FRONTIER_LEASE_TTL,
+        prefix=settings.FRONTIER_KEY_PREFIX,
+    )
+
+
+def checkpoint_path(job_id: str) -> Optional[str]:
+    if not settings.CRAWL_CHECKPOINT_DIR:
+        return None
+    return os.path.join(settings.CRAWL_CHECKPOINT_DIR, f"{job_id}.jsonl")
+
+
+def build_checkpoint(job_id: str) -> Optional["CrawlCheckpoint"]:
+    """Journal for a crawl job, or None when checkpointing is disabled"""
+    from app.crawler.checkpoint import CrawlCheckpoint
+
+    path = checkpoint_path(job_id)
+    if path is None:
+        return None
+    return CrawlCheckpoint(
+        path,
+        interval=settings.CRAWL_CHECKPOINT_INTERVAL,
+        compact_records=settings.CRAWL_CHECKPOINT_COMPACT_RECORDS,
+    )
+
+
+def build_profiler(job_id: str) -> "CrawlProfiler":
+    """Profiler writing a crawl job's artifacts to CRAWL_PROFILE_DIR/<job_id>"""
+    from app.profiling import CrawlProfiler
+
+    return CrawlProfiler(
+        os.path.join(settings.CRAWL_PROFILE_DIR, job_id),
+        sample_interval=settings.CRAWL_PROFILE_SAMPLE_INTERVAL,
+        top=settings.CRAWL_PROFILE_TOP,
+    )
+
+
+def fingerprint_path(job_id: str) -> Optional[str]:
+    if not settings.CRAWL_FINGERPRINT_PATH:
+        return None
+    return settings.CRAWL_FINGERPRINT_PATH.format(job_id=job_id)
+
+
+def build_seen_store(job_id: str, resuming: bool = False) -> Optional["FingerprintSet"]:
+    """Fingerprint seen-set for a crawl job, opened at CRAWL_FINGERPRINT_PATH
+    so other processes can share it.
+
+    A resumed job with a checkpoint starts its own table afresh: the table
+    is written as URLs are pushed but the journal only every interval, so
+    after a crash it can hold URLs the journal never queued, and restoring
+    the journal rebuilds it."""
+    from app.crawler.fingerprints import FingerprintSet
+
+    if not settings.CRAWL_FINGERPRINT_STORE:
+        return None
+    path = fingerprint_path(job_id)
+    if path is None:
+        return FingerprintSet(capacity=settings.CRAWL_FINGERPRINT_CAPACITY)
+    per_job = path != settings.CRAWL_FINGERPRINT_PATH
+    if resuming and per_job and checkpoint_path(job_id) is not None:
+        for stale in (path, f"{path}.grow"):
+            if os.path.exists(stale):
+                os.remove(stale)
+    return FingerprintSet(path, capacity=settings.CRAWL_FINGERPRINT_CAPACITY, shared=True)
@@ -0,0 +1,247 @@
+import fcntl
+import logging
+from array import array
+import mmap
+import os
+import struct
+import tempfile
+import xxhash
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FPSET001"
+HEADER = struct.Struct("<8sQQ")  # magic, capacity, count
+HEADER_SIZE = 64  # keeps the slot array 8-byte aligned with room to spare
+EMPTY = 0
+
+
+def fingerprint(url: str) -> int:
+    """64-bit xxhash of a URL; 0 marks empty slots so it is remapped"""
+    return xxhash.xxh64_intdigest(url) or 1
+
+
+class FingerprintSet:
+    """Seen-set of 64-bit URL fingerprints in a memory-mapped hash table.
+
+    Slots are uint64 fingerprints with linear probing, so a URL costs
+    8 / max_load bytes of page cache instead of a Python string in a set,
+    and the table survives restarts when backed by a file. A fingerprint
+    collision makes a new URL look seen with probability about
+    count / 2**64 per lookup.
+
+    A file-backed table grows by building the larger table in a new file
+    and renaming it over the old one, so a crash leaves one or the other.
+    With shared=True every operation holds an flock on the file, so
+    several processes can map the same table; a process notices that
+    another one grew the table when the path names a new file, and reopens.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 1 << 16,
+        max_load: float = 0.7,
+        shared: bool = False,
+    ):
+        if path is None:
+            # Anonymous store: an unlinked temp file, gone once closed
+            self._fd, path = tempfile.mkstemp(prefix="fingerprints-", suffix=".fp")
+            os.unlink(path)
+            self._temporary = True
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._temporary = False
+
+        self.path = path
+        self.max_load = max_load
+        self.shared = shared
+        self._mmap: Optional[mmap.mmap] = None
+        self._slots: Optional[memoryview] = None
+        self._closed_stats: Optional[Dict[str, Any]] = None
+        self.capacity = 0
+
+        with self._locked():
+            if os.fstat(self._fd).st_size < HEADER_SIZE:
+                self._initialize(_power_of_two(capacity))
+            self._map()
+
+    def _initialize(self, capacity: int) -> None:
+        os.ftruncate(self._fd, HEADER_SIZE + capacity * 8)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, capacity, 0), 0)
+
+    def _map(self) -> None:
+        self._unmap()
+        self._mmap = mmap.mmap(self._fd, 0)
+        magic, capacity, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a fingerprint store")
+        if len(self._mmap) < HEADER_SIZE + capacity * 8:
+            raise ValueError(f"{self.path} is truncated: expected {capacity} slots")
+        self.capacity = capacity
+        self._slots = memoryview(self._mmap)[HEADER_SIZE:].cast("Q")
+
+    def _unmap(self) -> None:
+        if self._slots is not None:
+            self._slots.release()
+            self._slots = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if not self.shared:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            while self._mmap is not None and self._replaced():
+                # Another process grew the table into a new file
+                os.close(self._fd)
+                self._fd = os.open(self.path, os.O_RDWR)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                self._map()
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _replaced(self) -> bool:
+        return os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+
+    def _header(self):
+        return HEADER.unpack_from(self._mmap, 0)
+
+    def __len__(self) -> int:
+        return self._header()[2]
+
+    def _set_count(self, count: int) -> None:
+        HEADER.pack_into(self._mmap, 0, MAGIC, self.capacity, count)
+
+    def _probe(self, fp: int) -> int:
+        """Slot holding fp, or the empty slot where it would go"""
+        slots = self._slots
+        mask = self.capacity - 1
+        index = fp & mask
+        while True:
+            value = slots[index]
+            if value == fp or value == EMPTY:
+                return index
+            index = (index + 1) & mask
+
+    def __contains__(self, url: str) -> bool:
+        fp = fingerprint(url)
+        with self._locked():
+            return self._slots[self._probe(fp)] == fp
+
+    def add(self, url: str) -> bool:
+        """Insert url, returning False if it was already present"""
+        return self._add(fingerprint(url))
+
+    def add_many(self, urls: Iterable[str]) -> int:
+        """Insert urls under one lock, returning how many were new"""
+        with self._locked():
+            return sum(self._add_unlocked(fingerprint(url)) for url in urls)
+
+    def add_fingerprints(self, fps: Iterable[int]) -> int:
+        """Insert precomputed fingerprints, returning how many were new"""
+        with self._locked():
+            return sum(self._add_unlocked(fp or 1) for fp in fps)
+
+    def dump(self) -> array:
+        """Copy of the slot array, empty slots included; a plain memory copy,
+        cheap enough to take on the event loop"""
+        slots = array("Q")
+        with self._locked():
+            slots.frombytes(self._mmap[HEADER_SIZE : HEADER_SIZE + self.capacity * 8])
+        return slots
+
+    def _add(self, fp: int) -> bool:
+        with self._locked():
+            return self._add_unlocked(fp)
+
+    def _add_unlocked(self, fp: int) -> bool:
+        index = self._probe(fp)
+        if self._slots[index] == fp:
+            return False
+        count = len(self) + 1
+        if count > self.capacity * self.max_load:
+            self._grow()
+            index = self._probe(fp)
+        self._slots[index] = fp
+        self._set_count(count)
+        return True
+
+    def _grow(self) -> None:
+        """Double the table and reinsert every fingerprint"""
+        # array keeps the copy at 8 bytes per fingerprint
+        existing = array("Q", (value for value in self._slots if value != EMPTY))
+        capacity = self.capacity * 2
+        logger.info(
+            f"Growing fingerprint store {self.path} to {capacity} slots "
+            f"({len(existing)} fingerprints)"
+        )
+        self._unmap()
+        if self._temporary:
+            # Nothing survives a crash anyway, so rebuild in place
+            os.ftruncate(self._fd, HEADER_SIZE)
+            old_fd = None
+        else:
+            # Build the new table beside the old one; the old file stays
+            # intact until the rename
+            tmp_path = f"{self.path}.grow"
+            old_fd, self._fd = self._fd, os.open(
+                tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644
+            )
+            if self.shared:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._initialize(capacity)
+        self._map()
+
+        mask = capacity - 1
+        slots = self._slots
+        for fp in existing:
+            index = fp & mask
+            while slots[index] != EMPTY:
+                index = (index + 1) & mask
+            slots[index] = fp
+        self._set_count(len(existing))
+
+        if old_fd is not None:
+            self._mmap.flush()
+            os.fsync(self._fd)
+            os.replace(tmp_path, self.path)
+            os.close(old_fd)  # also drops its lock; the new file is locked
+
+    def stats(self) -> Dict[str, Any]:
+        if self._closed_stats is not None:
+            return self._closed_stats
+        count = len(self)
+        return {
+            "path": None if self._temporary else self.path,
+            "count": count,
+            "capacity": self.capacity,
+            "load_factor": round(count / self.capacity, 4),
+            "bytes": HEADER_SIZE + self.capacity * 8,
+            "bytes_per_url": round((HEADER_SIZE + self.capacity * 8) / max(count, 1), 2),
+            # Chance that an unseen URL hashes onto a stored fingerprint
+            "false_positive_rate": count / 2**64,
+        }
+
+    def flush(self) -> None:
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        if self._closed_stats is not None:
+            return
+        self._closed_stats = self.stats()
+        self.flush()
+        self._unmap()
+        os.close(self._fd)
+
+
+def _power_of_two(n: int) -> int:
+    return 1 << max(n - 1, 1).bit_length()
@@ -0,0 +1,521 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from app.crawler.interfaces import IFrontier
+from app.crawler.scheduler import CrawlScheduler
+
+logger = logging.getLogger(__name__)
+
+FrontierItem = Tuple[str, int]  # (url, depth)
+
+
+@dataclass
+class FrontierLease:
+    """A batch of one domain's URLs checked out to a worker"""
+
+    lease_id: str
+    worker_id: str
+    domain: str
+    items: List[FrontierItem]
+    expires_at: float = field(default=0.0)
+
+
+def _new_lease_id() -> str:
+    return uuid.uuid4().hex
+
+
+class MemoryFrontier(IFrontier):
+    """In-process frontier for single-node crawls and tests"""
+
+    def __init__(self, lease_ttl: float = 60.0):
+        self.lease_ttl = lease_ttl
+        self._pending: Dict[str, Deque[FrontierItem]] = defaultdict(deque)
+        self._seen: Set[str] = set()
+        self._done: Dict[str, int] = defaultdict(int)
+        self._domain_leases: Dict[str, str] = {}
+        self._leases: Dict[str, FrontierLease] = {}
+        self._order: Deque[str] = deque()
+
+    async def push(self, domain: str, items: List[FrontierItem]) -> int:
+        if domain not in self._pending:
+            self._order.append(domain)
+        queued = 0
+        for url, depth in items:
+            if url in self._seen:
+                continue
+            self._seen.add(url)
+            self._pending[domain].append((url, depth))
+            queued += 1
+        return queued
+
+    async def lease(self, worker_id: str, batch_size: int) -> Optional[FrontierLease]:
+        await self.requeue_expired()
+        for _ in range(len(self._order)):
+            domain = self._order[0]
+            self._order.rotate(-1)
+            pending = self._pending[domain]
+            if not pending or domain in self._domain_leases:
+                continue
+
+            items = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+            lease = FrontierLease(
+                _new_lease_id(), worker_id, domain, items, time.time() + self.lease_ttl
+            )
+            self._leases[lease.lease_id] = lease
+            self._domain_leases[domain] = lease.lease_id
+            return lease
+        return None
+
+    async def complete(self, lease: FrontierLease) -> bool:
+        if self._leases.pop(lease.lease_id, None) is None:
+            return False
+        del self._domain_leases[lease.domain]
+        self._done[lease.domain] += len(lease.items)
+        return True
+
+    async def heartbeat(self, worker_id: str) -> None:
+        expires_at = time.time() + self.lease_ttl
+        for lease in self._leases.values():
+            if lease.worker_id == worker_id:
+                lease.expires_at = expires_at
+
+    async def requeue_expired(self) -> int:
+        now = time.time()
+        expired = [lease for lease in self._leases.values() if lease.expires_at <= now]
+        for lease in expired:
+            del self._leases[lease.lease_id]
+            del self._domain_leases[lease.domain]
+            self._pending[lease.domain].extendleft(reversed(lease.items))
+            logger.warning(
+                f"Lease {lease.lease_id} of {lease.worker_id} expired, "
+                f"requeued {len(lease.items)} URLs for {lease.domain}"
+            )
+        return sum(len(lease.items) for lease in expired)
+
+    async def is_drained(self) -> bool:
+        return not self._leases and not any(self._pending.values())
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        leased: Dict[str, int] = defaultdict(int)
+        for lease in self._leases.values():
+            leased[lease.domain] += len(lease.items)
+        return {
+            domain: {
+                "pending": len(self._pending[domain]),
+                "leased": leased[domain],
+                "done": self._done[domain],
+            }
+            for domain in self._order
+        }
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteFrontier(IFrontier):
+    """Frontier in a SQLite file, shared by worker processes on one host.
+
+    Leasing runs in a BEGIN IMMEDIATE transaction so concurrent workers
+    serialize on the database lock rather than double-leasing a domain.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS frontier_urls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            domain TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            depth INTEGER NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            lease_id TEXT
+        );
+        CREATE INDEX IF NOT EXISTS ix_frontier_urls_domain_state
+            ON frontier_urls (domain, state, id);
+        CREATE INDEX IF NOT EXISTS ix_frontier_urls_lease ON frontier_urls (lease_id);
+        CREATE TABLE IF NOT EXISTS frontier_domains (
+            domain TEXT PRIMARY KEY,
+            last_leased REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS frontier_leases (
+            lease_id TEXT PRIMARY KEY,
+            worker_id TEXT NOT NULL,
+            domain TEXT NOT NULL UNIQUE,
+            expires_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, lease_ttl: float = 60.0):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self._conn = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    async def _run(self, func, *args) -> Any:
+        return await asyncio.to_thread(self._locked, func, *args)
+
+    def _locked(self, func, *args) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(*args)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    async def push(self, domain: str, items: List[FrontierItem]) -> int:
+        return await self._run(self._push, domain, items)
+
+    def _push(self, domain: str, items: List[FrontierItem]) -> int:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO frontier_domains (domain) VALUES (?)", (domain,)
+        )
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO frontier_urls (domain, url, depth) VALUES (?, ?, ?)",
+            [(domain, url, depth) for url, depth in items],
+        )
+        return self._conn.total_changes - before
+
+    async def lease(self, worker_id: str, batch_size: int) -> Optional[FrontierLease]:
+        return await self._run(self._lease, worker_id, batch_size)
+
+    def _lease(self, worker_id: str, batch_size: int) -> Optional[FrontierLease]:
+        self._requeue_expired()
+        row = self._conn.execute(
+            """
+            SELECT d.domain FROM frontier_domains d
+            WHERE NOT EXISTS (SELECT 1 FROM frontier_leases l WHERE l.domain = d.domain)
+              AND EXISTS (
+                SELECT 1 FROM frontier_urls u
+                WHERE u.domain = d.domain AND u.state = 'pending'
+              )
+            ORDER BY d.last_leased
+            LIMIT 1
+            """
+        ).fetchone()
+        if row is None:
+            return None
+
+        domain = row[0]
+        rows = self._conn.execute(
+            "SELECT id, url, depth FROM frontier_urls "
+            "WHERE domain = ? AND state = 'pending' ORDER BY id LIMIT ?",
+            (domain, batch_size),
+        ).fetchall()
+        now = time.time()
+        lease = FrontierLease(
+            _new_lease_id(),
+            worker_id,
+            domain,
+            [(url, depth) for _, url, depth in rows],
+            now + self.lease_ttl,
+        )
+        self._conn.executemany(
+            "UPDATE frontier_urls SET state = 'leased', lease_id = ? WHERE id = ?",
+            [(lease.lease_id, row_id) for row_id, _, _ in rows],
+        )
+        self._conn.execute(
+            "INSERT INTO frontier_leases (lease_id, worker_id, domain, expires_at) "
+            "VALUES (?, ?, ?, ?)",
+            (lease.lease_id, worker_id, domain, lease.expires_at),
+        )
+        self._conn.execute(
+            "UPDATE frontier_domains SET last_leased = ? WHERE domain = ?", (now, domain)
+        )
+        return lease
+
+    async def complete(self, lease: FrontierLease) -> bool:
+        return await self._run(self._complete, lease)
+
+    def _complete(self, lease: FrontierLease) -> bool:
+        deleted = self._conn.execute(
+            "DELETE FROM frontier_leases WHERE lease_id = ?", (lease.lease_id,)
+        ).rowcount
+        if not deleted:
+            return False
+        self._conn.execute(
+            "UPDATE frontier_urls SET state = 'done', lease_id = NULL WHERE lease_id = ?",
+            (lease.lease_id,),
+        )
+        return True
+
+    async def heartbeat(self, worker_id: str) -> None:
+        await self._run(
+            lambda: self._conn.execute(
+                "UPDATE frontier_leases SET expires_at = ? WHERE worker_id = ?",
+                (time.time() + self.lease_ttl, worker_id),
+            )
+        )
+
+    async def requeue_expired(self) -> int:
+        return await self._run(self._requeue_expired)
+
+    def _requeue_expired(self) -> int:
+        now = time.time()
+        expired = self._conn.execute(
+            "SELECT lease_id, worker_id, domain FROM frontier_leases WHERE expires_at <= ?",
+            (now,),
+        ).fetchall()
+        requeued = 0
+        for lease_id, worker_id, domain in expired:
+            requeued += self._conn.execute(
+                "UPDATE frontier_urls SET state = 'pending', lease_id = NULL "
+                "WHERE lease_id = ?",
+                (lease_id,),
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM frontier_leases WHERE lease_id = ?", (lease_id,)
+            )
+            logger.warning(f"Lease {lease_id} of {worker_id} expired, requeued {domain}")
+        return requeued
+
+    async def is_drained(self) -> bool:
+        row = await self._run(
+            lambda: self._conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM frontier_urls WHERE state != 'done')"
+            ).fetchone()
+        )
+        return not row[0]
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        rows = await self._run(
+            lambda: self._conn.execute(
+                "SELECT domain, state, COUNT(*) FROM frontier_urls GROUP BY domain, state"
+            ).fetchall()
+        )
+        stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"pending": 0, "leased": 0, "done": 0}
+        )
+        for domain, state, count in rows:
+            stats[domain][state] = count
+        return dict(stats)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._conn.close)
+
+
+# Pops a batch and records its lease in one step, so a worker dying in
+# between can't leave URLs in neither the pending list nor a lease.
+# KEYS: pending list, lease hash, leases zset, worker set, domains zset
+# ARGV: batch size, worker id, domain, lease id, expires at, now
+LEASE_SCRIPT = """
+local items = redis.call('LPOP', KEYS[1], ARGV[1])
+if not items then
+    return nil
+end
+redis.call('HSET', KEYS[2], 'worker_id', ARGV[2], 'domain', ARGV[3], 'items', cjson.encode(items))
+redis.call('ZADD', KEYS[3], ARGV[5], ARGV[4])
+redis.call('SADD', KEYS[4], ARGV[4])
+redis.call('ZADD', KEYS[5], ARGV[6], ARGV[3])
+return items
+"""
+
+
+class RedisFrontier(IFrontier):
+    """Frontier in Redis, shared by crawler workers across machines.
+
+    A domain is leased by setting its lock key with NX and a TTL, so at most
+    one worker crawls a domain at a time; the batch is then popped and its
+    lease recorded atomically by LEASE_SCRIPT. Expiry is tracked in a sorted
+    set of leases; whoever ZREMs an expired lease requeues its URLs, which
+    keeps requeueing exactly-once.
+    """
+
+    def __init__(self, client: Any, lease_ttl: float = 60.0, prefix: str = "frontier"):
+        self.client = client
+        self.lease_ttl = lease_ttl
+        self.prefix = prefix
+        self._lease_script = client.register_script(LEASE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, lease_ttl: float = 60.0, prefix: str = "frontier"):
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url, decode_responses=True), lease_ttl, prefix)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    async def push(self, domain: str, items: List[FrontierItem]) -> int:
+        if not items:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        for url, _ in items:
+            pipe.sadd(self._key("seen"), url)
+        added = await pipe.execute()
+
+        new_items = [item for item, is_new in zip(items, added) if is_new]
+        if new_items:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zadd(self._key("domains"), {domain: 0}, nx=True)
+            pipe.rpush(
+                self._key("pending", domain), *(json.dumps(item) for item in new_items)
+            )
+            await pipe.execute()
+        return len(new_items)
+
+    async def lease(self, worker_id: str, batch_size: int) -> Optional[FrontierLease]:
+        await self.requeue_expired()
+        ttl_ms = int(self.lease_ttl * 1000)
+
+        # Least recently leased domains first
+        for domain in await self.client.zrange(self._key("domains"), 0, -1):
+            if not await self.client.llen(self._key("pending", domain)):
+                continue
+
+            lease_id = _new_lease_id()
+            lock = self._key("lock", domain)
+            if not await self.client.set(lock, lease_id, nx=True, px=ttl_ms):
+                continue
+
+            now = time.time()
+            expires_at = now + self.lease_ttl
+            raw_items = await self._lease_script(
+                keys=[
+                    self._key("pending", domain),
+                    self._key("lease", lease_id),
+                    self._key("leases"),
+                    self._key("worker", worker_id),
+                    self._key("domains"),
+                ],
+                args=[batch_size, worker_id, domain, lease_id, expires_at, now],
+            )
+            if not raw_items:
+                await self.client.delete(lock)
+                continue
+
+            return FrontierLease(
+                lease_id,
+                worker_id,
+                domain,
+                [tuple(json.loads(item)) for item in raw_items],
+                expires_at,
+            )
+        return None
+
+    async def complete(self, lease: FrontierLease) -> bool:
+        if not await self.client.zrem(self._key("leases"), lease.lease_id):
+            return False
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._key("lease", lease.lease_id))
+        pipe.srem(self._key("worker", lease.worker_id), lease.lease_id)
+        pipe.hincrby(self._key("done"), lease.domain, len(lease.items))
+        await pipe.execute()
+        await self._release_lock(lease.domain, lease.lease_id)
+        return True
+
+    async def _release_lock(self, domain: str, lease_id: str) -> None:
+        lock = self._key("lock", domain)
+        if await self.client.get(lock) == lease_id:
+            await self.client.delete(lock)
+
+    async def heartbeat(self, worker_id: str) -> None:
+        expires_at = time.time() + self.lease_ttl
+        ttl_ms = int(self.lease_ttl * 1000)
+        for lease_id in await self.client.smembers(self._key("worker", worker_id)):
+            # xx: don't resurrect a lease that has already been requeued
+            if not await self.client.zadd(
+                self._key("leases"), {lease_id: expires_at}, xx=True, ch=True
+            ):
+                await self.client.srem(self._key("worker", worker_id), lease_id)
+                continue
+            domain = await self.client.hget(self._key("lease", lease_id), "domain")
+            if domain:
+                await self.client.pexpire(self._key("lock", domain), ttl_ms)
+
+    async def requeue_expired(self) -> int:
+        requeued = 0
+        expired = await self.client.zrangebyscore(self._key("leases"), 0, time.time())
+        for lease_id in expired:
+            # Only the worker whose ZREM succeeds requeues the lease
+            if not await self.client.zrem(self._key("leases"), lease_id):
+                continue
+            lease = await self.client.hgetall(self._key("lease", lease_id))
+            if not lease:
+                continue
+            raw_items = json.loads(lease["items"])
+            pipe = self.client.pipeline(transaction=True)
+            if raw_items:
+                pipe.lpush(self._key("pending", lease["domain"]), *reversed(raw_items))
+            pipe.delete(self._key("lease", lease_id))
+            pipe.srem(self._key("worker", lease["worker_id"]), lease_id)
+            await pipe.execute()
+            await self._release_lock(lease["domain"], lease_id)
+            requeued += len(raw_items)
+            logger.warning(
+                f"Lease {lease_id} of {lease['worker_id']} expired, "
+                f"requeued {len(raw_items)} URLs for {lease['domain']}"
+            )
+        return requeued
+
+    async def is_drained(self) -> bool:
+        if await self.client.zcard(self._key("leases")):
+            return False
+        for domain in await self.client.zrange(self._key("domains"), 0, -1):
+            if await self.client.llen(self._key("pending", domain)):
+                return False
+        return True
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        done = await self.client.hgetall(self._key("done"))
+        leased: Dict[str, int] = defaultdict(int)
+        for lease_id in await self.client.zrange(self._key("leases"), 0, -1):
+            lease = await self.client.hgetall(self._key("lease", lease_id))
+            if lease:
+                leased[lease["domain"]] += len(json.loads(lease["items"]))
+        return {
+            domain: {
+                "pending": await self.client.llen(self._key("pending", domain)),
+                "leased": leased[domain],
+                "done": int(done.get(domain, 0)),
+            }
+            for domain in await self.client.zrange(self._key("domains"), 0, -1)
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_frontier(url: str, lease_ttl: float = 60.0, prefix: str = "frontier") -> IFrontier:
+    """Build a frontier from memory://, sqlite:///path or redis[s]://host URLs"""
+    if url.startswith("memory://"):
+        return MemoryFrontier(lease_ttl)
+    if url.startswith("sqlite:///"):
+        return SQLiteFrontier(url[len("sqlite:///") :], lease_ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisFrontier.from_url(url, lease_ttl, prefix)
+    raise ValueError(f"Unsupported frontier URL: {url}")
+
+
+class LeaseScheduler(CrawlScheduler):
+    """Crawls one lease's URLs and collects the links found on them.
+
+    Newly discovered URLs go to `outbox` for the shared frontier instead of
+    the local queue, so they can be leased by any worker.
+    """
+
+    def __init__(self, lease: FrontierLease, **kwargs):
+        super().__init__(**kwargs)
+        self.outbox: Dict[str, List[FrontierItem]] = defaultdict(list)
+        for url, depth in lease.items:
+            super().push(lease.domain, url, depth)
+
+    def push(self, domain: str, url: str, depth: int, deferred: bool = False) -> bool:
+        state = self.add_domain(domain)
+        if depth > self.max_depth or url in state.visited:
+            return False
+        state.visited.add(url)
+        self.outbox[domain].append((url, depth))
+        return True
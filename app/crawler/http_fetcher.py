@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StaticPage:
+    url: str
+    status: int  # 304 when a conditional request found the page unchanged
+    html: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class StaticFetcher:
+    """Fetches pages over a pooled HTTP client without rendering JavaScript"""
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 100,
+        max_connections_per_host: int = 8,
+        timeout: float = 20.0,
+        max_body_bytes: int = 5 * 1024 * 1024,
+    ):
+        self.headers = headers or {}
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def setup(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def cleanup(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def fetch(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> Optional[StaticPage]:
+        """Fetch a page, returning None for failures and non-HTML responses.
+
+        Given validators from an earlier fetch, the request is conditional
+        and an unchanged page comes back as a 304 with no HTML.
+        """
+        await self.setup()
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            async with self.session.get(url, allow_redirects=True, headers=headers) as response:
+                if response.status == 304:
+                    return StaticPage(
+                        url=str(response.url),
+                        status=304,
+                        html="",
+                        etag=response.headers.get("ETag", etag),
+                        last_modified=response.headers.get("Last-Modified", last_modified),
+                    )
+
+                content_type = response.headers.get("Content-Type", "")
+                if "html" not in content_type.lower():
+                    logger.debug(f"Skipping non-HTML response for {url}: {content_type}")
+                    return None
+
+                body = await self._read_body(response)
+                encoding = response.charset or "utf-8"
+                return StaticPage(
+                    url=str(response.url),
+                    status=response.status,
+                    html=body.decode(encoding, errors="replace"),
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    content_hash=content_hash(body),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+            logger.warning(f"Static fetch failed for {url}: {str(e)}")
+            return None
+
+    async def _read_body(self, response: aiohttp.ClientResponse) -> bytearray:
+        """Read a response body up to max_body_bytes"""
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+            if len(body) >= self.max_body_bytes:
+                break
+        return body
+
+    async def fetch_text(self, url: str) -> Optional[str]:
+        """Fetch a small text resource of any content type, e.g. robots.txt"""
+        await self.setup()
+        try:
+            async with self.session.get(url, allow_redirects=True) as response:
+                if response.status >= 400:
+                    return None
+                body = await self._read_body(response)
+                return body.decode(response.charset or "utf-8", errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+            logger.warning(f"Fetch failed for {url}: {str(e)}")
+            return None
+
+    async def stream(self, url: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Yield a response body in chunks, for downloads too large to buffer.
+
+        Only the gap between chunks is bounded by the timeout, so a slow but
+        steady multi-megabyte download isn't cut off.
+        """
+        await self.setup()
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        try:
+            async with self.session.get(url, allow_redirects=True, timeout=timeout) as response:
+                if response.status >= 400:
+                    logger.warning(f"Fetch of {url} returned {response.status}")
+                    return
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    yield chunk
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Streaming fetch failed for {url}: {str(e)}")
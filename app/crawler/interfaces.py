@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Set
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Set, AsyncIterator, Tuple
 
 
 class IURLProcessor(ABC):
@@ -13,6 +14,16 @@ class IURLProcessor(ABC):
         """Check if a URL is a category/collection URL"""
         pass
 
+    @abstractmethod
+    def classify_many(self, urls: List[str], domain: str) -> List[str]:
+        """Label URLs as product, category, excluded or other"""
+        pass
+
+    @abstractmethod
+    def url_rules(self, domain: str) -> Any:
+        """The domain's classification rules, as plain picklable data"""
+        pass
+
     @abstractmethod
     async def normalize_url(self, url: str, base_domain: str) -> str:
         """Normalize URL to full path with domain"""
@@ -23,6 +34,11 @@ class IURLProcessor(ABC):
         """Extract all URLs from a page"""
         pass
 
+    @abstractmethod
+    def extract_urls_from_html(self, html: str, base_url: str) -> Set[str]:
+        """Extract all URLs from raw HTML"""
+        pass
+
     @abstractmethod
     async def filter_urls(self, urls: Set[str], domain: str) -> Dict[str, Set[str]]:
         """Filter URLs into categories and products"""
@@ -46,6 +62,34 @@ class IBrowserManager(ABC):
         """Create a new page"""
         pass
 
+    @abstractmethod
+    async def acquire_page(self):
+        """Check a reusable page out of the pool"""
+        pass
+
+    @abstractmethod
+    async def navigate(self, page, url: str, domain: str = None) -> Any:
+        """Load a URL in a page using the domain's navigation profile"""
+        pass
+
+    @abstractmethod
+    async def release_page(self, page, failed: bool = False):
+        """Return a page to the pool"""
+        pass
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        """Check out a pooled page and always return it, even on error"""
+        page = await self.acquire_page()
+        failed = False
+        try:
+            yield page
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self.release_page(page, failed=failed)
+
 
 class ICrawlerStrategy(ABC):
     @abstractmethod
@@ -54,6 +98,49 @@ class ICrawlerStrategy(ABC):
         pass
 
 
+class IFrontier(ABC):
+    """Shared crawl frontier that workers lease domain-sharded URL batches from"""
+
+    @abstractmethod
+    async def push(self, domain: str, items: List[Tuple[str, int]]) -> int:
+        """Queue (url, depth) items not seen before, returning how many were new"""
+        pass
+
+    @abstractmethod
+    async def lease(self, worker_id: str, batch_size: int) -> Optional[Any]:
+        """Check out up to batch_size URLs of one domain nobody else holds"""
+        pass
+
+    @abstractmethod
+    async def complete(self, lease: Any) -> bool:
+        """Mark a lease done; False if it expired and was requeued"""
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, worker_id: str) -> None:
+        """Extend all of a worker's leases"""
+        pass
+
+    @abstractmethod
+    async def requeue_expired(self) -> int:
+        """Return URLs of expired leases to the queue"""
+        pass
+
+    @abstractmethod
+    async def is_drained(self) -> bool:
+        """True when nothing is queued or leased"""
+        pass
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        """Pending, leased and done URL counts per domain"""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+
 class IDataExtractor(ABC):
     @abstractmethod
     async def extract_product_data(self, page, url: str) -> Dict[str, Any]:
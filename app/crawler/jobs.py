@@ -0,0 +1,293 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from app.crawler.base import EcommerceCrawler
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class JobSubscription:
+    """Product URLs published since a stream last drained them.
+
+    At most max_pending URLs wait for a slow consumer; the crawl never
+    waits for it, so URLs beyond that are dropped and counted in `dropped`.
+    """
+
+    def __init__(self, max_pending: int = 10_000):
+        self.max_pending = max_pending
+        self.pending: List[Tuple[str, List[str]]] = []
+        self.pending_urls = 0
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def push(self, domain: str, urls: List[str]) -> None:
+        room = self.max_pending - self.pending_urls
+        if len(urls) > room:
+            if not self.dropped:
+                logger.warning(
+                    f"Stream subscriber fell {self.max_pending} product URLs behind; "
+                    f"dropping URLs until it catches up"
+                )
+            self.dropped += len(urls) - max(room, 0)
+            urls = urls[: max(room, 0)]
+        if urls:
+            self.pending.append((domain, urls))
+            self.pending_urls += len(urls)
+        self.ready.set()
+
+    def drain(self) -> List[Tuple[str, List[str]]]:
+        batch, self.pending = self.pending, []
+        self.pending_urls = 0
+        self.ready.clear()
+        return batch
+
+
+class CrawlJob:
+    """One crawl_domains() call running as a background task"""
+
+    def __init__(
+        self, domains: List[str], crawler: "EcommerceCrawler", job_id: Optional[str] = None
+    ):
+        self.id = job_id or new_job_id()
+        self.domains = domains
+        # Dropped once the job finishes, see _detach
+        self.crawler: Optional["EcommerceCrawler"] = crawler
+        self.profiled = crawler.profiler is not None
+        self.status = PENDING
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.results: Optional[List[Dict[str, List[str]]]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers: Set[JobSubscription] = set()
+        self._final: Dict[str, Any] = {}
+        crawler.on_products = self.publish
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    async def run(self) -> None:
+        self.status = RUNNING
+        self.started_at = datetime.now(timezone.utc)
+        try:
+            results = await self.crawler.crawl_domains(self.domains)
+            # A job that doesn't keep results only streamed its products
+            self.results = results if self.crawler.keep_results else None
+            self.status = COMPLETED
+        except asyncio.CancelledError:
+            # crawl_domains has already closed pages, writers and the browser
+            self.status = CANCELLED
+            logger.info(f"Crawl job {self.id} cancelled")
+        except Exception as e:
+            self.status = FAILED
+            self.error = str(e)
+            logger.error(f"Crawl job {self.id} failed: {str(e)}", exc_info=True)
+        finally:
+            self._finish()
+
+    async def close_unstarted(self) -> None:
+        """Finish a job whose task was cancelled before run() began, so its
+        body never ran: release what the crawler holds, its checkpoint
+        included, and wake the streams"""
+        self.status = CANCELLED
+        logger.info(f"Crawl job {self.id} cancelled before it started")
+        try:
+            await self.crawler.close()
+        finally:
+            self._finish()
+
+    def _finish(self) -> None:
+        self.finished_at = datetime.now(timezone.utc)
+        self._detach()
+        for subscription in self.subscribers:
+            subscription.ready.set()
+
+    def _detach(self) -> None:
+        """Keep what summary() reports and drop the crawler, whose caches,
+        writers and pools would otherwise stay resident with the job"""
+        crawler = self.crawler
+        self._final = {"progress": self.progress()}
+        if crawler.seen_store is not None:
+            self._final["seen_store"] = crawler.seen_store.stats()
+        if crawler.profiler is not None:
+            self._final["profile"] = crawler.profiler.summary()
+        crawler.on_products = None
+        self.crawler = None
+
+    def publish(self, domain: str, urls: List[str]) -> None:
+        for subscription in self.subscribers:
+            subscription.push(domain, urls)
+
+    def stream(
+        self, batch_size: int = 100, stats_interval: float = 5.0, max_pending: int = 10_000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield product frames as URLs are discovered, a stats frame every
+        stats_interval seconds and a final done frame.
+
+        Only URLs found after stream() is called are sent; frames carry at
+        most batch_size URLs so a consumer can start work on them right away.
+        A consumer more than max_pending URLs behind loses the excess, which
+        stats and done frames report as `dropped`.
+        """
+        # Subscribe now rather than on first iteration, so a stream opened
+        # right after submit() can't miss the first pages
+        subscription = JobSubscription(max_pending)
+        self.subscribers.add(subscription)
+        return self._stream(subscription, batch_size, stats_interval)
+
+    async def _stream(
+        self, subscription: JobSubscription, batch_size: int, stats_interval: float
+    ) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            next_stats = time.monotonic()
+            while True:
+                if time.monotonic() >= next_stats:
+                    yield {**self.stats_frame(), "dropped": subscription.dropped}
+                    next_stats = time.monotonic() + stats_interval
+
+                for domain, urls in subscription.drain():
+                    for start in range(0, len(urls), batch_size):
+                        yield {
+                            "event": "products",
+                            "job_id": self.id,
+                            "domain": domain,
+                            "urls": urls[start : start + batch_size],
+                        }
+
+                if self.finished and not subscription.pending:
+                    break
+                try:
+                    await asyncio.wait_for(
+                        subscription.ready.wait(),
+                        max(next_stats - time.monotonic(), 0),
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+            yield {"event": "done", **self.summary(), "dropped": subscription.dropped}
+        finally:
+            self.subscribers.discard(subscription)
+
+    def stats_frame(self) -> Dict[str, Any]:
+        summary = self.summary()
+        summary.pop("domains")
+        return {"event": "stats", **summary}
+
+    def progress(self) -> List[Dict[str, Any]]:
+        if self.crawler is None:
+            return self._final["progress"]
+        scheduler = self.crawler.scheduler
+        return scheduler.progress() if scheduler is not None else []
+
+    def profile_report(self) -> Optional[Dict[str, Any]]:
+        """Full profile report of a finished profiled job, read from its artifact"""
+        profile = self._final.get("profile")
+        if profile is None:
+            return None
+        with open(profile["artifacts"]["report"]) as f:
+            return json.load(f)
+
+    def summary(self, include_results: bool = False) -> Dict[str, Any]:
+        domains = self.progress()
+        summary = {
+            "job_id": self.id,
+            "status": self.status,
+            "domains": self.domains,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "pages_fetched": sum(domain["pages_fetched"] for domain in domains),
+            "pages_unchanged": sum(domain["pages_unchanged"] for domain in domains),
+            "queue_depth": sum(domain["queue_depth"] for domain in domains),
+            "products_found": sum(domain["products_found"] for domain in domains),
+            "progress": domains,
+        }
+        if self.crawler is None:
+            for key in ("seen_store", "profile"):
+                if key in self._final:
+                    summary[key] = self._final[key]
+        else:
+            if self.crawler.seen_store is not None:
+                summary["seen_store"] = self.crawler.seen_store.stats()
+            if self.crawler.profiler is not None:
+                summary["profile"] = self.crawler.profiler.summary()
+        if include_results:
+            summary["results"] = self.results
+        return summary
+
+
+class CrawlJobManager:
+    """In-process registry of crawl jobs.
+
+    Jobs run as tasks on the server's event loop, so submitting returns
+    immediately and a dropped client connection no longer loses the crawl.
+    Only the newest `max_finished` finished jobs are kept for polling.
+    """
+
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, CrawlJob]" = OrderedDict()
+
+    def submit(
+        self, domains: List[str], crawler: "EcommerceCrawler", job_id: Optional[str] = None
+    ) -> CrawlJob:
+        """Start a crawl job; job_id reuses the ID of a finished job being resumed"""
+        job = CrawlJob(domains, crawler, job_id)
+        self._jobs.pop(job.id, None)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(job.run(), name=f"crawl-job-{job.id}")
+        job.task.add_done_callback(lambda _: self._prune())
+        logger.info(f"Submitted crawl job {job.id} for domains: {domains}")
+        return job
+
+    def get(self, job_id: str) -> Optional[CrawlJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[CrawlJob]:
+        return list(self._jobs.values())
+
+    async def cancel(self, job_id: str) -> Optional[CrawlJob]:
+        """Cancel a job and wait for it to release its pages and connections"""
+        job = self._jobs.get(job_id)
+        if job is None or job.task is None or job.finished:
+            return job
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+        if job.status == PENDING:
+            await job.close_unstarted()
+            self._prune()
+        return job
+
+    async def shutdown(self) -> None:
+        for job in self.list():
+            await self.cancel(job.id)
+
+    def _prune(self) -> None:
+        finished = [job.id for job in self._jobs.values() if job.finished]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+
+crawl_jobs = CrawlJobManager()
@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+RECORD = struct.Struct("<16sII")  # digest, compressed size, raw size
+INDEX = struct.Struct("<16sIQII")  # digest, segment, offset, compressed size, raw size
+SEGMENT_NAME = "{:08d}.seg"
+
+# Manifest roles: pages the crawler fetched for links, and product pages
+# fetched for detail extraction
+CRAWL_PAGE = "crawl"
+PRODUCT_PAGE = "product"
+
+
+class Location(NamedTuple):
+    """Where a compressed body lives; enough for any process to read it"""
+
+    segment: int
+    offset: int
+    size: int
+    raw_size: int
+
+
+class ManifestEntry(NamedTuple):
+    url: str
+    domain: str
+    role: str
+    fetched_at: float
+    digest: str
+
+
+def page_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class PageStore:
+    """Content-addressed, compressed store of fetched page bodies.
+
+    A body is keyed by its blake2b digest, so a page that comes back
+    unchanged crawl after crawl, or under several URLs, is stored once.
+    Bodies are zlib-compressed and appended to segment files of about
+    segment_size bytes; index.bin holds a fixed-size record per body with
+    its segment and offset, and manifest.tsv maps every URL to the digest
+    of its latest body. Reads go through mmap, so replaying pages reads
+    from the page cache, and other processes can read a body from just
+    its Location (see read_location).
+
+    One writer per directory; puts are serialized by a lock so they can
+    run in worker threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        segment_size: int = 256 * 1024 * 1024,
+        compression_level: int = 6,
+    ):
+        self.path = path
+        self.segment_size = segment_size
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, Location] = {}
+        self._readers = SegmentReader(path)
+
+        os.makedirs(os.path.join(path, "segments"), exist_ok=True)
+        self._load_index()
+        self._segment = max((location.segment for location in self._index.values()), default=1)
+        self._recover()
+
+        self._segment_fd = self._open_segment(self._segment)
+        self._index_fd = os.open(
+            os.path.join(path, "index.bin"), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        self._manifest = open(
+            os.path.join(path, "manifest.tsv"), "a", buffering=1, encoding="utf-8"
+        )
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, "segments", SEGMENT_NAME.format(segment))
+
+    def _open_segment(self, segment: int) -> int:
+        return os.open(
+            self._segment_path(segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.path, "index.bin")
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX.size  # drop a torn last record
+        for digest, segment, offset, size, raw_size in INDEX.iter_unpack(data[:usable]):
+            self._index[digest] = Location(segment, offset, size, raw_size)
+        if usable != len(data):
+            os.truncate(index_path, usable)
+
+    def _recover(self) -> None:
+        """Index records appended to the last segment after the index was
+        last written, and cut off a record torn by a crash"""
+        path = self._segment_path(self._segment)
+        if not os.path.exists(path):
+            return
+        indexed_end = max(
+            (
+                location.offset + location.size
+                for location in self._index.values()
+                if location.segment == self._segment
+            ),
+            default=0,
+        )
+        size = os.path.getsize(path)
+        if size <= indexed_end:
+            return
+
+        recovered = []
+        with open(path, "rb") as f:
+            f.seek(indexed_end)
+            data = f.read()
+        position = 0
+        while position + RECORD.size <= len(data):
+            digest, compressed_size, raw_size = RECORD.unpack_from(data, position)
+            start = position + RECORD.size
+            if start + compressed_size > len(data):
+                break
+            try:
+                body = zlib.decompress(data[start : start + compressed_size])
+            except zlib.error:
+                break
+            if len(body) != raw_size or page_digest(body) != digest:
+                break
+            location = Location(self._segment, indexed_end + start, compressed_size, raw_size)
+            self._index[digest] = location
+            recovered.append(INDEX.pack(digest, *location))
+            position = start + compressed_size
+
+        if recovered:
+            with open(os.path.join(self.path, "index.bin"), "ab") as f:
+                f.write(b"".join(recovered))
+            logger.info(f"Recovered {len(recovered)} unindexed pages in {path}")
+        if indexed_end + position < size:
+            os.truncate(path, indexed_end + position)
+
+    def __contains__(self, digest: str) -> bool:
+        return bytes.fromhex(digest) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def put(self, html: str) -> str:
+        """Store a body unless an identical one is stored, returning its digest"""
+        data = html.encode("utf-8")
+        digest = page_digest(data)
+        if digest in self._index:
+            return digest.hex()
+
+        compressed = zlib.compress(data, self.compression_level)
+        with self._lock:
+            if digest in self._index:
+                return digest.hex()
+            offset = os.fstat(self._segment_fd).st_size
+            if offset and offset + len(compressed) > self.segment_size:
+                os.close(self._segment_fd)
+                self._segment += 1
+                self._segment_fd = self._open_segment(self._segment)
+                offset = 0
+            os.write(self._segment_fd, RECORD.pack(digest, len(compressed), len(data)) + compressed)
+            location = Location(self._segment, offset + RECORD.size, len(compressed), len(data))
+            # The segment record goes first, so a crash in between is recovered on open
+            os.write(self._index_fd, INDEX.pack(digest, *location))
+            self._index[digest] = location
+        return digest.hex()
+
+    def put_page(self, url: str, domain: str, html: str, role: str = CRAWL_PAGE) -> str:
+        """Store a fetched page's body and point its URL at it"""
+        digest = self.put(html)
+        with self._lock:
+            self._manifest.write(f"{digest}\t{time.time():.3f}\t{role}\t{domain}\t{url}\n")
+        return digest
+
+    def locate(self, digest: str) -> Optional[Location]:
+        return self._index.get(bytes.fromhex(digest))
+
+    def get(self, digest: str) -> Optional[str]:
+        location = self.locate(digest)
+        if location is None:
+            return None
+        return self._readers.read(location)
+
+    def manifest(self, domains: Optional[Iterable[str]] = None) -> Iterator[ManifestEntry]:
+        """Latest entry per URL, optionally only for some domains"""
+        domains = set(domains) if domains else None
+        latest: Dict[str, ManifestEntry] = {}
+        with open(os.path.join(self.path, "manifest.tsv"), encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t", 4)
+                if len(fields) != 5:
+                    continue
+                digest, fetched_at, role, domain, url = fields
+                if domains is None or domain in domains:
+                    latest[url] = ManifestEntry(url, domain, role, float(fetched_at), digest)
+        return iter(latest.values())
+
+    def stats(self) -> Dict[str, Any]:
+        stored = sum(location.size + RECORD.size for location in self._index.values())
+        raw = sum(location.raw_size for location in self._index.values())
+        return {
+            "path": self.path,
+            "bodies": len(self._index),
+            "segments": self._segment,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "compression_ratio": round(raw / stored, 2) if stored else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            os.close(self._segment_fd)
+            os.close(self._index_fd)
+            self._manifest.close()
+        self._readers.close()
+
+
+class SegmentReader:
+    """Read-only mmaps of a store's segments, remapped as they grow"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._maps: Dict[int, mmap.mmap] = {}
+
+    def read(self, location: Location) -> str:
+        segment = self._maps.get(location.segment)
+        end = location.offset + location.size
+        if segment is None or len(segment) < end:
+            if segment is not None:
+                segment.close()
+            with open(
+                os.path.join(self.path, "segments", SEGMENT_NAME.format(location.segment)), "rb"
+            ) as f:
+                segment = self._maps[location.segment] = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        return zlib.decompress(segment[location.offset : end]).decode("utf-8")
+
+    def close(self) -> None:
+        for segment in self._maps.values():
+            segment.close()
+        self._maps.clear()
+
+
+# Per-process readers for read_location, so pool workers map each segment once
+_readers: Dict[str, SegmentReader] = {}
+
+
+def read_location(path: str, location: Location) -> str:
+    """Read a body from a store at path, e.g. in a pool worker"""
+    reader = _readers.get(path)
+    if reader is None:
+        reader = _readers[path] = SegmentReader(path)
+    return reader.read(location)
@@ -0,0 +1,162 @@
+import logging
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.accelerator import get_backend
+from app.crawler.extractor import EXTRACTED, FAILED, extract_product
+from app.crawler.interfaces import IURLProcessor
+from app.crawler.page_store import PRODUCT_PAGE, Location, PageStore, read_location
+from app.crawler.url_classifier import PRODUCT
+from app.db.repositories.product import ProductRepository
+from app.db.schemas.product import ProductCreate
+
+logger = logging.getLogger(__name__)
+
+StoredPage = Tuple[str, str, str, Location]  # url, domain, manifest role, location
+
+
+def replay_batch(
+    store_path: str,
+    url_processor: IURLProcessor,
+    domain_selectors: Dict[str, Dict[str, str]],
+    extract: bool,
+    pages: List[StoredPage],
+) -> List[Dict[str, Any]]:
+    """Classify the links of stored pages and extract product pages; runs
+    in pool workers, which read the bodies from the store themselves"""
+    results = []
+    for url, domain, role, location in pages:
+        html = read_location(store_path, location)
+        links = url_processor.extract_urls_from_html(html, url)
+        result = {**url_processor.partition_urls(links, domain), "fields": None}
+        if extract and (
+            role == PRODUCT_PAGE or url_processor.classify_many([url], domain)[0] == PRODUCT
+        ):
+            result["fields"] = extract_product(html, url, domain_selectors.get(domain))
+        results.append(result)
+    return results
+
+
+class PageReplayer:
+    """Re-runs link classification and product extraction over the page
+    store instead of the network.
+
+    After a change to URL rules or extraction selectors, replay() walks the
+    latest stored page of every URL and reports, per domain, the product
+    and category URLs the current rules find. With write=True new product
+    URLs are added as pending rows and extracted details written back, as
+    a crawl followed by extraction would. Pages are processed in batches
+    in the shared process pool; only their locations are sent to workers.
+    """
+
+    def __init__(
+        self,
+        page_store: PageStore,
+        url_processor: IURLProcessor,
+        product_repo: Optional[ProductRepository] = None,
+        domain_selectors: Optional[Dict[str, Dict[str, str]]] = None,
+        max_workers: Optional[int] = None,
+        batch_size: int = 32,
+        use_multiprocessing: bool = True,
+        write_batch_size: int = 500,
+    ):
+        self.page_store = page_store
+        self.url_processor = url_processor
+        self.product_repo = product_repo
+        self.domain_selectors = domain_selectors or {}
+        self.write_batch_size = write_batch_size
+        self.concurrent_manager = get_backend("ConcurrentManager")(
+            max_workers=max_workers,
+            batch_size=batch_size,
+            use_multiprocessing=use_multiprocessing,
+        )
+
+    def _pages(self, domains: Optional[Iterable[str]]) -> Iterator[StoredPage]:
+        for entry in self.page_store.manifest(domains):
+            location = self.page_store.locate(entry.digest)
+            if location is None:
+                logger.warning(f"Stored page for {entry.url} is missing from the store")
+                continue
+            yield entry.url, entry.domain, entry.role, location
+
+    async def replay(
+        self,
+        domains: Optional[List[str]] = None,
+        extract: bool = True,
+        write: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Replay stored pages, returning per-domain pages, errors, product
+        and category URLs, and extraction status counts"""
+        if write and self.product_repo is None:
+            raise ValueError("Writing replay results needs a product repository")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        updates: Dict[str, Dict[str, Any]] = {}
+        func = partial(
+            replay_batch, self.page_store.path, self.url_processor, self.domain_selectors, extract
+        )
+        async for item in self.concurrent_manager.stream_map(func, self._pages(domains), per_batch=True):
+            url, domain, role, _ = item.item
+            summary = results.get(domain)
+            if summary is None:
+                summary = results[domain] = {
+                    "pages": 0,
+                    "errors": 0,
+                    "product_urls": set(),
+                    "category_urls": set(),
+                    EXTRACTED: 0,
+                    FAILED: 0,
+                }
+            summary["pages"] += 1
+            if item.error is not None:
+                summary["errors"] += 1
+                logger.error(f"Error replaying {url}: {str(item.error)}")
+                continue
+
+            summary["product_urls"] |= item.value["products"]
+            summary["category_urls"] |= item.value["categories"]
+            if role == PRODUCT_PAGE:
+                summary["product_urls"].add(url)
+            if item.value["fields"] is not None:
+                fields = {
+                    field: value
+                    for field, value in item.value["fields"].items()
+                    if value is not None
+                }
+                status = EXTRACTED if fields.get("name") or fields.get("price") else FAILED
+                summary[status] += 1
+                if write:
+                    updates[url] = {"status": status, **fields}
+
+        if write:
+            await self._write(results, updates)
+        await self.concurrent_manager.cleanup()
+
+        for summary in results.values():
+            summary["product_urls"] = sorted(summary["product_urls"])
+            summary["category_urls"] = sorted(summary["category_urls"])
+        return results
+
+    async def _write(
+        self, results: Dict[str, Dict[str, Any]], updates: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Add new product URLs as pending rows, then write extracted details"""
+        for domain, summary in results.items():
+            added = 0
+            urls = sorted(summary["product_urls"])
+            for start in range(0, len(urls), self.write_batch_size):
+                added += len(
+                    await self.product_repo.upsert_products(
+                        [
+                            ProductCreate(url=url, domain=domain)
+                            for url in urls[start : start + self.write_batch_size]
+                        ]
+                    )
+                )
+            summary["products_added"] = added
+
+        urls = list(updates)
+        for start in range(0, len(urls), self.write_batch_size):
+            ids = await self.product_repo.ids_by_url(urls[start : start + self.write_batch_size])
+            await self.product_repo.update_products(
+                [{"id": product_id, **updates[url]} for url, product_id in ids.items()]
+            )
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from app.metrics import PAGES_IN_FLIGHT, RATE_LIMIT_SLEEP, domain_metrics
+from app import profiling
+
+if TYPE_CHECKING:
+    from app.crawler.checkpoint import CrawlCheckpoint
+    from app.crawler.fingerprints import FingerprintSet
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Per-host rate limiter refilling `rate` tokens per second up to `burst`"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available"""
+        self._refill()
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self._refill()
+        self.tokens -= 1.0
+
+
+class DomainState:
+    """Frontier and results for a single domain"""
+
+    def __init__(
+        self,
+        domain: str,
+        bucket: TokenBucket,
+        visited: Optional[Union[Set[str], "FingerprintSet"]] = None,
+        products: Optional["FingerprintSet"] = None,
+    ):
+        self.domain = domain
+        self.bucket = bucket
+        self.queue: Deque[Tuple[str, int]] = deque()
+        self.deferred: Deque[Tuple[str, int]] = deque()  # served once queue is empty
+        # URLs scheduled or fetched; may be a FingerprintSet shared by all domains
+        self.visited = visited if visited is not None else set()
+        # Product URLs found; a FingerprintSet shared by all domains when the
+        # crawl doesn't keep its results, as a streamed one publishes them
+        self.product_urls: Union[Set[str], "FingerprintSet"] = (
+            products if products is not None else set()
+        )
+        self.products_found = 0
+        self.in_flight = 0
+        self.in_flight_urls: Dict[str, Tuple[int, bool]] = {}  # url -> (depth, deferred)
+        self.pages_fetched = 0
+        self.pages_unchanged = 0  # revisits a conditional fetch found unchanged
+        self.started_at = time.monotonic()
+        self.metrics = domain_metrics(domain)
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "domain": self.domain,
+            "pages_fetched": self.pages_fetched,
+            "pages_unchanged": self.pages_unchanged,
+            "queue_depth": len(self.queue) + len(self.deferred),
+            "in_flight": self.in_flight,
+            "products_found": self.products_found,
+            "pages_per_second": round(self.pages_fetched / elapsed, 3) if elapsed > 0 else 0.0,
+        }
+
+
+class CrawlScheduler:
+    """Shared frontier that fans pages out to a fixed pool of workers.
+
+    Domains are served round-robin. A domain is only eligible when it has
+    queued URLs, fewer than `per_domain_concurrency` requests in flight and
+    a token in its bucket, so one slow or rate-limited host never holds
+    workers that another host could use.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        per_domain_concurrency: int = 4,
+        requests_per_second: float = 2.0,
+        burst: float = 4.0,
+        max_depth: int = 2,
+        seen: Optional["FingerprintSet"] = None,
+        products: Optional["FingerprintSet"] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_domain_concurrency = per_domain_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_depth = max_depth
+        self.seen = seen
+        self.products = products
+
+        self.domains: Dict[str, DomainState] = {}
+        self._order: Deque[str] = deque()
+        self._in_flight = 0
+        self._producers = 0
+        self._wakeup = asyncio.Event()
+
+        # Optional journal of pushes and finished pages, see CrawlCheckpoint
+        self.checkpoint: Optional["CrawlCheckpoint"] = None
+
+    def add_domain(self, domain: str, requests_per_second: Optional[float] = None) -> DomainState:
+        if domain not in self.domains:
+            bucket = TokenBucket(requests_per_second or self.requests_per_second, self.burst)
+            self.domains[domain] = DomainState(domain, bucket, self.seen, self.products)
+            self._order.append(domain)
+        return self.domains[domain]
+
+    def push(self, domain: str, url: str, depth: int, deferred: bool = False) -> bool:
+        """Queue a URL, returning False if it is too deep or already seen.
+        Deferred URLs are only handed out once the domain's queue is empty."""
+        state = self.add_domain(domain)
+        if depth > self.max_depth or url in state.visited:
+            return False
+        state.visited.add(url)
+        if deferred:
+            state.deferred.append((url, depth))
+        else:
+            state.queue.append((url, depth))
+        state.metrics.frontier_depth.inc()
+        if self.checkpoint is not None:
+            self.checkpoint.record_push(domain, url, depth, deferred)
+        self._wakeup.set()
+        return True
+
+    def open_producer(self) -> None:
+        """Keep workers waiting for URLs that something outside them (such as
+        a sitemap reader) may still push, until close_producer() is called"""
+        self._producers += 1
+
+    def close_producer(self) -> None:
+        self._producers -= 1
+        self._wakeup.set()
+
+    async def run(self, handler: Callable[[DomainState, str, int], Awaitable[None]]) -> None:
+        """Run workers until every domain's frontier is drained"""
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(self.max_concurrency):
+                    tg.create_task(self._worker(handler))
+        finally:
+            # URLs left behind by a cancelled crawl no longer count as queued
+            for state in self.domains.values():
+                state.metrics.frontier_depth.dec(len(state.queue) + len(state.deferred))
+
+    async def _worker(self, handler: Callable[[DomainState, str, int], Awaitable[None]]) -> None:
+        while True:
+            item = await self._next()
+            if item is None:
+                return
+
+            state, url, depth = item
+            try:
+                await handler(state, url, depth)
+            except asyncio.CancelledError:
+                # Still pending, so a journal compacted from now on lists it
+                if self.checkpoint is not None:
+                    self.checkpoint.record_failed(state, url, *state.in_flight_urls[url])
+                raise
+            except Exception as e:
+                state.metrics.pages_failed.inc()
+                logger.error(f"Error processing {url}: {str(e)}")
+                if self.checkpoint is not None:
+                    self.checkpoint.record_failed(state, url, *state.in_flight_urls[url])
+            else:
+                state.metrics.pages_ok.inc()
+                if self.checkpoint is not None:
+                    self.checkpoint.record_done(state, url)
+            finally:
+                PAGES_IN_FLIGHT.dec()
+                state.in_flight -= 1
+                state.in_flight_urls.pop(url, None)
+                state.pages_fetched += 1
+                self._in_flight -= 1
+                self._wakeup.set()
+
+    async def _next(self) -> Optional[Tuple[DomainState, str, int]]:
+        while True:
+            item, wait = self._pick()
+            if item is not None:
+                return item
+
+            if wait is None and self._in_flight == 0 and self._producers == 0:
+                # Nothing queued anywhere and nothing left that could queue more
+                self._wakeup.set()
+                return None
+
+            self._wakeup.clear()
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            if wait is not None:
+                # Some domain had URLs but no tokens
+                slept = time.monotonic() - started
+                RATE_LIMIT_SLEEP.inc(slept)
+                profiling.record(profiling.RATE_LIMIT_SLEEP, slept)
+
+    def _pick(self) -> Tuple[Optional[Tuple[DomainState, str, int]], Optional[float]]:
+        """Take the next URL from the first ready domain after the last one served"""
+        min_wait = None
+        for _ in range(len(self._order)):
+            state = self.domains[self._order[0]]
+            self._order.rotate(-1)
+
+            if not (state.queue or state.deferred):
+                continue
+            if state.in_flight >= self.per_domain_concurrency:
+                continue
+
+            wait = state.bucket.wait_time()
+            if wait > 0:
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+                continue
+
+            state.bucket.consume()
+            deferred = not state.queue
+            url, depth = (state.deferred if deferred else state.queue).popleft()
+            state.metrics.frontier_depth.dec()
+            PAGES_IN_FLIGHT.inc()
+            state.in_flight += 1
+            state.in_flight_urls[url] = (depth, deferred)
+            self._in_flight += 1
+            return (state, url, depth), None
+
+        return None, min_wait
+
+    def progress(self) -> List[Dict[str, Any]]:
+        return [state.progress() for state in self.domains.values()]
+
+    def results(self) -> List[Dict[str, List[str]]]:
+        """Product URLs by domain; empty when only fingerprints were kept"""
+        return [
+            {
+                "domain": state.domain,
+                "product_urls": list(state.product_urls) if self.products is None else [],
+            }
+            for state in self.domains.values()
+        ]
@@ -0,0 +1,171 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+PRODUCT = "product"
+CATEGORY = "category"
+EXCLUDED = "excluded"
+OTHER = "other"
+
+
+@dataclass(frozen=True)
+class URLRules:
+    """Regex rule set for one domain; patterns match the lowercased URL
+    with its scheme and host removed"""
+
+    product_patterns: Tuple[str, ...]
+    category_patterns: Tuple[str, ...]
+    excluded_patterns: Tuple[str, ...]
+    # Product-looking URLs that are really listings or pagination
+    listing_patterns: Tuple[str, ...] = ()
+
+
+def _literal(*indicators: str) -> Tuple[str, ...]:
+    return tuple(re.escape(indicator) for indicator in indicators)
+
+
+DEFAULT_RULES = URLRules(
+    product_patterns=_literal(
+        "product", "/p/", "item", "detail", "pd", "buy", "shop", "/i/", "goods"
+    )
+    + (
+        r"/p/\d+",
+        r"/product/\d+",
+        r"/item/\d+",
+        r"/pd/\d+",
+        r"/(?:p|prod|item)-",  # path segments like /p-1234 or /item-blue-shirt
+    ),
+    category_patterns=_literal(
+        "category",
+        "dept",
+        "collection",
+        "/c/",
+        "catalog",
+        "products",
+        "shop",
+        "list",
+        "browse",
+        "cat",
+        "section",
+    ),
+    excluded_patterns=_literal(
+        "login",
+        "cart",
+        "checkout",
+        "account",
+        "wishlist",
+        "search",
+        "contact",
+        "about",
+        "policy",
+        "terms",
+        "help",
+        "support",
+    ),
+    listing_patterns=_literal(
+        "/shop/",
+        "/category/",
+        "/page/",
+        "?p=",
+        "page=",
+        "/products/",  # general products listing
+        "/collections/",
+    ),
+)
+
+
+class _CompiledRules:
+    __slots__ = ("product", "category", "excluded", "listing")
+
+    def __init__(self, rules: URLRules):
+        self.product = _combine(rules.product_patterns)
+        self.category = _combine(rules.category_patterns)
+        self.excluded = _combine(rules.excluded_patterns)
+        self.listing = _combine(rules.listing_patterns)
+
+
+def _combine(patterns: Iterable[str]) -> Optional["re.Pattern[str]"]:
+    """Compile a list of patterns into a single alternation"""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class URLClassifier:
+    """Labels URLs as product, category, excluded or other.
+
+    Each domain's rules are compiled once into one regex per label, so
+    classifying a URL is a handful of C-level scans instead of a Python
+    loop over every indicator.
+    """
+
+    def __init__(
+        self,
+        rules: URLRules = DEFAULT_RULES,
+        domain_rules: Optional[Dict[str, URLRules]] = None,
+    ):
+        self.rules = rules
+        self.domain_rules = domain_rules or {}
+        self._compiled: Dict[Optional[str], _CompiledRules] = {}
+
+    def rules_for(self, domain: Optional[str]) -> URLRules:
+        """The rule set used for domain"""
+        return self.domain_rules.get(domain, self.rules)
+
+    def _rules_for(self, domain: Optional[str]) -> _CompiledRules:
+        key = domain if domain in self.domain_rules else None
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = _CompiledRules(self.domain_rules.get(key, self.rules))
+            self._compiled[key] = compiled
+        return compiled
+
+    def classify(self, url: str, domain: Optional[str] = None) -> str:
+        return self.classify_many([url], domain)[0]
+
+    def classify_many(self, urls: Iterable[str], domain: Optional[str] = None) -> List[str]:
+        """Label absolute URLs in one pass; URLs off `domain` are excluded"""
+        rules = self._rules_for(domain)
+        product = rules.product
+        category = rules.category
+        excluded = rules.excluded
+        listing = rules.listing
+
+        labels = []
+        for url in urls:
+            parts = urlsplit(url.lower())
+            if parts.scheme not in ("http", "https"):
+                labels.append(EXCLUDED)
+                continue
+            if domain and domain not in parts.netloc:
+                labels.append(EXCLUDED)
+                continue
+
+            rest = parts.path
+            if parts.query:
+                rest = f"{rest}?{parts.query}"
+
+            if excluded and excluded.search(rest):
+                labels.append(EXCLUDED)
+            elif product and product.search(rest) and not (listing and listing.search(rest)):
+                labels.append(PRODUCT)
+            elif category and category.search(rest):
+                labels.append(CATEGORY)
+            else:
+                labels.append(OTHER)
+        return labels
+
+
+# Classifiers of pool workers, one per rule set they have been sent
+_worker_classifiers: Dict[URLRules, URLClassifier] = {}
+
+
+def classify_urls(urls: List[str], domain: str, rules: URLRules) -> List[str]:
+    """URLClassifier.classify_many for pool workers: only the domain's rules
+    are sent, and each worker compiles a rule set once"""
+    classifier = _worker_classifiers.get(rules)
+    if classifier is None:
+        classifier = _worker_classifiers[rules] = URLClassifier(rules)
+    return classifier.classify_many(urls, domain)
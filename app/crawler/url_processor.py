@@ -1,93 +1,64 @@
 import logging
 from urllib.parse import urlparse, urljoin
-from typing import Set, Dict, Any
+from typing import Set, Dict, Any, Iterable, List, Optional
 from app.crawler.interfaces import IURLProcessor
-import re
+from app.crawler.url_classifier import CATEGORY, PRODUCT, URLClassifier, URLRules
+from lxml import etree, html as lxml_html
 
 logger = logging.getLogger(__name__)
 
+# Pages are decoded before parsing, so force UTF-8 over any <meta charset>
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
 
-class URLProcessor(IURLProcessor):
 
-    def __init__(self):
-        # URL pattern indicators
-        self.product_indicators = [
-            "product",
-            "/p/",
-            "item",
-            "detail",
-            "pd",
-            "buy",
-            "shop",
-            "/i/",
-            "goods",
-            # Add more specific patterns
-            r"/p/\d+",
-            r"/product/\d+",
-            r"/item/\d+",
-            r"/pd/\d+",
-        ]
-        self.category_indicators = [
-            "category",
-            "dept",
-            "collection",
-            "/c/",
-            "catalog",
-            "products",
-            "shop",
-            "list",
-            "browse",
-            "cat",
-            "section",
-        ]
-        # URLs to ignore
-        self.excluded_patterns = [
-            "login",
-            "cart",
-            "checkout",
-            "account",
-            "wishlist",
-            "search",
-            "contact",
-            "about",
-            "policy",
-            "terms",
-            "help",
-            "support",
-            "javascript:",
-            "mailto:",
-            "tel:",
-        ]
+def extract_urls_from_html(html: str, base_url: str) -> Set[str]:
+    """Extract all URLs from raw HTML, mirroring URLProcessor.extract_urls_from_page;
+    module-level so pool workers are sent only the HTML"""
+    if not html or not html.strip():
+        return set()
 
-    async def is_product_url(self, url: str) -> bool:
-        """Enhanced product URL detection"""
-        url_lower = url.lower()
+    try:
+        doc = lxml_html.fromstring(html.encode("utf-8"), parser=HTML_PARSER)
+    except (etree.ParserError, ValueError) as e:
+        logger.error(f"Error parsing HTML from {base_url}: {str(e)}")
+        return set()
 
-        # Check for exact patterns first
-        for pattern in self.product_indicators:
-            if pattern.startswith("r/"):
-                # Regex pattern
-                if re.search(pattern[2:], url_lower):
-                    return True
-            elif pattern in url_lower:
-                return True
+    base_href = doc.xpath("//base/@href")
+    if base_href:
+        base_url = urljoin(base_url, base_href[0].strip())
 
-        # Additional checks for common product URL patterns
-        parts = urlparse(url_lower).path.split("/")
-        if any(part.startswith(("p-", "prod-", "item-")) for part in parts):
-            return True
+    links = doc.xpath("//a/@href") + doc.xpath("//@data-url | //@data-href")
+    return {urljoin(base_url, link.strip()) for link in links if link.strip()}
 
-        return False
+
+class URLProcessor(IURLProcessor):
+
+    def __init__(self, domain_rules: Optional[Dict[str, URLRules]] = None):
+        # Product/category/excluded patterns live in url_classifier.DEFAULT_RULES
+        self.classifier = URLClassifier(domain_rules=domain_rules)
+
+    async def is_product_url(self, url: str) -> bool:
+        """Enhanced product URL detection"""
+        return self.classifier.classify(url) == PRODUCT
 
     async def is_category_url(self, url: str) -> bool:
         """Check if URL matches category patterns"""
-        url_lower = url.lower()
-        return any(
-            indicator in url_lower for indicator in self.category_indicators
-        ) and not any(excluded in url_lower for excluded in self.excluded_patterns)
+        return self.classifier.classify(url) == CATEGORY
+
+    def classify_many(self, urls: List[str], domain: str) -> List[str]:
+        """Label URLs as product, category, excluded or other in one pass"""
+        return self.classifier.classify_many(urls, domain)
+
+    def url_rules(self, domain: str) -> URLRules:
+        """The domain's rules, for classifying in pool workers (see classify_urls)"""
+        return self.classifier.rules_for(domain)
 
     async def normalize_url(self, url: str, base_domain: str) -> str:
         """Normalize URL to full path with domain"""
+        return self.normalize(url, base_domain)
+
+    def normalize(self, url: str, base_domain: str) -> str:
+        """Synchronous normalize_url for batch callers"""
         try:
             # Parse the URL
             parsed = urlparse(url)
@@ -132,23 +103,25 @@ class URLProcessor(IURLProcessor):
             logger.error(f"Error extracting URLs from page: {str(e)}")
             return set()
 
+    def extract_urls_from_html(self, html: str, base_url: str) -> Set[str]:
+        """Extract all URLs from raw HTML, mirroring extract_urls_from_page"""
+        return extract_urls_from_html(html, base_url)
+
     async def filter_urls(self, urls: Set[str], domain: str) -> Dict[str, Set[str]]:
         """Filter URLs into categories and products"""
-        products = set()
-        categories = set()
-
-        for url in urls:
-            # Normalize URL first
-            normalized_url = await self.normalize_url(url, domain)
+        return self.partition_urls(urls, domain)
 
-            # Skip URLs from different domains
-            if domain not in normalized_url:
-                continue
+    def partition_urls(self, urls: Iterable[str], domain: str) -> Dict[str, Set[str]]:
+        """Synchronous filter_urls, for callers off the event loop"""
+        normalized_urls = list({self.normalize(url, domain) for url in urls})
+        labels = self.classifier.classify_many(normalized_urls, domain)
 
-            # Categorize URL
-            if await self.is_product_url(normalized_url):
-                products.add(normalized_url)
-            elif await self.is_category_url(normalized_url):
-                categories.add(normalized_url)
+        products = set()
+        categories = set()
+        for url, label in zip(normalized_urls, labels):
+            if label == PRODUCT:
+                products.add(url)
+            elif label == CATEGORY:
+                categories.add(url)
 
         return {"products": products, "categories": categories}
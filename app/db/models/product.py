@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Numeric
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime, timezone
 
@@ -20,6 +20,9 @@ class Product(Base):
     price = Column(Numeric(10, 2), nullable=True)
     image_url = Column(String, nullable=True)
 
+    # Detail extraction: pending until the extractor fills in the fields above
+    status = Column(String, default="pending", index=True)
+
     # Metadata
     created_at = Column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
@@ -65,3 +68,11 @@ class URLCache(Base):
     )
     access_count = Column(Integer, default=1)
     ttl = Column(Integer, default=86400)  # Time to live in seconds (24 hours)
+
+    # HTTP validators and body hash from the last fetch, for conditional revisits
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)
+    # JSON list of the product and category links the crawler kept from the
+    # page, followed again when a revisit finds it unchanged
+    outlinks = Column(Text, nullable=True)
@@ -1,64 +1,302 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import asyncio
+import logging
+import time
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 from app.db.models.product import Product, CrawlHistory, URLCache
 from app.db.schemas.product import ProductCreate, CrawlHistoryCreate
-from sqlalchemy import select
+from app.db.upsert import chunk_rows, upsert_insert
+from app.metrics import PRODUCT_UPDATES, PRODUCT_WRITES
+from app import profiling
+from sqlalchemy import func, or_, select, update
+
+logger = logging.getLogger(__name__)
+
+# Columns an ON CONFLICT DO UPDATE may fill in; NULLs never overwrite data
+UPSERT_UPDATABLE_COLUMNS = (
+    "domain",
+    "external_id",
+    "name",
+    "category",
+    "brand",
+    "price",
+    "image_url",
+)
 
 
 class ProductRepository:
-    def __init__(self, db: Session):
-        self.db = db
+    """Product data access; every call runs in its own short-lived session
+    so concurrent crawl tasks never share a connection"""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
 
-    def create_product(self, product_data: ProductCreate) -> Product:
+    async def create_product(self, product_data: ProductCreate) -> Product:
         now = datetime.now(timezone.utc)
-        db_product = Product(
-            **product_data.model_dump(), created_at=now, updated_at=now
-        )
-        self.db.add(db_product)
-        self.db.commit()
-        self.db.refresh(db_product)
-        return db_product
+        async with self.session_factory() as db:
+            db_product = Product(
+                **product_data.model_dump(), created_at=now, updated_at=now
+            )
+            db.add(db_product)
+            await db.commit()
+            await db.refresh(db_product)
+            return db_product
+
+    async def upsert_products(
+        self, products: List[ProductCreate], update_on_conflict: bool = False
+    ) -> Set[str]:
+        """Insert products with multi-row INSERT ... ON CONFLICT (url),
+        returning the URLs that were written"""
+        if not products:
+            return set()
+
+        now = datetime.now(timezone.utc)
+        rows = [
+            {**product.model_dump(), "created_at": now, "updated_at": now}
+            for product in products
+        ]
+
+        written: Set[str] = set()
+        async with self.session_factory() as db:
+            for chunk in chunk_rows(rows, len(rows[0])):
+                stmt = upsert_insert(db, Product).values(chunk)
+                if update_on_conflict:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[Product.url],
+                        set_={
+                            **{
+                                column: func.coalesce(
+                                    stmt.excluded[column], Product.__table__.c[column]
+                                )
+                                for column in UPSERT_UPDATABLE_COLUMNS
+                            },
+                            "updated_at": stmt.excluded.updated_at,
+                        },
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=[Product.url])
+
+                result = await db.execute(stmt.returning(Product.url))
+                written.update(result.scalars().all())
+            await db.commit()
+        return written
 
-    def get_product(self, product_id: int) -> Optional[Product]:
-        return self.db.query(Product).filter(Product.id == product_id).first()
+    def bulk_writer(
+        self,
+        max_batch_size: int = 500,
+        max_age: float = 1.0,
+        update_on_conflict: bool = False,
+    ) -> "BulkProductWriter":
+        return BulkProductWriter(self, max_batch_size, max_age, update_on_conflict)
+
+    async def get_product(self, product_id: int) -> Optional[Product]:
+        async with self.session_factory() as db:
+            return await db.get(Product, product_id)
 
     async def get_product_by_url(self, url: str):
         """Get product by URL"""
         query = select(Product).where(Product.url == url)
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none()
-
-    def get_products(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        return self.db.query(Product).offset(skip).limit(limit).all()
-
-    def update_product(self, product_id: int, product_data: dict) -> Optional[Product]:
-        product = self.get_product(product_id)
-        if product:
-            for key, value in product_data.items():
-                setattr(product, key, value)
-            product.updated_at = datetime.now(timezone.utc)
-            self.db.commit()
-            self.db.refresh(product)
-        return product
-
-    def log_crawl_attempt(self, crawl_data: CrawlHistoryCreate) -> CrawlHistory:
-        history = CrawlHistory(
-            **crawl_data.model_dump(), crawled_at=datetime.now(timezone.utc)
-        )
-        self.db.add(history)
-        self.db.commit()
-        self.db.refresh(history)
-        return history
-
-    def get_crawl_history(self, product_id: int) -> List[CrawlHistory]:
-        return (
-            self.db.query(CrawlHistory)
-            .filter(CrawlHistory.product_id == product_id)
+        async with self.session_factory() as db:
+            result = await db.execute(query)
+            return result.scalar_one_or_none()
+
+    async def get_products(self, skip: int = 0, limit: int = 100) -> List[Product]:
+        query = select(Product).offset(skip).limit(limit)
+        async with self.session_factory() as db:
+            result = await db.execute(query)
+            return list(result.scalars().all())
+
+    async def update_product(
+        self, product_id: int, product_data: dict
+    ) -> Optional[Product]:
+        async with self.session_factory() as db:
+            product = await db.get(Product, product_id)
+            if product:
+                for key, value in product_data.items():
+                    setattr(product, key, value)
+                product.updated_at = datetime.now(timezone.utc)
+                await db.commit()
+                await db.refresh(product)
+            return product
+
+    async def update_products(self, updates: List[Dict[str, Any]]) -> int:
+        """Batch version of update_product: each dict holds an "id" and the
+        columns to set, all written in one session with executemany"""
+        if not updates:
+            return 0
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Product), [{**row, "updated_at": now} for row in updates]
+            )
+            await db.commit()
+        PRODUCT_UPDATES.observe(started, len(updates))
+        profiling.record(profiling.PRODUCT_DB_WRITES, time.perf_counter() - started)
+        return len(updates)
+
+    async def ids_by_url(self, urls: List[str]) -> Dict[str, int]:
+        """Primary keys of the products with these URLs"""
+        ids = {}
+        async with self.session_factory() as db:
+            for chunk in chunk_rows(urls, 1):
+                result = await db.execute(select(Product.url, Product.id).where(Product.url.in_(chunk)))
+                ids.update(result.all())
+        return ids
+
+    async def iter_products_by_status(
+        self,
+        status: str,
+        domains: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        page_size: int = 500,
+    ) -> AsyncIterator[Tuple[int, str, str]]:
+        """Yield (id, url, domain) of products with a status, paging by id so
+        rows updated meanwhile never shift the pages"""
+        condition = Product.status == status
+        if status == "pending":
+            # Rows from before the status column was added
+            condition = or_(condition, Product.status.is_(None))
+        after_id = 0
+        yielded = 0
+        while limit is None or yielded < limit:
+            query = (
+                select(Product.id, Product.url, Product.domain)
+                .where(condition, Product.id > after_id)
+                .order_by(Product.id)
+                .limit(page_size if limit is None else min(page_size, limit - yielded))
+            )
+            if domains:
+                query = query.where(Product.domain.in_(domains))
+            async with self.session_factory() as db:
+                rows = (await db.execute(query)).all()
+            if not rows:
+                return
+            for product_id, url, domain in rows:
+                yield product_id, url, domain
+            yielded += len(rows)
+            after_id = rows[-1][0]
+
+    async def log_crawl_attempt(self, crawl_data: CrawlHistoryCreate) -> CrawlHistory:
+        async with self.session_factory() as db:
+            history = CrawlHistory(
+                **crawl_data.model_dump(), crawled_at=datetime.now(timezone.utc)
+            )
+            db.add(history)
+            await db.commit()
+            await db.refresh(history)
+            return history
+
+    async def get_crawl_history(self, product_id: int) -> List[CrawlHistory]:
+        query = (
+            select(CrawlHistory)
+            .where(CrawlHistory.product_id == product_id)
             .order_by(CrawlHistory.crawled_at.desc())
-            .all()
         )
+        async with self.session_factory() as db:
+            result = await db.execute(query)
+            return list(result.scalars().all())
+
+
+class BulkProductWriter:
+    """Write-behind buffer that upserts queued products in batches.
+
+    Each add() returns a future resolved when its batch is flushed, with
+    True if the row was written. Batches flush once max_batch_size rows
+    are queued or max_age seconds after the first row of a batch.
+    """
+
+    def __init__(
+        self,
+        repo: ProductRepository,
+        max_batch_size: int = 500,
+        max_age: float = 1.0,
+        update_on_conflict: bool = False,
+    ):
+        self.repo = repo
+        self.max_batch_size = max_batch_size
+        self.max_age = max_age
+        self.update_on_conflict = update_on_conflict
+
+        # Keyed by URL so one statement never touches the same row twice
+        self._pending: Dict[str, Tuple[ProductCreate, List[asyncio.Future]]] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._closed = False
+        self.rows_written = 0
+        self.batches_written = 0
+
+    def add(self, product: ProductCreate) -> asyncio.Future:
+        """Queue a product for the next batch"""
+        if self._closed:
+            raise RuntimeError("BulkProductWriter is closed")
+
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.get(product.url)
+        if pending:
+            self._pending[product.url] = (product, pending[1] + [future])
+        else:
+            self._pending[product.url] = (product, [future])
+
+        if len(self._pending) >= self.max_batch_size:
+            task = asyncio.create_task(self._write(self._take_batch()))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after(self.max_age))
+        return future
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything queued so far, waiting for batches already being
+        written too, so every product added before the call is stored"""
+        await self._write(self._take_batch())
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _take_batch(self) -> Dict[str, Tuple[ProductCreate, List[asyncio.Future]]]:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self._pending = self._pending, {}
+        return batch
+
+    async def _write(
+        self, batch: Dict[str, Tuple[ProductCreate, List[asyncio.Future]]]
+    ) -> None:
+        if not batch:
+            return
+
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                written = await self.repo.upsert_products(
+                    [product for product, _ in batch.values()], self.update_on_conflict
+                )
+            except Exception as e:
+                logger.error(f"Error writing batch of {len(batch)} products: {str(e)}")
+                for _, futures in batch.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                return
+
+            PRODUCT_WRITES.observe(started, len(batch))
+            profiling.record(profiling.PRODUCT_DB_WRITES, time.perf_counter() - started)
+            self.rows_written += len(written)
+            self.batches_written += 1
+            logger.info(f"Wrote {len(written)} of {len(batch)} queued products")
+            for url, (_, futures) in batch.items():
+                for future in futures:
+                    if not future.done():
+                        future.set_result(url in written)
 
-    async def rollback(self):
-        """Rollback the current transaction"""
-        await self.db.rollback()
+    async def close(self) -> None:
+        """Stop accepting products and drain everything queued"""
+        self._closed = True
+        await self.flush()
@@ -14,6 +14,7 @@ class ProductBase(BaseModel):
     brand: Optional[str] = None
     price: Optional[Decimal] = None
     image_url: Optional[str] = None
+    status: Optional[str] = "pending"
 
 
 class ProductCreate(ProductBase):
@@ -61,6 +62,9 @@ class URLCache(URLCacheBase):
     first_seen: datetime
     last_accessed: datetime
     access_count: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.engine import Engine
-from typing import Generator
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from typing import Generator, List, Tuple
 from app.config import settings
 from app.db.models.product import Base  # Import Base from our models
 
@@ -9,8 +16,8 @@ from app.db.models.product import Base  # Import Base from our models
 main_engine = create_engine(
     settings.PRODUCT_DATABASE_URL,
     pool_pre_ping=True,  # Enables connection health checks
-    pool_size=5,  # Number of connections to maintain
-    max_overflow=10,  # Max number of connections to use beyond pool_size
+    pool_size=settings.DB_POOL_SIZE,  # Number of connections to maintain
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Max connections beyond pool_size
 )
 MainSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=main_engine)
 
@@ -18,18 +25,146 @@ MainSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=main_eng
 cache_engine = create_engine(
     settings.CACHE_DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=3,  # Smaller pool for cache database
-    max_overflow=5,
+    pool_size=settings.CACHE_DB_POOL_SIZE,  # Smaller pool for cache database
+    max_overflow=settings.CACHE_DB_MAX_OVERFLOW,
 )
 CacheSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=cache_engine)
 
 
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL's driver for its asyncio equivalent"""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+def _create_async_engine(url: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    async_url = to_async_url(url)
+    if async_url.startswith("sqlite"):
+        # aiosqlite serialises writes anyway; SQLite picks its own pool class
+        return create_async_engine(async_url)
+    return create_async_engine(
+        async_url,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+
+# Async engines used by the crawler hot path
+main_async_engine = _create_async_engine(
+    settings.PRODUCT_DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+)
+MainAsyncSessionLocal = async_sessionmaker(
+    main_async_engine, autoflush=False, expire_on_commit=False
+)
+
+cache_async_engine = _create_async_engine(
+    settings.CACHE_DATABASE_URL,
+    settings.CACHE_DB_POOL_SIZE,
+    settings.CACHE_DB_MAX_OVERFLOW,
+)
+CacheAsyncSessionLocal = async_sessionmaker(
+    cache_async_engine, autoflush=False, expire_on_commit=False
+)
+
+
 def init_db() -> None:
     """Initialize database with all models"""
     Base.metadata.create_all(bind=main_engine)
     Base.metadata.create_all(bind=cache_engine)
 
 
+def _engines() -> List[Tuple[str, Engine]]:
+    return [("main", main_engine), ("cache", cache_engine)]
+
+
+def check_schema() -> List[str]:
+    """List tables, columns and indexes the models define but a database
+    lacks, as "db:table", "db:table.column" or "db:index"; empty when the
+    schema is current"""
+    missing = []
+    for name, engine in _engines():
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                missing.append(f"{name}:{table.name}")
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            missing.extend(
+                f"{name}:{table.name}.{column.name}"
+                for column in table.columns
+                if column.name not in columns
+            )
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            missing.extend(
+                f"{name}:{index.name}" for index in table.indexes if index.name not in indexes
+            )
+    return missing
+
+
+def migrate_db() -> List[str]:
+    """Create missing tables and indexes and add missing columns, returning
+    what was changed.
+
+    Only nullable columns, or ones with a server default, can be added to a
+    populated table; any other missing column raises RuntimeError before
+    anything is altered and needs an Alembic migration.
+    """
+    changes = []
+    for name, engine in _engines():
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+        added = []
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added.extend(
+                (table, column) for column in table.columns if column.name not in existing
+            )
+        required = [
+            f"{table.name}.{column.name}"
+            for table, column in added
+            if not column.nullable and column.server_default is None
+        ]
+        if required:
+            raise RuntimeError(
+                f"Cannot add NOT NULL columns without a server default to the "
+                f"{name} database: {', '.join(required)}"
+            )
+
+        Base.metadata.create_all(bind=engine)
+        changes.extend(
+            f"{name}:{table.name}"
+            for table in Base.metadata.sorted_tables
+            if table.name not in tables
+        )
+
+        with engine.begin() as connection:
+            for table, column in added:
+                definition = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+                changes.append(f"{name}:{table.name}.{column.name}")
+
+            # create_all only indexes the tables it creates
+            for table in Base.metadata.sorted_tables:
+                if table.name not in tables:
+                    continue
+                indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in indexes:
+                        index.create(connection)
+                        changes.append(f"{name}:{index.name}")
+    return changes
+
+
 def get_main_db() -> Generator[Session, None, None]:
     """Get database session for main database"""
     db = MainSessionLocal()
@@ -48,6 +183,22 @@ def get_cache_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_main_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get async session factory for main database"""
+    return MainAsyncSessionLocal
+
+
+def get_cache_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get async session factory for cache database"""
+    return CacheAsyncSessionLocal
+
+
 def get_engine(cache: bool = False) -> Engine:
     """Get database engine"""
     return cache_engine if cache else main_engine
+
+
+async def dispose_async_engines() -> None:
+    """Close pooled async connections on shutdown"""
+    await main_async_engine.dispose()
+    await cache_async_engine.dispose()
@@ -0,0 +1,21 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Bound parameters per statement, kept under Postgres' 32767 limit
+MAX_STATEMENT_PARAMS = 32000
+
+
+def upsert_insert(db: AsyncSession, model):
+    """Dialect-specific INSERT that supports ON CONFLICT clauses"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"ON CONFLICT upserts are not supported on {dialect}")
+
+
+def chunk_rows(rows: list, columns: int) -> list:
+    """Split rows so each multi-row statement stays under the parameter limit"""
+    size = max(1, MAX_STATEMENT_PARAMS // max(columns, 1))
+    return [rows[i : i + size] for i in range(0, len(rows), size)]
@@ -1,45 +1,87 @@
-import logging
-from fastapi import FastAPI
-from app.db.session import init_db
-from app.api.routes import admin, crawler, health, product, proxy
-
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(), logging.FileHandler("crawler.log")],
-)
-
-logger = logging.getLogger(__name__)
-
-
-app = FastAPI(title="E-commerce Crawler API")
-
-# Include routers
-app.include_router(crawler.router)
-app.include_router(product.router)
-app.include_router(proxy.router)
-app.include_router(health.router)
-app.include_router(admin.router)
-
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting application...")
-    try:
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database: {str(e)}", exc_info=True)
-        raise
-
-
-@app.get("/health")
-async def health_check():
-    logger.info("Health check requested")
-    return {"status": "healthy"}
-
-
-# Runs logging output to the console
-logging.basicConfig(level=logging.DEBUG)
+import asyncio
+import logging
+from fastapi import FastAPI
+from app.db.session import (
+    check_schema,
+    dispose_async_engines,
+    migrate_db,
+    CacheAsyncSessionLocal,
+)
+from app.accelerator.concurrent_manager import shutdown_process_pool
+from app.api.routes import admin, crawler, health, metrics, product, proxy
+from app.cache.url_cache import URLCache
+from app.crawler.jobs import crawl_jobs
+from app.config import settings
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(), logging.FileHandler("crawler.log")],
+)
+
+logger = logging.getLogger(__name__)
+
+
+app = FastAPI(title="E-commerce Crawler API")
+
+# Background expiry sweeper for the url_cache table
+url_cache_sweeper = URLCache(
+    CacheAsyncSessionLocal,
+    default_ttl=settings.URL_CACHE_DEFAULT_TTL,
+    domain_ttls=settings.URL_CACHE_DOMAIN_TTLS,
+)
+
+# Include routers
+app.include_router(crawler.router)
+app.include_router(product.router)
+app.include_router(proxy.router)
+app.include_router(health.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
+
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Starting application...")
+    try:
+        missing = check_schema()
+    except Exception as e:
+        logger.error(f"Error checking database schema: {str(e)}", exc_info=True)
+        raise
+
+    if missing and settings.AUTO_CREATE_SCHEMA:
+        logger.info(f"Migrating database schema: {', '.join(migrate_db())}")
+    elif missing:
+        logger.error(
+            f"Database schema is out of date, missing: {', '.join(missing)}. "
+            f"Run `python scripts/migrate_db.py` or set AUTO_CREATE_SCHEMA=true"
+        )
+        raise RuntimeError("Database schema is out of date")
+    else:
+        logger.info("Database schema is up to date")
+
+    if settings.URL_CACHE_SWEEP_INTERVAL > 0:
+        url_cache_sweeper.start_sweeper(
+            settings.URL_CACHE_SWEEP_INTERVAL, settings.URL_CACHE_SWEEP_CHUNK_SIZE
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await crawl_jobs.shutdown()
+    # Crawls share one process pool across requests; stop it last
+    await asyncio.to_thread(shutdown_process_pool)
+    await url_cache_sweeper.stop_sweeper()
+    await dispose_async_engines()
+
+
+@app.get("/health")
+async def health_check():
+    logger.info("Health check requested")
+    return {"status": "healthy"}
+
+
+# Runs logging output to the console
+logging.basicConfig(level=logging.DEBUG)
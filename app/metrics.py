@@ -0,0 +1,120 @@
+"""Prometheus metrics for the crawl pipeline, served at /metrics.
+
+Hot paths only touch label children bound ahead of time (per domain in
+DomainMetrics, per write target at import), so recording a sample is an
+attribute lookup and one value update, never a labels() call building and
+hashing a key.
+"""
+import time
+from typing import Dict
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Crawl frontier and fetching
+FETCH_SECONDS = Histogram(
+    "crawler_fetch_seconds",
+    "Page fetch latency by domain and fetch tier",
+    ["domain", "tier"],
+    buckets=LATENCY_BUCKETS,
+)
+PAGES = Counter("crawler_pages_total", "Pages crawled by outcome", ["domain", "outcome"])
+PAGES_UNCHANGED = Counter(
+    "crawler_pages_unchanged_total",
+    "Revisited pages found unchanged (304 or same content hash) and not parsed",
+    ["domain"],
+)
+PAGES_IN_FLIGHT = Gauge("crawler_pages_in_flight", "Pages being crawled right now")
+FRONTIER_DEPTH = Gauge("crawler_frontier_depth", "URLs queued per domain", ["domain"])
+RATE_LIMIT_SLEEP = Counter(
+    "crawler_rate_limit_sleep_seconds_total",
+    "Time crawl workers spent waiting on per-domain rate limits",
+)
+PRODUCTS_DISCOVERED = Counter(
+    "crawler_products_discovered_total", "New product URLs found", ["domain"]
+)
+
+# Browser page pool
+BROWSER_PAGES_OPEN = Gauge("browser_pages_open", "Pooled browser pages open")
+BROWSER_PAGES_RECYCLED = Counter(
+    "browser_pages_recycled_total", "Pooled browser pages closed and replaced"
+)
+
+# Database and cache writes
+WRITE_SECONDS = Histogram(
+    "db_write_seconds", "Batched write latency", ["target"], buckets=LATENCY_BUCKETS
+)
+WRITE_BATCH_ROWS = Histogram(
+    "db_write_batch_rows", "Rows per batched write", ["target"], buckets=BATCH_BUCKETS
+)
+
+# ConcurrentManager
+CONCURRENT_TASKS_ACTIVE = Gauge(
+    "concurrent_tasks_active", "Tasks holding a ConcurrentManager semaphore slot"
+)
+CONCURRENT_TASKS_LIMIT = Gauge(
+    "concurrent_tasks_limit", "Semaphore slots across live ConcurrentManagers"
+)
+CONCURRENT_WAIT_SECONDS = Histogram(
+    "concurrent_semaphore_wait_seconds",
+    "Time spent waiting for a ConcurrentManager semaphore slot",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+CONCURRENT_PENDING = Gauge(
+    "concurrent_calls_pending", "Calls submitted to an executor and not finished", ["mode"]
+)
+
+
+class WriteMetrics:
+    """Latency and batch size children for one write target"""
+
+    __slots__ = ("seconds", "rows")
+
+    def __init__(self, target: str):
+        self.seconds = WRITE_SECONDS.labels(target)
+        self.rows = WRITE_BATCH_ROWS.labels(target)
+
+    def observe(self, started: float, rows: int) -> None:
+        self.seconds.observe(time.perf_counter() - started)
+        self.rows.observe(rows)
+
+
+PRODUCT_WRITES = WriteMetrics("products")
+PRODUCT_UPDATES = WriteMetrics("product_updates")
+URL_CACHE_WRITES = WriteMetrics("url_cache")
+PENDING_THREAD = CONCURRENT_PENDING.labels("thread")
+PENDING_PROCESS = CONCURRENT_PENDING.labels("process")
+
+
+class DomainMetrics:
+    """Label children for one domain, bound on first use and then shared"""
+
+    __slots__ = (
+        "fetch_static",
+        "fetch_browser",
+        "pages_ok",
+        "pages_failed",
+        "pages_unchanged",
+        "frontier_depth",
+        "products",
+    )
+
+    def __init__(self, domain: str):
+        self.fetch_static = FETCH_SECONDS.labels(domain, "static")
+        self.fetch_browser = FETCH_SECONDS.labels(domain, "browser")
+        self.pages_ok = PAGES.labels(domain, "ok")
+        self.pages_failed = PAGES.labels(domain, "error")
+        self.pages_unchanged = PAGES_UNCHANGED.labels(domain)
+        self.frontier_depth = FRONTIER_DEPTH.labels(domain)
+        self.products = PRODUCTS_DISCOVERED.labels(domain)
+
+
+_domains: Dict[str, DomainMetrics] = {}
+
+
+def domain_metrics(domain: str) -> DomainMetrics:
+    metrics = _domains.get(domain)
+    if metrics is None:
+        metrics = _domains[domain] = DomainMetrics(domain)
+    return metrics
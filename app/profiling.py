@@ -0,0 +1,361 @@
+"""Per-crawl profiling: stage timings, a sampled event-loop profile and
+tracemalloc top allocations, written as artifacts per job.
+
+A CrawlProfiler is activated through a context variable for the duration
+of a crawl, so every task the crawl spawns (scheduler workers, write-behind
+flushes) reports into it, while other jobs on the same loop do not. Call
+sites wrap their work in `stage(name)`, which is a shared no-op context
+manager when no profiler is active.
+
+Two parts of a profile are process-wide rather than per crawl. The sampled
+event-loop profile covers everything on the loop, so when jobs overlap it
+includes the others' work (samples are tagged with the running task's
+coroutine to tell them apart). tracemalloc tracing is shared: it starts
+with the first active profiler and stops with the last, and the
+allocations and peak in a report include every job's.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stage names used by the crawler
+NAVIGATION = "navigation"
+LINK_EXTRACTION_JS = "link_extraction_js"
+STATIC_FETCH = "static_fetch"
+HTML_PARSE = "html_parse"
+CLASSIFICATION = "classification"
+URL_CACHE_WRITES = "url_cache_writes"
+PRODUCT_DB_WRITES = "product_db_writes"
+PAGE_STORE_WRITES = "page_store_writes"
+RATE_LIMIT_SLEEP = "rate_limit_sleep"
+
+IDLE = "<idle: waiting for I/O or timers>"
+# Event loop plumbing left out of sampled stacks
+ASYNCIO_PATH = os.sep + os.path.join("asyncio", "")
+SELECTORS_PATH = os.sep + "selectors.py"
+# asyncio's private loop -> running task map; samples are tagged
+# "<task unknown>" on Pythons without it
+_current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+
+_active: ContextVar[Optional["CrawlProfiler"]] = ContextVar("crawl_profiler", default=None)
+_NO_STAGE = nullcontext()
+
+# Profilers currently using tracemalloc, and whether one of them started it
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+
+def stage(name: str):
+    """Time a block against the active profiler's stage `name`"""
+    profiler = _active.get()
+    if profiler is None:
+        return _NO_STAGE
+    return _StageTimer(profiler.stages[name])
+
+
+def record(name: str, seconds: float) -> None:
+    """Add an already measured duration to the active profiler's stage `name`"""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.stages[name].add(seconds)
+
+
+def _acquire_tracemalloc(frames: int) -> None:
+    """Start tracing for the first profiler unless something else already is"""
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _tracemalloc_started = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    """Stop tracing once the last profiler is done, if a profiler started it"""
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+
+class _StageStats:
+    __slots__ = ("count", "wall", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.wall += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class _StageTimer:
+    __slots__ = ("stats", "started")
+
+    def __init__(self, stats: _StageStats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add(time.perf_counter() - self.started)
+        return False
+
+
+class _LoopSampler(threading.Thread):
+    """Samples the event loop thread's stack every `interval` seconds,
+    tagging each sample with the asyncio task that was running"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float):
+        super().__init__(name="crawl-profiler", daemon=True)
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            if frame.f_code.co_filename.endswith(SELECTORS_PATH):
+                # Blocked in select(): nothing ready to run
+                self.idle_samples += 1
+                self.stacks[(IDLE,)] += 1
+                continue
+            self.stacks[(self._task_name(),) + self._stack(frame)] += 1
+
+    def _stack(self, frame) -> Tuple[str, ...]:
+        """Root-first "module:function:line" frames of the running callback,
+        cut at the event loop and without asyncio's own frames"""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            if ASYNCIO_PATH in code.co_filename:
+                if code.co_name == "_run_once":
+                    break
+            else:
+                module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+                frames.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        frames.reverse()
+        return tuple(frames)
+
+    def _task_name(self) -> str:
+        # Read-only peek, safe under the GIL; asyncio.current_task() only
+        # works from the loop's own thread
+        if _current_tasks is None:
+            return "<task unknown>"
+        task = _current_tasks.get(self.loop)
+        if task is None:
+            return "<callback>"
+        coro = task.get_coro()
+        return f"task:{getattr(coro, '__qualname__', task.get_name())}"
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class CrawlProfiler:
+    """Collects one crawl's profile and writes it to `output_dir`.
+
+    Stage times are wall-clock time summed over every call, so stages that
+    run concurrently can add up to more than the crawl's duration; they
+    show where tasks waited (Chromium, the network, the database, rate
+    limits). The sampled profile shows where the event loop thread spent
+    its CPU time, and tracemalloc which lines allocated the memory still
+    held when the crawl ended.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        sample_interval: float = 0.005,
+        top: int = 25,
+        tracemalloc_frames: int = 1,
+    ):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.top = top
+        self.tracemalloc_frames = tracemalloc_frames
+        self.stages: Dict[str, _StageStats] = defaultdict(_StageStats)
+        self.report: Optional[Dict[str, Any]] = None
+        self._sampler: Optional[_LoopSampler] = None
+        self._tracing = False
+        self._token: Optional[Token] = None
+        self._wall = self._cpu = self._loop_cpu = 0.0
+
+    def start(self) -> None:
+        """Activate in the current context; call from the crawl's task"""
+        _acquire_tracemalloc(self.tracemalloc_frames)
+        self._tracing = True
+        self._token = _active.set(self)
+        self._sampler = _LoopSampler(asyncio.get_running_loop(), self.sample_interval)
+        self._sampler.start()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._loop_cpu = time.thread_time()
+
+    async def stop(self) -> Dict[str, Any]:
+        """Stop sampling, write the artifacts and return the report"""
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        loop_cpu = time.thread_time() - self._loop_cpu
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+
+        await asyncio.to_thread(self._sampler.stop)
+        snapshot, peak = None, 0
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        else:
+            # Stopped by something outside the profilers
+            logger.warning("tracemalloc was stopped during the crawl, skipping allocations")
+        if self._tracing:
+            _release_tracemalloc()
+            self._tracing = False
+
+        self.report = await asyncio.to_thread(
+            self._write, wall, cpu, loop_cpu, snapshot, peak
+        )
+        logger.info(f"Wrote crawl profile to {self.output_dir}")
+        return self.report
+
+    def _write(
+        self,
+        wall: float,
+        cpu: float,
+        loop_cpu: float,
+        snapshot: Optional[tracemalloc.Snapshot],
+        peak: int,
+    ) -> Dict[str, Any]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        sampler = self._sampler
+        artifacts = {
+            "report": os.path.join(self.output_dir, "report.json"),
+            "folded_stacks": os.path.join(self.output_dir, "loop.folded"),
+            "allocations": os.path.join(self.output_dir, "tracemalloc.txt"),
+        }
+
+        # Collapsed stacks, loadable by flamegraph.pl or speedscope
+        with open(artifacts["folded_stacks"], "w") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        statistics = []
+        if snapshot is not None:
+            statistics = snapshot.filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                )
+            ).statistics("lineno")
+        with open(artifacts["allocations"], "w") as f:
+            if snapshot is None:
+                f.write("tracemalloc was not tracing when the crawl ended\n")
+            for statistic in statistics[: self.top * 4]:
+                f.write(f"{statistic}\n")
+
+        report = {
+            "totals": {
+                "wall_seconds": wall,
+                "process_cpu_seconds": cpu,
+                "loop_thread_cpu_seconds": loop_cpu,
+                "loop_busy_fraction": (
+                    1 - sampler.idle_samples / sampler.samples if sampler.samples else None
+                ),
+                "samples": sampler.samples,
+                "tracemalloc_peak_mb": peak / (1024 * 1024) if snapshot is not None else None,
+            },
+            "stages": {
+                name: {
+                    "count": stats.count,
+                    "wall_seconds": stats.wall,
+                    "mean_ms": stats.wall / stats.count * 1000 if stats.count else None,
+                    "max_ms": stats.max * 1000,
+                    "share_of_wall": stats.wall / wall if wall else None,
+                }
+                for name, stats in sorted(
+                    self.stages.items(), key=lambda item: item[1].wall, reverse=True
+                )
+            },
+            "top_functions": self._top_functions(sampler),
+            "top_tasks": [
+                {"task": task, "samples": count}
+                for task, count in self._task_samples(sampler).most_common(self.top)
+            ],
+            "top_allocations": [
+                {
+                    "location": f"{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}",
+                    "size_kb": statistic.size / 1024,
+                    "count": statistic.count,
+                }
+                for statistic in statistics[: self.top]
+            ],
+            "artifacts": artifacts,
+        }
+        with open(artifacts["report"], "w") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def _top_functions(self, sampler: _LoopSampler) -> List[Dict[str, Any]]:
+        """Functions by samples on top of the stack (self) and anywhere in it"""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in sampler.stacks.items():
+            if stack == (IDLE,):
+                continue
+            own[stack[-1].rsplit(":", 1)[0]] += count
+            for function in {frame.rsplit(":", 1)[0] for frame in stack[1:]}:
+                inclusive[function] += count
+        total = sampler.samples or 1
+        return [
+            {
+                "function": function,
+                "self_fraction": own[function] / total,
+                "inclusive_fraction": inclusive[function] / total,
+            }
+            for function, _ in own.most_common(self.top)
+        ]
+
+    @staticmethod
+    def _task_samples(sampler: _LoopSampler) -> Counter:
+        tasks: Counter = Counter()
+        for stack, count in sampler.stacks.items():
+            if stack != (IDLE,):
+                tasks[stack[0]] += count
+        return tasks
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Totals, stages and artifact paths once the crawl has finished"""
+        if self.report is None:
+            return None
+        return {key: self.report[key] for key in ("totals", "stages", "artifacts")}
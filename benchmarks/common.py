@@ -0,0 +1,91 @@
+"""Helpers shared by the benchmark scripts: environment setup, summary
+statistics and JSON result files that compare.py can diff."""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from benchmarks.import_time import PROJECT_ROOT, benchmark_env
+
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+
+def configure_env() -> None:
+    """Let app.config load without a .env; call before importing app modules"""
+    for name, value in benchmark_env().items():
+        os.environ.setdefault(name, value)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    return {
+        "min": min(values) if values else None,
+        "median": percentile(values, 50),
+        "max": max(values) if values else None,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(suite: str, results: Dict[str, Any], path: Optional[str] = None) -> str:
+    """Write results with environment details; the default path is
+    benchmarks/results/<suite>-<timestamp>.json"""
+    if path is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = str(RESULTS_DIR / f"{suite}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump({"suite": suite, "environment": environment(), **results}, f, indent=2)
+    return path
+
+
+def print_table(rows: List[List[Any]], headers: List[str]) -> None:
+    cells = [headers] + [[_format(value) for value in row] for row in rows]
+    widths = [max(len(str(row[i])) for row in cells) for i in range(len(headers))]
+    for row in cells:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return "-" if value is None else str(value)
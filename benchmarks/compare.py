@@ -0,0 +1,59 @@
+"""Compare two benchmark result files.
+
+Prints every numeric metric the two files share with the relative change,
+skipping per-run details and configuration.
+
+    python -m benchmarks.compare benchmarks/results/crawl-A.json benchmarks/results/crawl-B.json
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict
+from benchmarks.common import print_table
+
+SKIPPED_KEYS = {"environment", "config", "options", "runs"}
+
+
+def flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    if isinstance(data, dict):
+        flat = {}
+        for key, value in data.items():
+            if not prefix and key in SKIPPED_KEYS:
+                continue
+            flat.update(flatten(value, f"{prefix}{key}."))
+        return flat
+    if isinstance(data, (int, float)) and not isinstance(data, bool):
+        return {prefix.rstrip("."): data}
+    return {}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline.get("suite") != candidate.get("suite"):
+        print(f"Warning: comparing {baseline.get('suite')} with {candidate.get('suite')}")
+
+    old, new = flatten(baseline), flatten(candidate)
+    rows = []
+    for metric in old:
+        if metric not in new:
+            continue
+        change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else None
+        rows.append([metric, old[metric], new[metric], None if change is None else f"{change:+.1f}%"])
+
+    for label, data in (("baseline", baseline), ("candidate", candidate)):
+        environment = data.get("environment", {})
+        print(f"{label}: {environment.get('commit')} at {environment.get('timestamp')}")
+    print_table(rows, ["metric", "baseline", "candidate", "change"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""End-to-end crawl benchmark against the synthetic shop.
+
+Starts benchmarks.shop_server in a subprocess, runs EcommerceCrawler over
+it with fresh SQLite databases each run, and reports pages/sec,
+products/sec, p50/p99 page latency, DB writes/sec, peak RSS and how many
+of the statically reachable products were found. Pages the static tier
+rejects (script-rendered or failing) fall back to the browser, so without
+Playwright installed they show up as errors. With --profile DIR each run
+also writes a crawl profile to DIR/run-<n>.
+
+    python -m benchmarks.crawl --runs 3 --categories 20 --latency-ms 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from benchmarks.common import (
+    configure_env,
+    peak_rss_mb,
+    percentile,
+    print_table,
+    summarize,
+    write_results,
+)
+from benchmarks.import_time import PROJECT_ROOT
+from benchmarks.shop_server import ShopConfig, add_config_arguments, config_to_args, parse_config
+
+configure_env()
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.crawler.factory import build_crawler
+from app.db.models.product import Base
+from app.profiling import CrawlProfiler
+
+METRICS = (
+    "pages",
+    "errors",
+    "products",
+    "recall",
+    "pages_per_second",
+    "products_per_second",
+    "p50_page_ms",
+    "p99_page_ms",
+    "db_writes_per_second",
+    "peak_rss_mb",
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(config: ShopConfig, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.shop_server", "--port", str(port)]
+        + config_to_args(config),
+        cwd=PROJECT_ROOT,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Shop server exited with {server.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Shop server did not start")
+
+
+async def crawl_once(
+    config: ShopConfig, domain: str, args: argparse.Namespace, profile_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    scratch = tempfile.mkdtemp(prefix="crawl-bench-")
+    main_engine = create_async_engine(f"sqlite+aiosqlite:///{scratch}/products.db")
+    cache_engine = create_async_engine(f"sqlite+aiosqlite:///{scratch}/cache.db")
+    for engine in (main_engine, cache_engine):
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    crawler = build_crawler(
+        async_sessionmaker(main_engine, expire_on_commit=False),
+        async_sessionmaker(cache_engine, expire_on_commit=False),
+        use_multiprocessing=args.multiprocessing,
+        use_sitemaps=config.sitemap,
+        max_concurrency=args.concurrency,
+        per_domain_concurrency=args.per_domain_concurrency,
+        requests_per_second=args.requests_per_second,
+        max_depth=config.pages_per_category + 1,
+        scheme="http",
+        profiler=CrawlProfiler(profile_dir) if profile_dir else None,
+    )
+
+    # Time every page the scheduler hands out, failures included
+    page_seconds: List[float] = []
+    errors = 0
+    crawl_page = crawler._crawl_page
+
+    async def timed_crawl_page(*page_args):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await crawl_page(*page_args)
+        except Exception:
+            errors += 1
+            raise
+        finally:
+            page_seconds.append(time.perf_counter() - started)
+
+    crawler._crawl_page = timed_crawl_page
+
+    if args.multiprocessing:
+        # Start the shared process pool outside the timed crawl, as a
+        # long-running API process would have it already
+        await crawler.concurrent_manager.run(len, "")
+
+    started = time.perf_counter()
+    try:
+        results = await crawler.crawl_domains([domain])
+    finally:
+        elapsed = time.perf_counter() - started
+        await main_engine.dispose()
+        await cache_engine.dispose()
+
+    found = {urlsplit(url).path for url in results[0]["product_urls"]}
+    reachable = config.reachable_products()
+    result = {
+        "seconds": elapsed,
+        "pages": len(page_seconds),
+        "errors": errors,
+        "products": len(found),
+        "products_reachable": len(reachable),
+        "products_total": config.total_products(),
+        "recall": len(found & reachable) / len(reachable) if reachable else None,
+        "pages_per_second": len(page_seconds) / elapsed,
+        "products_per_second": len(found) / elapsed,
+        "p50_page_ms": _ms(percentile(page_seconds, 50)),
+        "p99_page_ms": _ms(percentile(page_seconds, 99)),
+        "db_rows_written": crawler.product_writer.rows_written,
+        "db_batches_written": crawler.product_writer.batches_written,
+        "db_writes_per_second": crawler.product_writer.rows_written / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if crawler.profiler is not None:
+        result["profile_stage_seconds"] = {
+            name: stage["wall_seconds"] for name, stage in crawler.profiler.report["stages"].items()
+        }
+    return result
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+async def run(config: ShopConfig, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    port = free_port()
+    server = start_server(config, port)
+    try:
+        runs = []
+        for i in range(args.runs):
+            profile_dir = os.path.join(args.profile, f"run-{i + 1}") if args.profile else None
+            result = await crawl_once(config, f"127.0.0.1:{port}", args, profile_dir)
+            print(
+                f"run {i + 1}: {result['pages']} pages, {result['products']} products "
+                f"in {result['seconds']:.2f}s"
+            )
+            if profile_dir:
+                print(f"  profile: {os.path.relpath(profile_dir)}")
+                print_table(
+                    [[name, seconds] for name, seconds in result["profile_stage_seconds"].items()],
+                    ["stage", "seconds"],
+                )
+            runs.append(result)
+        return runs
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_config_arguments(parser)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--per-domain-concurrency", type=int, default=16)
+    parser.add_argument("--requests-per-second", type=float, default=1000.0)
+    parser.add_argument(
+        "--multiprocessing", action=argparse.BooleanOptionalAction, default=True
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--profile", default=None, help="Write crawl profiles under this directory")
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    config = parse_config(args)
+    runs = asyncio.run(run(config, args))
+
+    summary = {metric: summarize([r[metric] for r in runs if r[metric] is not None]) for metric in METRICS}
+    print_table(
+        [[metric, *summary[metric].values()] for metric in METRICS],
+        ["metric", "min", "median", "max"],
+    )
+    path = write_results(
+        "crawl",
+        {
+            "config": {**vars(config)},
+            "options": {
+                key: getattr(args, key)
+                for key in ("concurrency", "per_domain_concurrency", "requests_per_second", "multiprocessing")
+            },
+            "runs": runs,
+            "summary": summary,
+        },
+        args.json_path,
+    )
+    print(f"Results written to {os.path.relpath(path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
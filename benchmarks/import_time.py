@@ -0,0 +1,105 @@
+"""Cold-start import benchmark for the API process.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports the fastest total plus the slowest modules, so regressions such as
+a heavy library creeping back into the startup path show up in CI.
+
+    python benchmarks/import_time.py --module app.main --runs 5 --max-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Settings() refuses to load without these; any values will do for imports
+REQUIRED_ENV = ("ADMIN_USERNAME", "ADMIN_PASSWORD", "ADMIN_SECRET_KEY")
+
+
+def benchmark_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    scratch = tempfile.gettempdir()
+    env.setdefault("PRODUCT_DATABASE_URL", f"sqlite:///{scratch}/bench_products.db")
+    env.setdefault("CACHE_DATABASE_URL", f"sqlite:///{scratch}/bench_cache.db")
+    for name in REQUIRED_ENV:
+        env.setdefault(name, "benchmark")
+    return env
+
+
+def measure(module: str, env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Import `module` in a fresh interpreter; returns (total ms, per-module
+    (name, self us, cumulative us))"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.rstrip(), int(self_us), int(cumulative_us)))
+
+    # Top-level imports have no indentation; their cumulative times add up
+    total_us = sum(
+        cumulative
+        for name, _, cumulative in modules
+        if not name.startswith("  ")
+    )
+    return total_us / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail above this")
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    env = benchmark_env()
+    runs = [measure(args.module, env) for _ in range(args.runs)]
+    best_ms, modules = min(runs, key=lambda run: run[0])
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[: args.top]
+
+    print(f"import {args.module}: best {best_ms:.1f} ms over {args.runs} runs")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, self_us, cumulative_us in slowest:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name.strip()}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(
+                {
+                    "module": args.module,
+                    "runs_ms": [run[0] for run in runs],
+                    "best_ms": best_ms,
+                    "slowest": [
+                        {"module": name.strip(), "self_us": self_us, "cumulative_us": cumulative_us}
+                        for name, self_us, cumulative_us in slowest
+                    ],
+                },
+                f,
+                indent=2,
+            )
+
+    if args.max_ms is not None and best_ms > args.max_ms:
+        print(f"FAIL: {best_ms:.1f} ms exceeds the {args.max_ms:.1f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
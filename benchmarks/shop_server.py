@@ -0,0 +1,267 @@
+"""Deterministic synthetic e-commerce site for crawler benchmarks.
+
+Serves a home page linking to every category, paginated category listings
+(each page links to the next, so pagination depth is crawl depth) and
+product pages carrying JSON-LD and OpenGraph. A fraction of listing pages
+render their product grid from a script, invisible to static fetching;
+every page can be delayed and a fraction fail with 500. Which pages are
+slow, scripted or broken depends only on the seed and the path. Pages
+carry an ETag and answer a matching If-None-Match with 304.
+
+    python -m benchmarks.shop_server --port 8765 --categories 20 --latency-ms 20
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import asdict, dataclass
+from typing import List, Set
+from aiohttp import web
+
+HOME_PATHS = ("/", "/robots.txt", "/health")
+
+
+@dataclass
+class ShopConfig:
+    categories: int = 20
+    products_per_category: int = 120
+    pages_per_category: int = 5  # pagination depth
+    js_fraction: float = 0.1  # listing pages whose product grid is script-rendered
+    latency_ms: float = 20.0  # mean; each path gets 0.5x to 1.5x of it
+    error_rate: float = 0.01  # listing and product pages answering 500
+    sitemap: bool = False  # advertise a sitemap of every product in robots.txt
+    seed: int = 0
+
+    @property
+    def page_size(self) -> int:
+        return -(-self.products_per_category // self.pages_per_category)
+
+    def rng(self, path: str) -> random.Random:
+        return random.Random(f"{self.seed}:{path}")
+
+    def latency(self, path: str) -> float:
+        return self.latency_ms / 1000 * (0.5 + self.rng(path).random())
+
+    def fails(self, path: str) -> bool:
+        return path not in HOME_PATHS and self.rng(f"error:{path}").random() < self.error_rate
+
+    def scripted(self, path: str) -> bool:
+        return self.rng(f"js:{path}").random() < self.js_fraction
+
+    def category_path(self, category: int, page: int) -> str:
+        return f"/category/{category}?page={page}"
+
+    def product_ids(self, category: int, page: int) -> range:
+        start = category * self.products_per_category + (page - 1) * self.page_size
+        end = min(start + self.page_size, (category + 1) * self.products_per_category)
+        return range(start, end)
+
+    def total_products(self) -> int:
+        return self.categories * self.products_per_category
+
+    def reachable_products(self) -> Set[str]:
+        """Product paths a static crawler can discover: not behind a
+        script-rendered grid or a failing listing page (which also hides
+        every later page of that category)"""
+        reachable = set()
+        for category in range(self.categories):
+            for page in range(1, self.pages_per_category + 1):
+                path = self.category_path(category, page)
+                if self.fails(path):
+                    break
+                if not self.scripted(path):
+                    reachable.update(f"/product/{i}" for i in self.product_ids(category, page))
+        return reachable
+
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title>"
+        f"{head}</head><body>{body}</body></html>"
+    )
+
+
+def _nav(config: ShopConfig) -> str:
+    links = "".join(
+        f'<li><a href="{config.category_path(c, 1)}">Category {c}</a></li>'
+        for c in range(min(config.categories, 10))
+    )
+    return (
+        f'<nav><a href="/">Home</a><ul>{links}</ul>'
+        '<a href="/cart">Cart</a><a href="/account/login">Sign in</a>'
+        '<a href="/about">About</a></nav>'
+    )
+
+
+def build_app(config: ShopConfig) -> web.Application:
+    app = web.Application()
+    stats = {"requests": 0, "not_modified": 0}
+
+    @web.middleware
+    async def simulate(request: web.Request, handler):
+        stats["requests"] += 1
+        path = request.path_qs
+        await asyncio.sleep(config.latency(path))
+        if config.fails(path):
+            return web.Response(status=500, text="Internal Server Error")
+        response = await handler(request)
+        if response.status != 200 or not isinstance(response.body, bytes):
+            return response
+
+        etag = f'"{hashlib.md5(response.body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return response
+
+    app.middlewares.append(simulate)
+
+    async def home(request: web.Request) -> web.Response:
+        links = "".join(
+            f'<li><a href="{config.category_path(c, 1)}">Category {c}</a></li>'
+            for c in range(config.categories)
+        )
+        return web.Response(
+            text=_page("Synthetic shop", f"{_nav(config)}<ul>{links}</ul>"),
+            content_type="text/html",
+        )
+
+    async def category(request: web.Request) -> web.Response:
+        category_id = int(request.match_info["category"])
+        page = int(request.query.get("page", "1"))
+        if category_id >= config.categories or not 1 <= page <= config.pages_per_category:
+            raise web.HTTPNotFound()
+
+        products = [f"/product/{i}" for i in config.product_ids(category_id, page)]
+        if config.scripted(request.path_qs):
+            grid = (
+                '<div id="grid"></div><script>'
+                f"const products = {json.dumps(products)};"
+                "document.getElementById('grid').innerHTML = products"
+                ".map(p => `<a href=\"${p}\">${p}</a>`).join('');</script>"
+            )
+        else:
+            grid = "".join(f'<div class="card"><a href="{p}">{p}</a></div>' for p in products)
+
+        pager = f'<a href="{config.category_path(category_id, 1)}">First</a>'
+        if page < config.pages_per_category:
+            pager += f'<a rel="next" href="{config.category_path(category_id, page + 1)}">Next</a>'
+        return web.Response(
+            text=_page(
+                f"Category {category_id} - page {page}",
+                f"{_nav(config)}<main>{grid}</main><footer>{pager}</footer>",
+            ),
+            content_type="text/html",
+        )
+
+    async def product(request: web.Request) -> web.Response:
+        product_id = int(request.match_info["product"])
+        if product_id >= config.total_products():
+            raise web.HTTPNotFound()
+        rng = config.rng(f"product:{product_id}")
+        price = f"{rng.uniform(1, 500):.2f}"
+        data = {
+            "@context": "https://schema.org",
+            "@type": "Product",
+            "name": f"Product {product_id}",
+            "sku": f"SKU-{product_id}",
+            "brand": {"@type": "Brand", "name": f"Brand {product_id % 17}"},
+            "category": f"Category {product_id // config.products_per_category}",
+            "image": f"/images/{product_id}.jpg",
+            "offers": {"@type": "Offer", "price": price, "priceCurrency": "USD"},
+        }
+        head = (
+            f'<script type="application/ld+json">{json.dumps(data)}</script>'
+            f'<meta property="og:title" content="Product {product_id}">'
+            f'<meta property="product:price:amount" content="{price}">'
+        )
+        return web.Response(
+            text=_page(f"Product {product_id}", f"{_nav(config)}<h1>Product {product_id}</h1>", head),
+            content_type="text/html",
+        )
+
+    async def robots(request: web.Request) -> web.Response:
+        lines = ["User-agent: *", "Disallow: /cart", "Disallow: /account"]
+        if config.sitemap:
+            lines.append(f"Sitemap: {request.scheme}://{request.host}/sitemap-products.xml")
+        return web.Response(text="\n".join(lines) + "\n")
+
+    async def sitemap(request: web.Request) -> web.Response:
+        if not config.sitemap:
+            raise web.HTTPNotFound()
+        base = f"{request.scheme}://{request.host}"
+        urls = "".join(
+            f"<url><loc>{base}/product/{i}</loc></url>" for i in range(config.total_products())
+        )
+        return web.Response(
+            text=(
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+            ),
+            content_type="application/xml",
+        )
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({**stats, "config": asdict(config)})
+
+    app.router.add_get("/", home)
+    app.router.add_get("/category/{category:\\d+}", category)
+    app.router.add_get("/product/{product:\\d+}", product)
+    app.router.add_get("/robots.txt", robots)
+    app.router.add_get("/sitemap-products.xml", sitemap)
+    app.router.add_get("/health", health)
+    return app
+
+
+def parse_config(args: argparse.Namespace) -> ShopConfig:
+    return ShopConfig(
+        categories=args.categories,
+        products_per_category=args.products_per_category,
+        pages_per_category=args.pages_per_category,
+        js_fraction=args.js_fraction,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        sitemap=args.sitemap,
+        seed=args.seed,
+    )
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = ShopConfig()
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument(
+        "--products-per-category", type=int, default=defaults.products_per_category
+    )
+    parser.add_argument("--pages-per-category", type=int, default=defaults.pages_per_category)
+    parser.add_argument("--js-fraction", type=float, default=defaults.js_fraction)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--sitemap", action="store_true")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_to_args(config: ShopConfig) -> List[str]:
+    """Command-line arguments that reproduce config"""
+    args = []
+    for key, value in asdict(config).items():
+        flag = f"--{key.replace('_', '-')}"
+        if isinstance(value, bool):
+            args += [flag] if value else []
+        else:
+            args += [flag, str(value)]
+    return args
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(build_app(parse_config(args)), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Microbenchmarks for URLProcessor over a large synthetic URL corpus.
+
+Times normalize_url, filter_urls (page-sized batches and the whole corpus
+in one call) and classify_many, reporting the best URLs/sec over several
+runs.
+
+    python -m benchmarks.url_processor --urls 200000 --runs 5
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+from benchmarks.common import configure_env, print_table, write_results
+
+configure_env()
+
+from app.crawler.url_processor import URLProcessor
+
+DOMAIN = "shop.example.com"
+
+# (weight, path template); {n} is a random number, {w} a random word
+URL_SHAPES = [
+    (30, "/product/{n}"),
+    (10, "/p/{w}-{w}-{n}"),
+    (10, "/item-{w}-{n}?color={w}"),
+    (15, "/category/{w}?page={n}"),
+    (5, "/collections/{w}/{w}"),
+    (5, "/account/login?next=/product/{n}"),
+    (5, "/cart"),
+    (10, "/blog/{w}/{w}"),
+    (5, "/{w}/{w}/{n}/"),
+    (5, "/search?q={w}#results"),
+]
+WORDS = ["red", "shoe", "sale", "kids", "winter", "deal", "lamp", "desk", "blue", "mug"]
+
+
+def build_corpus(size: int, seed: int = 0) -> List[str]:
+    """Deterministic mix of absolute, relative, off-site, fragment and
+    trailing-slash URLs"""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in URL_SHAPES]
+    shapes = [shape for _, shape in URL_SHAPES]
+    corpus = []
+    for _ in range(size):
+        path = rng.choices(shapes, weights)[0]
+        while "{n}" in path or "{w}" in path:
+            path = path.replace("{n}", str(rng.randrange(10**6)), 1)
+            path = path.replace("{w}", rng.choice(WORDS), 1)
+        roll = rng.random()
+        if roll < 0.6:
+            corpus.append(f"https://{DOMAIN}{path}")
+        elif roll < 0.8:
+            corpus.append(path)
+        elif roll < 0.9:
+            corpus.append(f"https://cdn.other-site.net{path}")
+        else:
+            corpus.append(f"{DOMAIN}{path}")
+    return corpus
+
+
+def best_rate(func: Callable[[], Any], count: int, runs: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {"best_seconds": best, "urls_per_second": count / best, "runs": runs}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=500, help="Links per filter_urls call")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    processor = URLProcessor()
+    corpus = build_corpus(args.urls, args.seed)
+    pages = [set(corpus[i : i + args.page_size]) for i in range(0, len(corpus), args.page_size)]
+    normalized = [processor.normalize(url, DOMAIN) for url in corpus]
+    loop = asyncio.new_event_loop()
+
+    async def normalize_all():
+        for url in corpus:
+            await processor.normalize_url(url, DOMAIN)
+
+    async def filter_pages():
+        for page in pages:
+            await processor.filter_urls(page, DOMAIN)
+
+    benchmarks = {
+        "normalize_url": lambda: loop.run_until_complete(normalize_all()),
+        "filter_urls_per_page": lambda: loop.run_until_complete(filter_pages()),
+        "filter_urls_corpus": lambda: loop.run_until_complete(
+            processor.filter_urls(set(corpus), DOMAIN)
+        ),
+        "classify_many": lambda: processor.classify_many(normalized, DOMAIN),
+    }
+    results = {}
+    for name, func in benchmarks.items():
+        results[name] = best_rate(func, len(corpus), args.runs)
+    loop.close()
+
+    print(f"{len(corpus):,} URLs, best of {args.runs} runs")
+    print_table(
+        [[name, r["best_seconds"] * 1000, r["urls_per_second"]] for name, r in results.items()],
+        ["benchmark", "best ms", "urls/sec"],
+    )
+    path = write_results(
+        "url_processor",
+        {
+            "config": {"urls": args.urls, "page_size": args.page_size, "seed": args.seed},
+            "results": results,
+        },
+        args.json_path,
+    )
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import uuid
+from dotenv import load_dotenv
+from pathlib import Path
+
+
+# Setup environment first
+def setup_project_path():
+    """Add project root to Python path"""
+    project_root = str(Path(__file__).parent.parent)
+    sys.path.append(project_root)
+
+
+setup_project_path()
+load_dotenv()
+
+from app.config import settings
+from app.crawler.factory import build_crawler
+from app.crawler.frontier import create_frontier
+from app.db.session import (
+    CacheAsyncSessionLocal,
+    MainAsyncSessionLocal,
+    dispose_async_engines,
+)
+
+
+async def seed(frontier, domains):
+    queued = 0
+    for domain in domains:
+        queued += await frontier.push(domain, [(f"https://{domain}", 0)])
+    print(f"Queued {queued} of {len(domains)} domains")
+
+
+async def work(frontier, args):
+    worker_id = args.worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+    crawler = build_crawler(
+        MainAsyncSessionLocal,
+        CacheAsyncSessionLocal,
+        max_concurrency=args.max_concurrency,
+        per_domain_concurrency=args.per_domain_concurrency,
+        use_multiprocessing=False,
+        incremental=args.incremental,
+    )
+    try:
+        totals = await crawler.crawl_frontier(
+            frontier, worker_id, batch_size=args.batch_size
+        )
+    finally:
+        await dispose_async_engines()
+    print(f"Worker {worker_id} done: {json.dumps(totals)}")
+
+
+async def stats(frontier):
+    print(json.dumps(await frontier.stats(), indent=2))
+    print(f"Drained: {await frontier.is_drained()}")
+
+
+async def main(args):
+    frontier = create_frontier(
+        args.frontier,
+        lease_ttl=settings.FRONTIER_LEASE_TTL,
+        prefix=settings.FRONTIER_KEY_PREFIX,
+    )
+    try:
+        if args.command == "seed":
+            await seed(frontier, args.domains)
+        elif args.command == "work":
+            await work(frontier, args)
+        else:
+            await stats(frontier)
+    finally:
+        await frontier.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Seed, inspect or work a shared crawl frontier"
+    )
+    parser.add_argument("--frontier", default=settings.FRONTIER_URL)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Queue domains to crawl")
+    seed_parser.add_argument("domains", nargs="+")
+
+    work_parser = commands.add_parser("work", help="Crawl leased URLs until drained")
+    work_parser.add_argument("--worker-id", default=None)
+    work_parser.add_argument("--batch-size", type=int, default=settings.FRONTIER_BATCH_SIZE)
+    work_parser.add_argument(
+        "--max-concurrency", type=int, default=settings.CRAWL_MAX_CONCURRENCY
+    )
+    work_parser.add_argument(
+        "--per-domain-concurrency", type=int, default=settings.CRAWL_PER_DOMAIN_CONCURRENCY
+    )
+    work_parser.add_argument("--incremental", choices=["skip", "defer"], default=None)
+
+    commands.add_parser("stats", help="Show per-domain frontier counts")
+
+    asyncio.run(main(parser.parse_args()))
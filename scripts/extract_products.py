@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import json
+import sys
+from dotenv import load_dotenv
+from pathlib import Path
+
+
+# Setup environment first
+def setup_project_path():
+    """Add project root to Python path"""
+    project_root = str(Path(__file__).parent.parent)
+    sys.path.append(project_root)
+
+
+setup_project_path()
+load_dotenv()
+
+from app.crawler.factory import build_extractor
+from app.crawler.extractor import EXTRACTED, PENDING
+from app.db.session import CacheAsyncSessionLocal, MainAsyncSessionLocal, dispose_async_engines
+
+
+async def main(args):
+    extractor = build_extractor(MainAsyncSessionLocal, CacheAsyncSessionLocal)
+    try:
+        counts = await extractor.extract_pending(
+            args.domains or None,
+            limit=args.limit,
+            status=EXTRACTED if args.refresh else PENDING,
+        )
+    finally:
+        await extractor.close()
+        await dispose_async_engines()
+    print(f"Done: {json.dumps(counts)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract details for products still pending extraction"
+    )
+    parser.add_argument("domains", nargs="*", help="Only these domains (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many products")
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-extract already extracted products, skipping pages that haven't changed",
+    )
+    asyncio.run(main(parser.parse_args()))
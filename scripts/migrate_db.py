@@ -0,0 +1,36 @@
+import sys
+from dotenv import load_dotenv
+from pathlib import Path
+
+
+# Setup environment first
+def setup_project_path():
+    """Add project root to Python path"""
+    project_root = str(Path(__file__).parent.parent)
+    sys.path.append(project_root)
+
+
+setup_project_path()
+load_dotenv()
+
+from app.db.session import check_schema, migrate_db
+
+
+if __name__ == "__main__":
+    missing = check_schema()
+    if not missing:
+        print("Database schema is up to date")
+        sys.exit(0)
+
+    print(f"Missing from database schema: {', '.join(missing)}")
+    try:
+        changes = migrate_db()
+    except Exception as e:
+        print(f"Error migrating database schema: {str(e)}")
+        raise
+
+    print(f"Applied: {', '.join(changes)}")
+    still_missing = check_schema()
+    if still_missing:
+        print(f"Error: could not migrate {', '.join(still_missing)}")
+        sys.exit(1)
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import json
+import sys
+from dotenv import load_dotenv
+from pathlib import Path
+
+
+# Setup environment first
+def setup_project_path():
+    """Add project root to Python path"""
+    project_root = str(Path(__file__).parent.parent)
+    sys.path.append(project_root)
+
+
+setup_project_path()
+load_dotenv()
+
+from app.config import settings
+from app.crawler.factory import build_url_processor, get_page_store
+from app.crawler.replay import PageReplayer
+from app.db.repositories.product import ProductRepository
+from app.db.session import MainAsyncSessionLocal, dispose_async_engines
+
+
+async def main(args):
+    store = get_page_store()
+    print(f"Page store: {json.dumps(store.stats())}")
+    replayer = PageReplayer(
+        store,
+        build_url_processor(),
+        product_repo=ProductRepository(MainAsyncSessionLocal),
+        domain_selectors=settings.EXTRACTOR_DOMAIN_SELECTORS,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+    )
+    try:
+        results = await replayer.replay(
+            args.domains or None, extract=not args.no_extract, write=args.write
+        )
+    finally:
+        store.close()
+        await dispose_async_engines()
+
+    for domain, summary in results.items():
+        counts = {
+            key: len(value) if isinstance(value, list) else value
+            for key, value in summary.items()
+        }
+        print(f"{domain}: {json.dumps(counts)}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"URLs written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-run link classification and product extraction over stored pages"
+    )
+    parser.add_argument("domains", nargs="*", help="Only these domains (default: all)")
+    parser.add_argument("--no-extract", action="store_true", help="Only classify links")
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Add new product URLs and write extracted details to the database",
+    )
+    parser.add_argument("--output", help="Write each domain's product and category URLs here")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--batch-size", type=int, default=32, help="Pages per worker task")
+    asyncio.run(main(parser.parse_args()))
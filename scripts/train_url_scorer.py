@@ -0,0 +1,60 @@
+import argparse
+import sys
+from dotenv import load_dotenv
+from pathlib import Path
+
+
+# Setup environment first
+def setup_project_path():
+    """Add project root to Python path"""
+    project_root = str(Path(__file__).parent.parent)
+    sys.path.append(project_root)
+
+
+setup_project_path()
+load_dotenv()
+
+from sqlalchemy import select
+from app.accelerator.url_scorer import URLScorer
+from app.config import settings
+from app.db.models.product import Product, URLCache
+from app.db.session import CacheSessionLocal, MainSessionLocal
+
+
+def load_training_urls(limit: int):
+    """Products table URLs are positives; cached links that never became
+    products (categories, listings, rejected links) are negatives"""
+    main_db = MainSessionLocal()
+    cache_db = CacheSessionLocal()
+    try:
+        products = set(main_db.execute(select(Product.url).limit(limit)).scalars())
+        seen = cache_db.execute(select(URLCache.url).limit(limit * 2)).scalars()
+        rejected = [url for url in seen if url not in products]
+    finally:
+        main_db.close()
+        cache_db.close()
+    return sorted(products), rejected[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the product URL scorer")
+    parser.add_argument("--output", default=settings.URL_SCORER_MODEL_PATH)
+    parser.add_argument("--limit", type=int, default=500_000)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    positives, negatives = load_training_urls(args.limit)
+    print(f"Loaded {len(positives)} product URLs and {len(negatives)} rejected URLs")
+    if not positives or not negatives:
+        print("Error: need both product and rejected URLs to train")
+        sys.exit(1)
+
+    scorer = URLScorer(threshold=args.threshold)
+    scorer.fit(
+        positives + negatives,
+        [1] * len(positives) + [0] * len(negatives),
+        epochs=args.epochs,
+    )
+    scorer.save(args.output)
+    print(f"Saved URL scorer to {args.output}")
@@ -0,0 +1,99 @@
+"""Crawls of benchmarks.shop_server served in-process, against scratch
+SQLite databases, for tests of the whole crawler"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from aiohttp import web  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.cache.url_cache import URLCache  # noqa: E402
+from app.crawler.base import EcommerceCrawler  # noqa: E402
+from app.crawler.interfaces import IBrowserManager  # noqa: E402
+from app.crawler.url_processor import URLProcessor  # noqa: E402
+from app.db.models.product import Base  # noqa: E402
+from app.db.repositories.product import ProductRepository  # noqa: E402
+from benchmarks.shop_server import ShopConfig, build_app  # noqa: E402
+
+# Every page static and healthy, so crawls are deterministic and browser-free
+SHOP = ShopConfig(
+    categories=3,
+    products_per_category=12,
+    pages_per_category=3,
+    js_fraction=0,
+    latency_ms=0,
+    error_rate=0,
+)
+
+
+class NoBrowser(IBrowserManager):
+    """Every shop page is static, so the browser must never be needed"""
+
+    async def setup(self):
+        raise AssertionError("the browser should not be used")
+
+    async def cleanup(self):
+        pass
+
+    async def create_page(self):
+        raise AssertionError("the browser should not be used")
+
+    async def acquire_page(self):
+        raise AssertionError("the browser should not be used")
+
+    async def navigate(self, page, url, domain=None):
+        raise AssertionError("the browser should not be used")
+
+    async def release_page(self, page, failed=False):
+        pass
+
+
+@asynccontextmanager
+async def serve_shop(config: ShopConfig = SHOP) -> AsyncIterator[str]:
+    """Serve the shop on a free local port, yielding its domain"""
+    runner = web.AppRunner(build_app(config))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        yield "127.0.0.1:{}".format(site._server.sockets[0].getsockname()[1])
+    finally:
+        await runner.cleanup()
+
+
+@asynccontextmanager
+async def scratch_dbs(path) -> AsyncIterator[Tuple[async_sessionmaker, async_sessionmaker]]:
+    """Product and cache databases in directory path, kept between uses"""
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{path}/{name}.db")
+        for name in ("products", "cache")
+    ]
+    for engine in engines:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    try:
+        yield tuple(async_sessionmaker(engine, expire_on_commit=False) for engine in engines)
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+
+def shop_crawler(main_db, cache_db, ttl: int = 3600, **options) -> EcommerceCrawler:
+    return EcommerceCrawler(
+        url_processor=URLProcessor(),
+        browser_manager=NoBrowser(),
+        product_repo=ProductRepository(main_db),
+        url_cache=URLCache(cache_db, default_ttl=ttl),
+        **{
+            "use_multiprocessing": False,
+            "use_sitemaps": False,
+            "requests_per_second": 1000,
+            "burst": 1000,
+            "max_depth": SHOP.pages_per_category + 1,
+            "scheme": "http",
+            **options,
+        },
+    )
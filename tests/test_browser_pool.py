@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.crawler.browser_manager import PlaywrightManager
+
+
+class FakePage:
+    def __init__(self, broken=False):
+        self.broken = broken
+
+    async def evaluate(self, script):
+        if self.broken:
+            raise RuntimeError("page crashed")
+
+    async def goto(self, url, **kwargs):
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = 0
+
+    async def new_page(self):
+        if self.browser.fail_pages:
+            raise RuntimeError("no page")
+        return FakePage(self.browser.broken_pages)
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def clear_cookies(self):
+        pass
+
+    async def close(self):
+        self.closed += 1
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.fail_contexts = self.fail_pages = self.broken_pages = False
+
+    async def new_context(self):
+        if self.fail_contexts:
+            raise RuntimeError("browser gone")
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+
+def pages_open():
+    return REGISTRY.get_sample_value("browser_pages_open")
+
+
+def pooled_manager():
+    manager = PlaywrightManager(pool_size=1)
+    manager.browser = FakeBrowser()
+    return manager
+
+
+# A page released as failed, and one whose reset fails, are both recycled
+@pytest.mark.parametrize("failed,broken", [(True, False), (False, True)])
+def test_recycle_with_failed_replacement_closes_page_once(failed, broken):
+    async def main():
+        manager = pooled_manager()
+        opened = pages_open()
+        manager.browser.broken_pages = broken
+        page = await manager.acquire_page()
+        manager.browser.fail_contexts = True
+
+        await manager.release_page(page, failed=failed)
+        assert manager.pages_recycled == 1
+        assert [context.closed for context in manager.browser.contexts] == [1]
+        assert pages_open() == opened
+        assert manager._idle.get_nowait() is None
+
+        # The empty slot gets a new page once the browser recovers
+        manager._idle.put_nowait(None)
+        manager.browser.fail_contexts = manager.browser.broken_pages = False
+        await manager.acquire_page()
+        assert pages_open() == opened + 1
+
+    asyncio.run(main())
+
+
+def test_new_page_failure_closes_its_context():
+    async def main():
+        manager = pooled_manager()
+        manager.browser.fail_pages = True
+        with pytest.raises(RuntimeError):
+            await manager.acquire_page()
+        assert [context.closed for context in manager.browser.contexts] == [1]
+        assert manager._created == 0
+
+    asyncio.run(main())
@@ -0,0 +1,211 @@
+import asyncio
+import os
+from dataclasses import replace
+from urllib.parse import urlsplit
+
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.fingerprints import FingerprintSet
+from app.crawler.scheduler import CrawlScheduler
+from tests.shop import SHOP, scratch_dbs, serve_shop, shop_crawler
+
+SITEMAP_SHOP = replace(SHOP, sitemap=True)
+
+
+def test_resume_reseeds_domain_cut_off_while_seeding(tmp_path):
+    path = str(tmp_path / "crawl.ckpt")
+
+    def crawler(main_db, cache_db):
+        # Sitemaps never list enough to skip the BFS crawl from the root
+        return shop_crawler(
+            main_db,
+            cache_db,
+            use_sitemaps=True,
+            sitemap_min_products=10**6,
+            checkpoint=CrawlCheckpoint(path, interval=0.01),
+        )
+
+    async def main():
+        async with serve_shop(SITEMAP_SHOP) as domain, scratch_dbs(tmp_path) as dbs:
+            first = crawler(*dbs)
+            first.checkpoint.start([domain], {})
+            ingested = asyncio.Event()
+            ingest = first._ingest_sitemaps
+
+            async def ingest_then_die(*args):
+                await ingest(*args)
+                ingested.set()
+                await asyncio.Event().wait()  # killed before the root is pushed
+
+            first._ingest_sitemaps = ingest_then_die
+            task = asyncio.create_task(first.crawl_domains([domain]))
+            await ingested.wait()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            assert os.path.exists(path)
+            assert first.scheduler.domains[domain].pages_fetched == 0
+
+            second = crawler(*dbs)
+            results = await second.crawl_domains([domain])
+            return second.scheduler.domains[domain], results[0]
+
+    state, result = asyncio.run(main())
+    # The root and every listing below it are crawled after the resume
+    assert state.pages_fetched == 1 + SHOP.categories * SHOP.pages_per_category
+    assert {urlsplit(url).path for url in result["product_urls"]} == (
+        SITEMAP_SHOP.reachable_products()
+    )
+    assert not os.path.exists(path)
+
+
+def test_resume_from_journal_compacted_after_cancel(tmp_path):
+    path = str(tmp_path / "crawl.ckpt")
+
+    def crawler(dbs):
+        # Compacted on every flush, the last one after the cancel
+        return shop_crawler(
+            *dbs, checkpoint=CrawlCheckpoint(path, interval=0.01, compact_records=1)
+        )
+
+    async def main():
+        async with serve_shop() as domain, scratch_dbs(tmp_path) as dbs:
+            first = crawler(dbs)
+            first.checkpoint.start([domain], {})
+            task = asyncio.create_task(first.crawl_domains([domain]))
+            while not (first.scheduler and first.scheduler.domains[domain].pages_fetched >= 2):
+                await asyncio.sleep(0.001)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+            second = crawler(dbs)
+            results = await second.crawl_domains([domain])
+            return second.scheduler.domains[domain], results[0]
+
+    second, result = asyncio.run(main())
+    # Pages cancelled mid-fetch are pending again rather than counted
+    assert second.pages_fetched == 1 + SHOP.categories * SHOP.pages_per_category
+    assert {urlsplit(url).path for url in result["product_urls"]} == SHOP.reachable_products()
+
+
+def test_resume_of_crawl_keeping_product_fingerprints(tmp_path):
+    path = str(tmp_path / "crawl.ckpt")
+
+    def crawler(dbs, published):
+        # Compacted on every flush, so products come back from fingerprints
+        crawler = shop_crawler(
+            *dbs,
+            keep_results=False,
+            checkpoint=CrawlCheckpoint(path, interval=0.01, compact_records=1),
+        )
+        crawler.on_products = lambda domain, urls: published.extend(urls)
+        return crawler
+
+    async def main():
+        async with serve_shop() as domain, scratch_dbs(tmp_path) as dbs:
+            first_published, second_published = [], []
+            first = crawler(dbs, first_published)
+            first.checkpoint.start([domain], {})
+            task = asyncio.create_task(first.crawl_domains([domain]))
+            while len(first_published) < SHOP.products_per_category:
+                await asyncio.sleep(0.001)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+            # The compacted journal holds the products as fingerprints
+            scheduler = CrawlScheduler(seen=FingerprintSet(), products=FingerprintSet())
+            assert CrawlCheckpoint(path).restore(scheduler)
+            assert scheduler.domains[domain].products_found == len(first_published)
+            assert all(url in scheduler.products for url in first_published)
+            assert len(scheduler.products) == len(first_published)
+            scheduler.seen.close()
+            scheduler.products.close()
+
+            second = crawler(dbs, second_published)
+            results = await second.crawl_domains([domain])
+            state = second.scheduler.domains[domain]
+            return first_published, second_published, state, results[0]
+
+    first, second, state, result = asyncio.run(main())
+    paths = lambda urls: {urlsplit(url).path for url in urls}  # noqa: E731
+    # Products found before the crash are known again, so none is republished
+    assert not paths(first) & paths(second)
+    assert paths(first) | paths(second) == SHOP.reachable_products()
+    assert state.products_found == len(SHOP.reachable_products())
+    assert result["product_urls"] == []
+
+
+def journaled_crawl(path, compact_records):
+    """Crawl a.example's root, which links to three pages and two products;
+    one linked page fails, so it stays pending"""
+    root, failing = "https://a.example/", "https://a.example/c/3"
+
+    async def handler(scheduler, state, url, depth):
+        if url == root:
+            scheduler.push("a.example", "https://a.example/c/1", 1)
+            scheduler.push("a.example", "https://a.example/c/2", 1, deferred=True)
+            scheduler.push("a.example", failing, 1)
+            products = ["https://a.example/p/1", "https://a.example/p/2"]
+            state.product_urls.update(products)
+            state.products_found += len(products)
+            scheduler.checkpoint.record_products(state, products)
+        elif url == failing:
+            raise RuntimeError("server error")
+
+    async def main():
+        checkpoint = CrawlCheckpoint(path, interval=60, compact_records=compact_records)
+        checkpoint.start(["a.example"], {"max_depth": 2})
+        scheduler = CrawlScheduler(seen=FingerprintSet(), max_depth=2)
+        checkpoint.attach(scheduler)
+        scheduler.push("a.example", root, 0)
+        checkpoint.record_seeded("a.example")
+        await scheduler.run(lambda state, url, depth: handler(scheduler, state, url, depth))
+        await checkpoint.close()
+        scheduler.seen.close()
+
+    asyncio.run(main())
+
+
+def restored(path):
+    checkpoint = CrawlCheckpoint(path)
+    scheduler = CrawlScheduler(seen=FingerprintSet())
+    assert checkpoint.restore(scheduler)
+    state = scheduler.domains["a.example"]
+    seen = {url for url in ("https://a.example/", "https://a.example/c/1") if url in scheduler.seen}
+    scheduler.seen.close()
+    return {
+        "pages_fetched": state.pages_fetched,
+        "queue": list(state.queue),
+        "deferred": list(state.deferred),
+        "products": sorted(state.product_urls),
+        "products_found": state.products_found,
+        "seeded": checkpoint.seeded,
+        "seen": seen,
+    }
+
+
+def test_restore_of_appended_and_compacted_journals(tmp_path):
+    expected = {
+        "pages_fetched": 3,
+        "queue": [("https://a.example/c/3", 1)],  # the failed page
+        "deferred": [],
+        "products": ["https://a.example/p/1", "https://a.example/p/2"],
+        "products_found": 2,
+        "seeded": {"a.example"},
+        "seen": {"https://a.example/", "https://a.example/c/1"},
+    }
+
+    appended = str(tmp_path / "appended.ckpt")
+    journaled_crawl(appended, compact_records=10**6)
+    assert restored(appended) == expected
+
+    compacted = str(tmp_path / "compacted.ckpt")
+    journaled_crawl(compacted, compact_records=1)
+    assert restored(compacted) == expected
+    # The snapshot replaced the history: no DONE records are left
+    kinds = [line.split(",")[0] for line in open(compacted)]
+    assert '["d"' not in kinds and '["s"' in kinds
+
+    # A line torn by a crash mid-append is skipped
+    with open(appended, "a") as f:
+        f.write('["p","a.example","https://a.example/c/')
+    assert restored(appended) == expected
+    assert CrawlCheckpoint.read_header(appended)["completed"] is False
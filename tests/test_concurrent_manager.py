@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import threading
+import time
+
+from prometheus_client import REGISTRY
+
+from app.accelerator.concurrent_manager import ConcurrentManager
+
+
+class Gauge:
+    """Counts calls running at once, from any thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = self.peak = 0
+
+    def __call__(self, item):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return item
+
+
+def waiting_seconds_count():
+    return REGISTRY.get_sample_value("concurrent_semaphore_wait_seconds_count") or 0
+
+
+def test_thread_calls_and_map_chunks_share_max_tasks():
+    async def main():
+        manager = ConcurrentManager(max_workers=8, max_tasks=2, use_multiprocessing=False)
+        waits = waiting_seconds_count()
+        calls = Gauge()
+        assert await asyncio.gather(*(manager.run(calls, i) for i in range(8))) == list(range(8))
+        chunks = Gauge()
+        assert await manager.map(chunks, list(range(8)), chunk_size=1) == list(range(8))
+        await manager.cleanup()
+        return calls.peak, chunks.peak, waiting_seconds_count() - waits
+
+    calls_peak, chunks_peak, waits = asyncio.run(main())
+    assert calls_peak == 2
+    assert chunks_peak == 2
+    assert waits == 16
+
+
+def stream(items, **options):
+    async def main():
+        manager = ConcurrentManager(max_tasks=8, use_multiprocessing=False)
+        try:
+            return [result async for result in manager.stream_map(items=items, **options)]
+        finally:
+            await manager.cleanup()
+
+    return asyncio.run(main())
+
+
+async def slow_square(n):
+    # Later items finish first
+    await asyncio.sleep((5 - n) * 0.02)
+    return n * n
+
+
+def test_stream_map_ordered_and_unordered():
+    ordered = stream(range(5), func=slow_square)
+    assert [(result.item, result.value) for result in ordered] == [(n, n * n) for n in range(5)]
+
+    unordered = stream(range(5), func=slow_square, ordered=False, max_in_flight=5)
+    assert [result.item for result in unordered] == [4, 3, 2, 1, 0]
+
+
+def test_stream_map_pulls_only_max_in_flight_items_ahead():
+    pulled = []
+    seen_when_yielded = []
+
+    async def source():
+        for n in range(10):
+            pulled.append(n)
+            yield n
+
+    async def main():
+        manager = ConcurrentManager(max_tasks=8, use_multiprocessing=False)
+        async for result in manager.stream_map(slow_square, source(), max_in_flight=2):
+            seen_when_yielded.append((result.item, len(pulled)))
+        await manager.cleanup()
+
+    asyncio.run(main())
+    # The window refills before each result is handed out
+    assert seen_when_yielded == [(n, min(n + 2, 10)) for n in range(10)]
+
+
+def test_stream_map_records_errors_per_item():
+    def invert(n):
+        return 1 / n
+
+    results = stream([2, 0, 4], func=invert)
+    assert [result.value for result in results] == [0.5, None, 0.25]
+    assert isinstance(results[1].error, ZeroDivisionError)
+    assert results[0].error is None and results[2].error is None
+
+
+def test_stream_map_per_batch():
+    batches = []
+
+    def double_all(batch):
+        batches.append(list(batch))
+        return [n * 2 for n in batch]
+
+    results = stream(range(7), func=double_all, per_batch=True, batch_size=3)
+    assert [result.value for result in results] == [n * 2 for n in range(7)]
+    assert sorted(batches) == [[0, 1, 2], [3, 4, 5], [6]]
+
+    # A batch function returning the wrong number of results fails its items
+    results = stream(range(4), func=lambda batch: batch[:1], per_batch=True, batch_size=2)
+    assert all(isinstance(result.error, ValueError) for result in results)
+
+
+def test_stream_map_stopped_early_closes_source_and_cancels_calls():
+    closed = []
+    cancelled = []
+
+    async def source():
+        try:
+            for n in range(100):
+                yield n
+        finally:
+            closed.append(True)
+
+    async def wait(n):
+        try:
+            await asyncio.sleep(0 if n == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return n
+
+    async def main():
+        manager = ConcurrentManager(max_tasks=8, use_multiprocessing=False)
+        async with contextlib.aclosing(manager.stream_map(wait, source(), max_in_flight=4)) as results:
+            async for result in results:
+                assert result.value == 0
+                break
+        await manager.cleanup()
+
+    asyncio.run(main())
+    # The window refills only once the consumer asks for more
+    assert closed == [True]
+    assert sorted(cancelled) == [1, 2, 3]
@@ -0,0 +1,115 @@
+import pytest
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.crawler import factory  # noqa: E402
+from app.crawler.url_classifier import EXCLUDED, OTHER, PRODUCT  # noqa: E402
+
+URL = "https://shop.example/product/1"
+
+
+def build_crawler(path):
+    main_db = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}/products.db"))
+    cache_db = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}/cache.db"))
+    return factory.build_crawler(main_db, cache_db)
+
+
+def test_seen_store_per_job_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_FINGERPRINT_PATH", str(tmp_path / "{job_id}.fp"))
+    monkeypatch.setattr(settings, "CRAWL_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+
+    store = factory.build_seen_store("job-1")
+    assert store.stats()["path"] == str(tmp_path / "job-1.fp")
+    store.add(URL)
+    store.close()
+
+    reopened = factory.build_seen_store("job-1")
+    assert URL in reopened
+    reopened.close()
+    other = factory.build_seen_store("job-2")
+    assert URL not in other
+    other.close()
+
+    # Resuming rebuilds the table from the checkpoint, which may be behind it
+    resumed = factory.build_seen_store("job-1", resuming=True)
+    assert len(resumed) == 0
+    resumed.close()
+
+
+def test_seen_store_shared_between_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_FINGERPRINT_PATH", str(tmp_path / "seen.fp"))
+
+    first = factory.build_seen_store("job-1")
+    second = factory.build_seen_store("job-2", resuming=True)
+    first.add(URL)
+    assert URL in second
+    assert not second.add(URL)
+    first.close()
+    second.close()
+
+
+def test_seen_store_anonymous_without_path(monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_FINGERPRINT_PATH", "")
+
+    store = factory.build_seen_store("job-1")
+    assert store.stats()["path"] is None
+    store.close()
+
+
+def test_domain_navigation_profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BROWSER_WAIT_UNTIL", "load")
+    monkeypatch.setattr(
+        settings,
+        "BROWSER_DOMAIN_PROFILES",
+        {
+            "spa.example": {
+                "wait_until": "commit",
+                "ready_selector": "#app .product",
+                "blocked_resource_types": ["image", "stylesheet"],
+            },
+        },
+    )
+    crawler = build_crawler(tmp_path)
+    browser = crawler.browser_manager
+
+    spa = browser.profile_for("spa.example")
+    assert spa.wait_until == "commit"
+    assert spa.ready_selector == "#app .product"
+    assert spa.blocked_resource_types == frozenset({"image", "stylesheet"})
+    assert spa.blocked_hosts == browser.profile.blocked_hosts
+
+    other = browser.profile_for("shop.example")
+    assert other.wait_until == "load"
+    assert other.ready_selector is None
+
+
+def test_domain_navigation_profile_rejects_unknown_fields(monkeypatch):
+    monkeypatch.setattr(
+        settings, "BROWSER_DOMAIN_PROFILES", {"spa.example": {"wait_for": "load"}}
+    )
+    with pytest.raises(ValueError, match="spa.example"):
+        factory._domain_navigation_profiles(factory._navigation_profile())
+
+
+def test_url_domain_rules(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        settings, "URL_DOMAIN_RULES", {"shop.example": {"product_patterns": [r"/sku/\d+$"]}}
+    )
+    processor = build_crawler(tmp_path).url_processor
+    urls = ["https://{}/sku/12", "https://{}/product/12", "https://{}/cart"]
+
+    labels = processor.classify_many([url.format("shop.example") for url in urls], "shop.example")
+    assert labels == [PRODUCT, OTHER, EXCLUDED]
+    labels = processor.classify_many([url.format("other.example") for url in urls], "other.example")
+    assert labels == [OTHER, PRODUCT, EXCLUDED]
+
+
+def test_url_domain_rules_rejects_bad_patterns(monkeypatch):
+    monkeypatch.setattr(settings, "URL_DOMAIN_RULES", {"shop.example": {"product_patterns": ["("]}})
+    with pytest.raises(ValueError, match="shop.example"):
+        factory.build_url_processor()
@@ -0,0 +1,68 @@
+import os
+
+from app.crawler.fingerprints import HEADER_SIZE, FingerprintSet
+
+
+def urls(n):
+    return [f"https://shop.example/product/{i}" for i in range(n)]
+
+
+def test_reopen_after_grow(tmp_path):
+    path = str(tmp_path / "seen.fp")
+    store = FingerprintSet(path, capacity=16)
+    assert store.add_many(urls(200)) == 200
+    assert store.capacity > 16
+    capacity = store.capacity
+    store.close()
+
+    assert os.path.getsize(path) == HEADER_SIZE + capacity * 8
+    assert not os.path.exists(f"{path}.grow")
+
+    reopened = FingerprintSet(path, capacity=16)
+    assert reopened.capacity == capacity
+    assert len(reopened) == 200
+    assert all(url in reopened for url in urls(200))
+    assert "https://shop.example/product/200" not in reopened
+    assert not reopened.add(urls(1)[0])
+    reopened.close()
+
+
+def test_crash_during_grow_keeps_old_table(tmp_path):
+    path = str(tmp_path / "seen.fp")
+    store = FingerprintSet(path, capacity=16)
+    store.add_many(urls(10))
+    store.close()
+
+    # A grow that died before its rename leaves only a partial new file
+    with open(f"{path}.grow", "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+
+    reopened = FingerprintSet(path)
+    assert len(reopened) == 10
+    assert all(url in reopened for url in urls(10))
+    reopened.add_many(urls(100))
+    assert len(reopened) == 100
+    reopened.close()
+
+
+def test_shared_store_sees_growth_by_another_handle(tmp_path):
+    path = str(tmp_path / "seen.fp")
+    first = FingerprintSet(path, capacity=16, shared=True)
+    second = FingerprintSet(path, shared=True)
+    first.add_many(urls(100))
+
+    assert second.capacity == 16
+    assert urls(1)[0] in second
+    assert second.capacity == first.capacity
+    assert not second.add(urls(2)[1])
+    assert second.add("https://shop.example/new")
+    assert "https://shop.example/new" in first
+    first.close()
+    second.close()
+
+
+def test_anonymous_store_grows(tmp_path):
+    store = FingerprintSet(capacity=16)
+    assert store.add_many(urls(100)) == 100
+    assert all(url in store for url in urls(100))
+    store.close()
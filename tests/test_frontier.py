@@ -0,0 +1,168 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.crawler import frontier as frontier_module
+from app.crawler.frontier import LeaseScheduler, create_frontier
+
+TTL = 60.0
+
+
+class Clock:
+    """Stands in for time.time() in the frontier module"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(frontier_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def frontier_url(request, tmp_path):
+    if request.param == "memory":
+        return "memory://"
+    return f"sqlite:///{tmp_path / 'frontier.db'}"
+
+
+def run(frontier_url, scenario):
+    async def main():
+        frontier = create_frontier(frontier_url, lease_ttl=TTL)
+        try:
+            return await scenario(frontier)
+        finally:
+            await frontier.close()
+
+    return asyncio.run(main())
+
+
+def urls(domain, n, depth=0):
+    return [(f"https://{domain}/page/{i}", depth) for i in range(n)]
+
+
+def test_push_drops_urls_seen_before(clock, frontier_url):
+    async def scenario(frontier):
+        assert await frontier.push("a.example", urls("a.example", 3)) == 3
+        assert await frontier.push("a.example", urls("a.example", 5)) == 2
+        lease = await frontier.lease("w1", 10)
+        assert await frontier.complete(lease)
+        # Done URLs stay seen
+        assert await frontier.push("a.example", urls("a.example", 5)) == 0
+        return lease
+
+    lease = run(frontier_url, scenario)
+    assert lease.items == urls("a.example", 5)
+
+
+def test_one_lease_per_domain(clock, frontier_url):
+    async def scenario(frontier):
+        await frontier.push("a.example", urls("a.example", 5))
+        await frontier.push("b.example", urls("b.example", 2))
+
+        first = await frontier.lease("w1", 3)
+        second = await frontier.lease("w2", 3)
+        # Both domains are held, although a.example has URLs left
+        assert await frontier.lease("w3", 3) is None
+        stats = await frontier.stats()
+
+        assert await frontier.complete(first)
+        third = await frontier.lease("w3", 3)
+        assert await frontier.complete(second)
+        assert await frontier.complete(third)
+        return first, second, third, stats, await frontier.stats(), await frontier.is_drained()
+
+    first, second, third, leased, done, drained = run(frontier_url, scenario)
+    assert {first.domain, second.domain} == {"a.example", "b.example"}
+    a = first if first.domain == "a.example" else second
+    assert a.items == urls("a.example", 3)
+    assert third.domain == "a.example"
+    assert third.items == urls("a.example", 5)[3:]
+    assert leased["a.example"] == {"pending": 2, "leased": 3, "done": 0}
+    assert done["a.example"] == {"pending": 0, "leased": 0, "done": 5}
+    assert done["b.example"] == {"pending": 0, "leased": 0, "done": 2}
+    assert drained
+
+
+def test_expired_lease_is_requeued(clock, frontier_url):
+    async def scenario(frontier):
+        await frontier.push("a.example", urls("a.example", 3))
+        stale = await frontier.lease("w1", 2)
+        assert not await frontier.is_drained()
+
+        clock.now += TTL + 1
+        retry = await frontier.lease("w2", 10)
+        # The first worker finishing late no longer counts
+        assert not await frontier.complete(stale)
+        assert await frontier.complete(retry)
+        return stale, retry, await frontier.is_drained()
+
+    stale, retry, drained = run(frontier_url, scenario)
+    assert retry.domain == "a.example"
+    # Requeued URLs come back ahead of those never leased
+    assert retry.items == stale.items + urls("a.example", 3)[2:]
+    assert drained
+
+
+def test_requeue_expired_counts_urls(clock, frontier_url):
+    async def scenario(frontier):
+        await frontier.push("a.example", urls("a.example", 3))
+        await frontier.push("b.example", urls("b.example", 1))
+        await frontier.lease("w1", 2)
+        await frontier.lease("w1", 2)
+        assert await frontier.requeue_expired() == 0
+        clock.now += TTL
+        requeued = await frontier.requeue_expired()
+        return requeued, await frontier.stats()
+
+    requeued, stats = run(frontier_url, scenario)
+    assert requeued == 3
+    assert stats["a.example"] == {"pending": 3, "leased": 0, "done": 0}
+    assert stats["b.example"] == {"pending": 1, "leased": 0, "done": 0}
+
+
+def test_heartbeat_extends_only_that_workers_leases(clock, frontier_url):
+    async def scenario(frontier):
+        await frontier.push("a.example", urls("a.example", 2))
+        await frontier.push("b.example", urls("b.example", 2))
+        alive = await frontier.lease("w1", 10)
+        dead = await frontier.lease("w2", 10)
+
+        clock.now += TTL * 0.75
+        await frontier.heartbeat("w1")
+        clock.now += TTL * 0.75
+        requeued = await frontier.requeue_expired()
+        return alive, dead, requeued, await frontier.complete(alive), await frontier.complete(dead)
+
+    alive, dead, requeued, alive_completed, dead_completed = run(frontier_url, scenario)
+    assert requeued == len(dead.items)
+    assert alive_completed
+    assert not dead_completed
+
+
+def test_lease_scheduler_sends_new_links_to_the_outbox():
+    lease = frontier_module.FrontierLease(
+        "lease", "w1", "a.example", urls("a.example", 2), expires_at=0.0
+    )
+
+    async def main():
+        scheduler = LeaseScheduler(lease, max_depth=1)
+        pushed = [
+            scheduler.push("a.example", "https://a.example/page/0", 1),  # leased already
+            scheduler.push("a.example", "https://a.example/new", 1),
+            scheduler.push("a.example", "https://a.example/new", 1),
+            scheduler.push("a.example", "https://a.example/deep", 2),
+        ]
+        return scheduler, pushed
+
+    scheduler, pushed = asyncio.run(main())
+    assert pushed == [False, True, False, False]
+    assert dict(scheduler.outbox) == {"a.example": [("https://a.example/new", 1)]}
+    assert list(scheduler.domains["a.example"].queue) == urls("a.example", 2)
@@ -0,0 +1,35 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import pytest
+
+from tests.shop import SHOP, scratch_dbs, serve_shop, shop_crawler
+
+
+async def crawl(main_db, cache_db, domain, incremental, ttl):
+    crawler = shop_crawler(main_db, cache_db, ttl, incremental=incremental)
+    results = await crawler.crawl_domains([domain])
+    state = crawler.scheduler.domains[domain]
+    products = {urlsplit(url).path for url in results[0]["product_urls"]}
+    return products, state.pages_fetched, state.pages_unchanged
+
+
+# Skip mode drops fresh URLs outright, so it only revisits below the root
+# once they have gone stale
+@pytest.mark.parametrize("incremental,ttl", [("defer", 3600), ("skip", 0)])
+def test_recrawl_follows_links_of_unchanged_pages(tmp_path, incremental, ttl):
+    async def main():
+        async with serve_shop() as domain, scratch_dbs(tmp_path) as (main_db, cache_db):
+            first = await crawl(main_db, cache_db, domain, incremental, ttl)
+            second = await crawl(main_db, cache_db, domain, incremental, ttl)
+        return first, second
+
+    (products, pages, unchanged), (reproducts, repages, reunchanged) = asyncio.run(main())
+    assert products == SHOP.reachable_products()
+    assert unchanged == 0
+
+    # Every page comes back 304, and their stored links still lead to the
+    # pages and products below them
+    assert reproducts == products
+    assert repages == pages
+    assert reunchanged == repages
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.fingerprints import FingerprintSet
+from app.crawler.jobs import CANCELLED, CrawlJobManager
+from tests.shop import SHOP, scratch_dbs, serve_shop, shop_crawler
+
+
+def test_cancel_before_job_starts_finishes_it(tmp_path):
+    path = str(tmp_path / "crawl.ckpt")
+
+    async def main():
+        async with scratch_dbs(tmp_path) as dbs:
+            checkpoint = CrawlCheckpoint(path)
+            checkpoint.start(["shop.example"], {})
+            crawler = shop_crawler(*dbs, checkpoint=checkpoint)
+            jobs = CrawlJobManager(max_finished=0)
+
+            job = jobs.submit(["shop.example"], crawler)
+            stream = job.stream(stats_interval=60)
+            # Cancelled before the task's first step, so run() never starts
+            await jobs.cancel(job.id)
+            frames = [frame async for frame in stream]
+            return jobs, job, crawler, frames
+
+    jobs, job, crawler, frames = asyncio.run(main())
+    assert job.status == CANCELLED
+    assert job.finished_at is not None
+    assert job.crawler is None and crawler.on_products is None
+    assert jobs.get(job.id) is None  # pruned like any finished job
+    assert frames[-1]["event"] == "done"
+    # The journal's header was written, so the job can be resumed
+    assert CrawlCheckpoint.read_header(path)["completed"] is False
+
+
+def test_stream_drops_urls_a_slow_subscriber_falls_behind_on(tmp_path):
+    async def main():
+        async with serve_shop() as domain, scratch_dbs(tmp_path) as dbs:
+            crawler = shop_crawler(*dbs, keep_results=False)
+            jobs = CrawlJobManager()
+            job = jobs.submit([domain], crawler)
+            stream = job.stream(stats_interval=60, max_pending=5)
+            await job.task  # nothing is read until the crawl is over
+            frames = [frame async for frame in stream]
+            return job, crawler, frames
+
+    job, crawler, frames = asyncio.run(main())
+    products = [url for frame in frames if frame["event"] == "products" for url in frame["urls"]]
+    done = frames[-1]
+    assert len(products) == 5
+    assert done["dropped"] == len(SHOP.reachable_products()) - 5
+    assert done["products_found"] == len(SHOP.reachable_products())
+    # Streamed products aren't kept: the job has no results and the crawl
+    # only their fingerprints
+    assert job.results is None
+    assert isinstance(crawler.scheduler.domains[done["domains"][0]].product_urls, FingerprintSet)
@@ -0,0 +1,99 @@
+import os
+
+from app.crawler.page_store import (
+    PRODUCT_PAGE,
+    RECORD,
+    PageStore,
+    SegmentReader,
+    read_location,
+)
+
+
+def page(i):
+    return f"<html><body><h1>Product {i}</h1>{'<p>filler</p>' * 50}</body></html>"
+
+
+def test_round_trip_and_dedup(tmp_path):
+    store = PageStore(str(tmp_path))
+    digest = store.put_page("https://shop.example/p/1", "shop.example", page(1))
+    # The same body under another URL is stored once
+    assert store.put_page("https://shop.example/p/1?ref=x", "shop.example", page(1)) == digest
+    other = store.put_page("https://other.example/p/2", "other.example", page(2), PRODUCT_PAGE)
+
+    assert len(store) == 2
+    assert digest in store
+    assert store.get(digest) == page(1)
+    assert store.get(other) == page(2)
+    assert store.get("00" * 16) is None
+    stats = store.stats()
+    assert stats["bodies"] == 2
+    assert stats["raw_bytes"] == 2 * len(page(1))
+    assert stats["compression_ratio"] > 1
+    store.close()
+
+
+def test_reopen_and_manifest(tmp_path):
+    store = PageStore(str(tmp_path))
+    store.put_page("https://shop.example/p/1", "shop.example", page(1))
+    store.put_page("https://other.example/p/2", "other.example", page(2), PRODUCT_PAGE)
+    latest = store.put_page("https://shop.example/p/1", "shop.example", page(3))
+    store.close()
+
+    reopened = PageStore(str(tmp_path))
+    entries = {entry.url: entry for entry in reopened.manifest()}
+    # Only the latest body of a URL is listed
+    assert entries["https://shop.example/p/1"].digest == latest
+    assert reopened.get(latest) == page(3)
+    assert entries["https://other.example/p/2"].role == PRODUCT_PAGE
+    assert [entry.url for entry in reopened.manifest(["other.example"])] == [
+        "https://other.example/p/2"
+    ]
+    reopened.close()
+
+
+def test_segments_roll_over(tmp_path):
+    # Every body fills a segment
+    store = PageStore(str(tmp_path), segment_size=1)
+    digests = [store.put(page(i)) for i in range(5)]
+    assert store.stats()["segments"] == 5
+    assert [store.get(digest) for digest in digests] == [page(i) for i in range(5)]
+    store.close()
+
+    # Another process needs only the path and a location
+    reopened = PageStore(str(tmp_path), segment_size=1)
+    location = reopened.locate(digests[3])
+    reopened.close()
+    assert location.segment == 4
+    assert read_location(str(tmp_path), location) == page(3)
+    reader = SegmentReader(str(tmp_path))
+    assert reader.read(location) == page(3)
+    reader.close()
+
+
+def test_recovers_unindexed_pages_and_drops_torn_ones(tmp_path):
+    store = PageStore(str(tmp_path))
+    kept = store.put(page(1))
+    lost = store.put(page(2))
+    store.close()
+
+    index_path = tmp_path / "index.bin"
+    segment_path = tmp_path / "segments" / "00000001.seg"
+    # A crash after the second body reached its segment but before its
+    # index record did, then a torn third body
+    os.truncate(index_path, os.path.getsize(index_path) // 2 + 3)
+    with open(segment_path, "ab") as f:
+        f.write(RECORD.pack(b"\x01" * 16, 1000, 2000) + b"partial")
+    size_before = os.path.getsize(segment_path)
+
+    reopened = PageStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.get(kept) == page(1)
+    assert reopened.get(lost) == page(2)
+    assert os.path.getsize(segment_path) < size_before
+    # New bodies go after the recovered ones
+    third = reopened.put(page(3))
+    reopened.close()
+
+    again = PageStore(str(tmp_path))
+    assert [again.get(digest) for digest in (kept, lost, third)] == [page(1), page(2), page(3)]
+    again.close()
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.db.repositories.product import ProductRepository
+from app.db.schemas.product import ProductCreate
+from tests.shop import scratch_dbs
+
+
+def product(i, **fields):
+    return ProductCreate(domain="shop.example", url=f"https://shop.example/p/{i}", **fields)
+
+
+class CountingRepo(ProductRepository):
+    """Records the size of every batch upserted"""
+
+    def __init__(self, session_factory):
+        super().__init__(session_factory)
+        self.batches = []
+
+    async def upsert_products(self, products, update_on_conflict=False):
+        self.batches.append(len(products))
+        return await super().upsert_products(products, update_on_conflict)
+
+
+def run(tmp_path, scenario):
+    async def main():
+        async with scratch_dbs(tmp_path) as (main_db, _):
+            return await scenario(CountingRepo(main_db))
+
+    return asyncio.run(main())
+
+
+def test_full_batch_flushes_without_waiting(tmp_path):
+    async def scenario(repo):
+        writer = repo.bulk_writer(max_batch_size=3, max_age=60)
+        futures = [writer.add(product(i)) for i in range(7)]
+        written = await asyncio.wait_for(asyncio.gather(*futures[:6]), 5)
+        pending = repo.batches[:]
+        await writer.close()
+        return written, pending, await futures[6], writer
+
+    written, pending, last, writer = run(tmp_path, scenario)
+    assert written == [True] * 6
+    assert pending == [3, 3]
+    assert last is True
+    assert writer.rows_written == 7
+    assert writer.batches_written == 3
+
+
+def test_partial_batch_flushes_after_max_age(tmp_path):
+    async def scenario(repo):
+        writer = repo.bulk_writer(max_batch_size=100, max_age=0.05)
+        first = writer.add(product(1))
+        # Queued under one URL, so one row and one result for both
+        second = writer.add(product(1, name="Renamed"))
+        await asyncio.sleep(0.01)
+        assert repo.batches == []
+        results = await asyncio.wait_for(asyncio.gather(first, second), 5)
+        stored = await repo.get_product_by_url("https://shop.example/p/1")
+        await writer.close()
+        return results, stored
+
+    results, stored = run(tmp_path, scenario)
+    assert results == [True, True]
+    assert stored.name == "Renamed"
+
+
+def test_existing_rows_are_reported_unwritten(tmp_path):
+    async def scenario(repo):
+        writer = repo.bulk_writer(max_batch_size=2)
+        assert await asyncio.gather(writer.add(product(1)), writer.add(product(2))) == [True, True]
+        again = writer.add(product(1, name="Ignored"))
+        new = writer.add(product(3))
+        await writer.flush()
+        stored = await repo.get_product_by_url("https://shop.example/p/1")
+        await writer.close()
+        return await again, await new, stored
+
+    again, new, stored = run(tmp_path, scenario)
+    assert again is False
+    assert new is True
+    assert stored.name is None
+
+
+def test_close_drains_and_rejects_new_products(tmp_path):
+    async def scenario(repo):
+        writer = repo.bulk_writer(max_batch_size=100, max_age=60)
+        future = writer.add(product(1))
+        await writer.close()
+        assert future.done() and future.result() is True
+        with pytest.raises(RuntimeError):
+            writer.add(product(2))
+        return repo.batches
+
+    assert run(tmp_path, scenario) == [1]
+
+
+def test_failed_batch_fails_its_futures(tmp_path):
+    class BrokenRepo(CountingRepo):
+        async def upsert_products(self, products, update_on_conflict=False):
+            raise RuntimeError("database is down")
+
+    async def main():
+        async with scratch_dbs(tmp_path) as (main_db, _):
+            writer = BrokenRepo(main_db).bulk_writer(max_batch_size=2)
+            futures = [writer.add(product(i)) for i in range(2)]
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            await writer.close()
+            return results, writer.rows_written
+
+    results, rows_written = asyncio.run(main())
+    assert [str(result) for result in results] == ["database is down"] * 2
+    assert rows_written == 0
@@ -0,0 +1,63 @@
+import asyncio
+import tracemalloc
+
+from app.profiling import CrawlProfiler
+
+
+async def profiled_job(output_dir, done, started=None):
+    profiler = CrawlProfiler(str(output_dir), sample_interval=0.001)
+    profiler.start()
+    if started is not None:
+        started.set()
+    await done.wait()
+    return await profiler.stop()
+
+
+def test_overlapping_profilers_share_tracemalloc(tmp_path):
+    async def main():
+        first_done, second_done, second_started = (asyncio.Event() for _ in range(3))
+        first = asyncio.create_task(profiled_job(tmp_path / "first", first_done))
+        second = asyncio.create_task(
+            profiled_job(tmp_path / "second", second_done, second_started)
+        )
+        await second_started.wait()
+
+        first_done.set()
+        first_report = await first
+        # The second profiler still needs tracing after the first stops
+        assert tracemalloc.is_tracing()
+        second_done.set()
+        second_report = await second
+        return first_report, second_report
+
+    assert not tracemalloc.is_tracing()
+    first_report, second_report = asyncio.run(main())
+    assert first_report["totals"]["tracemalloc_peak_mb"] is not None
+    assert second_report["totals"]["tracemalloc_peak_mb"] is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_stopped_elsewhere_skips_allocations(tmp_path):
+    async def main():
+        profiler = CrawlProfiler(str(tmp_path))
+        profiler.start()
+        tracemalloc.stop()
+        return await profiler.stop()
+
+    report = asyncio.run(main())
+    assert report["totals"]["tracemalloc_peak_mb"] is None
+    assert report["top_allocations"] == []
+
+
+def test_leaves_external_tracing_running(tmp_path):
+    async def main():
+        done = asyncio.Event()
+        done.set()
+        return await profiled_job(tmp_path, done)
+
+    tracemalloc.start()
+    try:
+        asyncio.run(main())
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
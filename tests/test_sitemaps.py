@@ -0,0 +1,152 @@
+import asyncio
+import gzip
+from datetime import datetime, timezone
+
+from app.crawler.sitemaps import SitemapReader, parse_lastmod
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+class FakeFetcher:
+    """Serves bodies by URL in small chunks, as StaticFetcher.stream does"""
+
+    def __init__(self, bodies, chunk_size=64):
+        self.bodies = bodies
+        self.chunk_size = chunk_size
+        self.fetched = []
+
+    async def fetch_text(self, url):
+        body = self.bodies.get(url)
+        return body.decode() if body is not None else None
+
+    async def stream(self, url):
+        self.fetched.append(url)
+        body = self.bodies.get(url, b"")
+        for start in range(0, len(body), self.chunk_size):
+            yield body[start : start + self.chunk_size]
+
+
+def urlset(*entries):
+    urls = "".join(
+        f"<url><loc> {loc} </loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>"
+        for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{urls}</urlset>'.encode()
+
+
+def index(*locs):
+    sitemaps = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f"<sitemapindex {NS}>{sitemaps}</sitemapindex>".encode()
+
+
+def read(bodies, **options):
+    fetcher = FakeFetcher(bodies)
+    reader = SitemapReader(fetcher, **options)
+
+    async def main():
+        return [entry async for entry in reader.entries("shop.example")]
+
+    return asyncio.run(main()), fetcher
+
+
+def test_follows_robots_sitemaps_and_indexes():
+    bodies = {
+        "https://shop.example/robots.txt": (
+            b"User-agent: *\nDisallow: /private/\nSitemap: https://shop.example/index.xml\n"
+        ),
+        "https://shop.example/index.xml": index(
+            "https://shop.example/products.xml.gz", "https://shop.example/categories.xml"
+        ),
+        "https://shop.example/products.xml.gz": gzip.compress(
+            urlset(
+                ("https://shop.example/product/1", "2024-05-01"),
+                ("https://shop.example/product/2", "2024-05-01T10:00:00+02:00"),
+                ("https://shop.example/private/3", None),
+            )
+        ),
+        "https://shop.example/categories.xml": urlset(
+            ("https://shop.example/category/shoes", "not a date")
+        ),
+    }
+    entries, fetcher = read(bodies)
+
+    assert [(entry.url, entry.sitemap.rsplit("/", 1)[1]) for entry in entries] == [
+        ("https://shop.example/product/1", "products.xml.gz"),
+        ("https://shop.example/product/2", "products.xml.gz"),
+        ("https://shop.example/category/shoes", "categories.xml"),
+    ]
+    assert [entry.lastmod for entry in entries] == [
+        datetime(2024, 5, 1, tzinfo=timezone.utc),
+        datetime(2024, 5, 1, 8, tzinfo=timezone.utc),
+        None,
+    ]
+    assert fetcher.fetched == [
+        "https://shop.example/index.xml",
+        "https://shop.example/products.xml.gz",
+        "https://shop.example/categories.xml",
+    ]
+
+
+def test_default_paths_without_robots_sitemaps():
+    bodies = {"https://shop.example/sitemap_index.xml": urlset(("https://shop.example/p/1", None))}
+    entries, fetcher = read(bodies)
+
+    assert [entry.url for entry in entries] == ["https://shop.example/p/1"]
+    assert fetcher.fetched == [
+        "https://shop.example/sitemap.xml",
+        "https://shop.example/sitemap_index.xml",
+    ]
+
+
+def test_stops_after_max_sitemaps_and_skips_repeats():
+    bodies = {
+        "https://shop.example/robots.txt": b"Sitemap: https://shop.example/index.xml\n",
+        # Lists itself, and more files than may be read
+        "https://shop.example/index.xml": index(
+            "https://shop.example/index.xml",
+            *(f"https://shop.example/{i}.xml" for i in range(5)),
+        ),
+        **{
+            f"https://shop.example/{i}.xml": urlset((f"https://shop.example/p/{i}", None))
+            for i in range(5)
+        },
+    }
+    entries, fetcher = read(bodies, max_sitemaps=3)
+
+    assert [entry.url for entry in entries] == ["https://shop.example/p/0", "https://shop.example/p/1"]
+    assert fetcher.fetched.count("https://shop.example/index.xml") == 1
+
+
+def test_inflated_size_is_capped():
+    many = urlset(*((f"https://shop.example/product/{i}", None) for i in range(1000)))
+    bodies = {
+        "https://shop.example/robots.txt": b"Sitemap: https://shop.example/big.xml.gz\n",
+        "https://shop.example/big.xml.gz": gzip.compress(many),
+    }
+    entries, _ = read(bodies, max_inflated_bytes=len(many) // 10)
+
+    assert 0 < len(entries) < 1000
+    assert [entry.url for entry in entries] == [
+        f"https://shop.example/product/{i}" for i in range(len(entries))
+    ]
+
+
+def test_malformed_xml_keeps_entries_before_the_damage():
+    body = urlset(("https://shop.example/product/1", None))[: -len("</urlset>")] + b"<url><loc>"
+    bodies = {
+        "https://shop.example/robots.txt": b"Sitemap: https://shop.example/broken.xml\n",
+        "https://shop.example/broken.xml": body,
+    }
+    entries, _ = read(bodies)
+
+    assert [entry.url for entry in entries] == ["https://shop.example/product/1"]
+
+
+def test_parse_lastmod():
+    assert parse_lastmod(None) is None
+    assert parse_lastmod("") is None
+    assert parse_lastmod("yesterday") is None
+    assert parse_lastmod(" 2024-01-02 ") == datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert parse_lastmod("2024-01-02T03:04:05Z") == datetime(
+        2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc
+    )
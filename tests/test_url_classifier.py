@@ -0,0 +1,92 @@
+import pytest
+
+from app.crawler.url_classifier import (
+    CATEGORY,
+    DEFAULT_RULES,
+    EXCLUDED,
+    OTHER,
+    PRODUCT,
+    URLClassifier,
+    URLRules,
+    classify_urls,
+)
+
+DOMAIN = "shop.example"
+
+
+@pytest.mark.parametrize(
+    "path,label",
+    [
+        ("/product/123", PRODUCT),
+        ("/p/123", PRODUCT),
+        ("/item/blue-shirt", PRODUCT),
+        ("/p-1234", PRODUCT),
+        ("/goods/teapot", PRODUCT),
+        ("/PRODUCT/123", PRODUCT),  # matched lowercased
+        # Product-looking listings and pagination
+        ("/shop/shoes", CATEGORY),
+        ("/products/", CATEGORY),
+        ("/collections/summer", CATEGORY),
+        ("/category/shoes?page=2", CATEGORY),
+        ("/category/shoes", CATEGORY),
+        ("/browse/tea", CATEGORY),
+        ("/c/42", CATEGORY),
+        # Exclusions win over everything else
+        ("/cart", EXCLUDED),
+        ("/account/login", EXCLUDED),
+        ("/product/123/wishlist", EXCLUDED),
+        ("/search?q=product", EXCLUDED),
+        ("/", OTHER),
+        ("/blog/2024/news", OTHER),
+    ],
+)
+def test_default_rules(path, label):
+    assert URLClassifier().classify(f"https://{DOMAIN}{path}", DOMAIN) == label
+
+
+def test_only_http_urls_on_the_domain():
+    labels = URLClassifier().classify_many(
+        [
+            "https://other.example/product/1",
+            "mailto:sales@shop.example",
+            "javascript:void(0)",
+            "ftp://shop.example/product/1",
+            "http://www.shop.example/product/1",
+        ],
+        DOMAIN,
+    )
+    assert labels == [EXCLUDED, EXCLUDED, EXCLUDED, EXCLUDED, PRODUCT]
+
+
+def test_host_and_scheme_are_not_matched():
+    # "shop" and "product" in the host must not make every URL a product
+    domain = "product-shop.example"
+    assert URLClassifier().classify(f"https://{domain}/blog", domain) == OTHER
+
+
+def test_domain_rules_and_compiled_cache():
+    sku = URLRules(
+        product_patterns=(r"/sku/\d+$",),
+        category_patterns=(r"^/dept/",),
+        excluded_patterns=(),
+    )
+    classifier = URLClassifier(domain_rules={"sku.example": sku})
+    urls = ["https://sku.example/sku/12", "https://sku.example/dept/1", "https://sku.example/cart"]
+
+    assert classifier.classify_many(urls, "sku.example") == [PRODUCT, CATEGORY, OTHER]
+    assert classifier.rules_for("sku.example") is sku
+    assert classifier.rules_for(DOMAIN) is DEFAULT_RULES
+    # Domains without rules of their own share the default compilation
+    classifier.classify("https://a.example/p/1", "a.example")
+    classifier.classify("https://b.example/p/1", "b.example")
+    assert set(classifier._compiled) == {"sku.example", None}
+
+
+def test_empty_pattern_lists_never_match():
+    classifier = URLClassifier(URLRules((), (), ()))
+    assert classifier.classify(f"https://{DOMAIN}/product/1", DOMAIN) == OTHER
+
+
+def test_classify_urls_matches_classifier():
+    urls = [f"https://{DOMAIN}{path}" for path in ("/product/1", "/shop/", "/cart", "/about-us")]
+    assert classify_urls(urls, DOMAIN, DEFAULT_RULES) == URLClassifier().classify_many(urls, DOMAIN)
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.accelerator.concurrent_manager import ConcurrentManager
+from app.crawler.url_classifier import CATEGORY, EXCLUDED, PRODUCT, URLRules, classify_urls
+from app.crawler.url_processor import URLProcessor, extract_urls_from_html
+
+HTML = """<html><head><base href="/shop/"></head><body>
+<a href="/product/1">One</a><a href="item-2"> </a><a href="/cart">Cart</a>
+<div data-url="/category/shoes"></div><a href="  ">blank</a>
+</body></html>"""
+
+CUSTOM = URLRules(
+    product_patterns=(r"/sku/\d+",),
+    category_patterns=(r"/aisle/",),
+    excluded_patterns=(r"/basket",),
+)
+
+
+def test_pool_workers_get_plain_data():
+    processor = URLProcessor(domain_rules={"custom.example": CUSTOM})
+    urls = [
+        "https://custom.example/sku/12",
+        "https://custom.example/aisle/3",
+        "https://custom.example/basket",
+        "https://custom.example/product/12",
+    ]
+
+    async def main():
+        manager = ConcurrentManager(max_workers=1, use_multiprocessing=True)
+        try:
+            links = await manager.run(extract_urls_from_html, HTML, "https://shop.example/")
+            labels = await manager.run(
+                classify_urls, urls, "custom.example", processor.url_rules("custom.example")
+            )
+            defaults = await manager.run(
+                classify_urls, urls, "other.example", processor.url_rules("other.example")
+            )
+        finally:
+            await manager.cleanup()
+        return links, labels, defaults
+
+    links, labels, defaults = asyncio.run(main())
+    assert links == processor.extract_urls_from_html(HTML, "https://shop.example/") == {
+        "https://shop.example/product/1",
+        "https://shop.example/shop/item-2",
+        "https://shop.example/cart",
+        "https://shop.example/category/shoes",
+    }
+    assert labels == processor.classify_many(urls, "custom.example")
+    assert labels[:3] == [PRODUCT, CATEGORY, EXCLUDED]
+    # Off-domain URLs are excluded under any rules
+    assert defaults == [EXCLUDED] * 4
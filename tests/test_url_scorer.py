@@ -0,0 +1,42 @@
+import asyncio
+from urllib.parse import urlsplit
+
+from sqlalchemy import select
+
+from app.db.models.product import Product, URLCache
+from tests.shop import SHOP, scratch_dbs, serve_shop, shop_crawler
+
+
+class EvenProducts:
+    """Scorer accepting only even product IDs"""
+
+    def filter_products(self, urls):
+        return [url for url in urls if int(url.rsplit("/", 1)[1]) % 2 == 0]
+
+
+def test_rejected_products_are_never_persisted(tmp_path):
+    scorer = EvenProducts()
+
+    async def main():
+        async with serve_shop() as domain, scratch_dbs(tmp_path) as (main_db, cache_db):
+            crawler = shop_crawler(main_db, cache_db, url_scorer=scorer)
+            published = []
+            crawler.on_products = lambda domain, urls: published.extend(urls)
+            results = await crawler.crawl_domains([domain])
+            async with main_db() as db:
+                stored = set((await db.execute(select(Product.url))).scalars())
+            async with cache_db() as db:
+                cached = set((await db.execute(select(URLCache.url))).scalars())
+            return crawler.scheduler.domains[domain], results[0], published, stored, cached
+
+    state, result, published, stored, cached = asyncio.run(main())
+    expected = {path for path in SHOP.reachable_products() if int(path.rsplit("/", 1)[1]) % 2 == 0}
+
+    def paths(urls):
+        return {urlsplit(url).path for url in urls}
+
+    assert paths(result["product_urls"]) == expected
+    assert paths(state.product_urls) == expected
+    assert paths(published) == expected
+    assert paths(stored) == expected
+    assert paths(url for url in cached if "/product/" in url) == expected